@@ -1,123 +1,245 @@
 # agent.py
-import json
-from llm import ask_llm
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from llm import (
+    LLM_ERRORS, LLMTimeout, ask_llm, ask_llm_async, ask_llm_stream, ask_llm_stream_async,
+    extract_json, last_call_stats
+)
+from answer_index import get_answer_index
+from llm_router import get_router
+from metrics import get_metrics
+from json_stream import JSONFieldStream
+from prompts import SYSTEM, PromptBuilder, approx_tokens
+from schemas import MOVE_ON_SCORE, Decision, Evaluation, FollowUp, SchemaError, Turn
+from skill_index import get_canonicalizer
+
+
+# Used when a reply still does not parse after the repair attempts
+FALLBACK_DECISION = Decision("ask", "general", "Tell me about your experience.")
+FALLBACK_EVALUATION = Evaluation(0.0)
+
+# Banked replies, used when no routed model answers within its latency budget
+BANKED_EVALUATION = Evaluation(
+    0.5, "average", "Not scored: no model answered within the latency budget."
+)
+QUESTION_BANK = (
+    "Describe a recent problem you solved with {skill}. What was your approach?",
+    "Walk me through how you would debug an issue involving {skill}.",
+    "What trade-offs do you consider when using {skill} in a real project?",
+    "Tell me about a mistake you made with {skill} and what you learned from it.",
+)
+
+# Speculative calls run here while the candidate is typing
+_speculation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculate")
+
+# Parse telemetry per prompt type (decide / evaluate / turn), process-wide
+_parse_lock = threading.Lock()
+_parse_counters = {}
+
+
+def _count(step, name):
+    with _parse_lock:
+        counters = _parse_counters.setdefault(step, {
+            "replies": 0, "parse_failures": 0, "repairs": 0, "repaired": 0,
+            "fallbacks": 0,
+        })
+        counters[name] += 1
+
+
+def parse_stats():
+    """Replies, parse failures, repair calls, successful repairs and fallbacks per prompt type."""
+    with _parse_lock:
+        return {step: dict(c) for step, c in _parse_counters.items()}
+
+
+def _timed_ask(step, system_prompt, prompt, schema, route, keep_alive=None):
+    # Speculation only tries the primary model; a miss falls back to the
+    # regular (routed) call
+    start = time.perf_counter()
+    try:
+        response = ask_llm(system_prompt, prompt, format=schema.json_schema(),
+                           model=route.model, timeout=route.timeout, keep_alive=keep_alive)
+    except LLM_ERRORS as e:
+        _record_speculative(step, route.model, start, e)
+        raise
+    return response, _record_speculative(step, route.model, start)
+
+
+async def _timed_ask_async(step, system_prompt, prompt, schema, route, keep_alive=None):
+    start = time.perf_counter()
+    try:
+        response = await ask_llm_async(system_prompt, prompt, format=schema.json_schema(),
+                                       model=route.model, timeout=route.timeout,
+                                       keep_alive=keep_alive)
+    except LLM_ERRORS as e:
+        _record_speculative(step, route.model, start, e)
+        raise
+    return response, _record_speculative(step, route.model, start)
+
+
+def _record_speculative(step, model, start, error=None):
+    elapsed = time.perf_counter() - start
+    timing = {"step": step, "model": model, "total_s": elapsed}
+    if error is None:
+        timing.update(last_call_stats())
+    else:
+        timing["error"] = "timeout" if isinstance(error, LLMTimeout) else type(error).__name__
+    get_metrics().record_call(timing, speculative=True)
+    return elapsed
 
 
 class InterviewAgent:
-    def __init__(self, job_info, resume_skills):
+    # Re-asks (with the bad reply and the error) before falling back
+    max_repairs = 1
+
+    def __init__(self, job_info, resume_skills, speculative=False, fused=False,
+                 state_budget=300, router=None, canonicalizer=None, answer_index=None,
+                 session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
         self.job_info = job_info
         self.resume_skills = resume_skills
         self.asked = []
-        self.confidence = {}
+        self.asked_skills = []     # skill of each entry in asked
+        self.confidence = {}       # canonical skill name -> latest score
         self.last_skill = None
         self.last_question = None
         self.answer_history = []   # NEW: for risk detection
+        self.timings = []          # per LLM call: first token / first visible / total
+        self.served = []           # (step, model or "bank") per answered step
+
+        # Primary model, latency budget and fallbacks per step (llm_router.py)
+        self.router = router or get_router()
+
+        # "Py", "python3" and "Python programming" are all one skill
+        # (skill_index.py): prompts, confidence and progress use canonical names
+        self.canonicalizer = canonicalizer or get_canonicalizer()
+        raw = resume_skills.split(",") if isinstance(resume_skills, str) else resume_skills
+        resume_matches = self.canonicalizer.canonical_skills(raw or [])
+        self.skill_names = [match.name for match in resume_matches]
+        # Canonical id -> the resume's name for it, so an LLM spelling with the
+        # same id ("blockchain" for "Blockchain development") scores that skill
+        self._skill_ids = {match.id: match.name for match in resume_matches}
+
+        # Every answer is indexed across sessions (answer_index.py) so the
+        # risk report can name the interviews an answer was copied from
+        self.answer_index = answer_index if answer_index is not None else get_answer_index()
+
+        # Stable per-session prefix + rolling state capped at state_budget tokens
+        self.prompts = PromptBuilder(job_info, self.skill_names, state_budget)
+
+        # Fused mode: take_turn() evaluates and picks the next step in one call
+        self.fused = fused
+
+        # Speculative mode: while the candidate answers, pre-generate the
+        # move-on question and a same-skill follow-up in the background
+        self.speculative = speculative
+        self._speculation = None
+        self.speculation_stats = {
+            "turns": 0, "hits": 0, "move_on_hits": 0, "follow_up_hits": 0,
+            "discarded": 0, "saved_s": 0.0,
+        }
 
     # -----------------------------
     # 1. DECIDE NEXT QUESTION
     # -----------------------------
-    def decide_next(self):
-        prompt = f"""
-You are an intelligent interview agent.
-
-JOB ROLE:
-Title: {self.job_info['Title']}
-Description: {self.job_info['Description']}
-
-Candidate skills:
-{self.resume_skills}
-
-Already asked:
-{self.asked}
-
-Skill confidence so far:
-{self.confidence}
-
-Rules:
-- Ask a mix of:
-  * Technical questions
-  * Behavioral questions
-  * Scenario-based questions (IMPORTANT)
-- Prefer skills with LOW confidence
-- Avoid repeating questions
-- Make questions practical and reasoning-based
-- If all important skills are evaluated, STOP
-
-Respond ONLY in JSON:
-{{
-  "action": "ask" or "stop",
-  "skill": "<skill>",
-  "question": "<question>"
-}}
-"""
-        response = ask_llm(
-            "You are a strict interview agent. Respond only in JSON.",
-            prompt
+    def decide_next(self, on_question=None):
+        start = time.perf_counter()
+        decision = self._ask(
+            "decide", SYSTEM, self._decide_prompt(), Decision,
+            {"question": on_question}
+        )
+        return self._step_done("decide", start, self._apply_decision(decision))
+
+    def _state(self, confidence=None):
+        return self.prompts.state(
+            self.asked, self.asked_skills,
+            self.confidence if confidence is None else confidence
         )
 
-        data = self._safe_json(response)
+    def _decide_prompt(self, confidence=None):
+        return self.prompts.decide(self._state(confidence))
 
+    def _apply_decision(self, decision):
+        return self._record_decision((decision or FALLBACK_DECISION).to_dict())
+
+    def _record_decision(self, data):
         if data["action"] == "ask":
+            match = self.canonicalizer.canonical(data["skill"] or "general")
+            data["skill"] = self._skill_ids.get(match.id, match.name)
             self.last_skill = data["skill"]
             self.last_question = data["question"]
             self.asked.append(data["question"])
+            self.asked_skills.append(data["skill"])
+            self._speculate()
 
         return data
 
     # -----------------------------
     # 2. EVALUATE ANSWER
     # -----------------------------
-    def evaluate_answer(self, answer):
-        prompt = f"""
-You are an expert technical interviewer.
-
-JOB ROLE:
-{self.job_info['Title']}
-
-Skill:
-{self.last_skill}
-
-Question:
-{self.last_question}
-
-Candidate Answer:
-{answer}
-
-Evaluate based on:
-- relevance
-- correctness
-- depth
-- clarity
+    def evaluate_answer(self, answer, on_reason=None):
+        start = time.perf_counter()
+        evaluation = self._ask(
+            "evaluate", SYSTEM, self._evaluate_prompt(answer), Evaluation,
+            {"reason": on_reason}
+        )
+        return self._step_done("evaluate", start, self._apply_evaluation(answer, evaluation))
 
-Respond ONLY in JSON:
-{{
-  "score": 0 to 1,
-  "level": "poor / average / good / excellent",
-  "reason": "short explanation",
-  "follow_up": "next question if needed"
-}}
-"""
-        response = ask_llm(
-            "You are a strict evaluator. Respond only in JSON.",
-            prompt
+    def _evaluate_prompt(self, answer):
+        return self.prompts.evaluate(
+            self._state(), self.last_skill, self.last_question, answer
         )
 
-        data = self._safe_json(response)
+    def _apply_evaluation(self, answer, evaluation):
+        data = (evaluation or FALLBACK_EVALUATION).to_dict()
 
-        score = float(data.get("score", 0))
+        score = data["score"]
 
         # Update confidence
         self.confidence[self.last_skill] = score
 
         # Store answer for risk detection
         self.answer_history.append(answer)
+        if self.answer_index is not None:
+            self._index_answer(len(self.answer_history) - 1, answer)
 
         return data
 
     # -----------------------------
     # 3. FOLLOW-UP LOGIC
     # -----------------------------
-    def next_step_after_evaluation(self, evaluation):
+    def next_step_after_evaluation(self, evaluation, on_question=None):
+        start = time.perf_counter()
+        spec = self._take_speculation()
+        follow_up = self._follow_up(evaluation)
+
+        if follow_up is not None:
+            if spec and not evaluation.get("follow_up"):
+                question = self._use_speculation(
+                    "follow_up", self._wait(spec.pop("follow_up")), FollowUp
+                )
+                if question:
+                    follow_up["question"] = question.question
+            self._discard(spec)
+            self._speculate()
+            return self._step_done("follow_up", start, follow_up)
+
+        if spec:
+            decision = self._use_speculation(
+                "move_on", self._wait(spec.pop("decide")), Decision
+            )
+            self._discard(spec)
+            if decision is not None:
+                return self._step_done(
+                    "decide", start, self._apply_speculated_decision(decision, on_question)
+                )
+        return self.decide_next(on_question)
+
+    def _follow_up(self, evaluation):
+        """Same-skill follow-up for low/medium scores; None means move on."""
         score = float(evaluation.get("score", 0))
 
         # Low score → same skill (simpler follow-up)
@@ -125,78 +247,655 @@ Respond ONLY in JSON:
             return {
                 "action": "ask",
                 "skill": self.last_skill,
-                "question": evaluation.get(
-                    "follow_up",
-                    "Can you explain that more clearly?"
-                )
+                "question": evaluation.get("follow_up")
+                or "Can you explain that more clearly?"
             }
 
         # Medium score → deeper follow-up
-        elif score < 0.8:
+        elif score < MOVE_ON_SCORE:
             return {
                 "action": "ask",
                 "skill": self.last_skill,
-                "question": evaluation.get(
-                    "follow_up",
-                    "Let's go deeper into this concept."
-                )
+                "question": evaluation.get("follow_up")
+                or "Let's go deeper into this concept."
             }
 
         # High score → move to next skill
-        else:
-            return self.decide_next()
+        return None
+
+    # -----------------------------
+    # 3a. ONE TURN (evaluate + next step)
+    # -----------------------------
+    def take_turn(self, answer, on_reason=None, on_question=None):
+        """Evaluate answer and choose the next step: (evaluation, decision).
+
+        Two LLM calls by default (one if the score leads to a follow-up);
+        with fused=True a single call returns both, with the same thresholds
+        and state updates.
+        """
+        start = time.perf_counter()
+        if not self.fused:
+            evaluation = self.evaluate_answer(answer, on_reason)
+            decision = self.next_step_after_evaluation(evaluation, on_question)
+            return self._step_done("turn", start, (evaluation, decision))
+
+        turn = self._ask(
+            "turn", SYSTEM, self._turn_prompt(answer), Turn,
+            self._turn_callbacks(on_reason, on_question)
+        )
+        evaluation, decision = self._apply_turn(answer, turn)
+        if decision is None:
+            # No usable next question in the fused reply: ask separately
+            decision = self.decide_next(on_question)
+        return self._step_done("turn", start, (evaluation, decision))
+
+    def _turn_prompt(self, answer):
+        return self.prompts.turn(
+            self._state(), self.last_skill, self.last_question, answer
+        )
+
+    def _turn_callbacks(self, on_reason, on_question):
+        # score streams before the questions, so only the branch the score
+        # selects is shown: follow_up below the threshold, question above
+        seen = {}
+
+        def on_score(value):
+            try:
+                seen["score"] = float(value)
+            except (TypeError, ValueError):
+                seen["score"] = 0.0
+
+        def show(moves_on):
+            def callback(text):
+                if "score" in seen and (seen["score"] >= MOVE_ON_SCORE) == moves_on:
+                    on_question(text)
+            return callback
+
+        if on_question is None:
+            return {"reason": on_reason}
+        return {
+            "score": on_score,
+            "reason": on_reason,
+            "follow_up": show(False),
+            "question": show(True),
+        }
+
+    def _apply_turn(self, answer, turn):
+        """State updates of evaluate_answer + next_step_after_evaluation.
+
+        Returns (evaluation, decision); decision is None if the reply moves on
+        without a usable next action.
+        """
+        evaluation = self._apply_evaluation(answer, turn and turn.evaluation())
+
+        follow_up = self._follow_up(evaluation)
+        if follow_up is not None:
+            return evaluation, follow_up
+
+        decision = turn.decision()
+        try:
+            decision.validate()
+        except SchemaError:
+            return evaluation, None
+        return evaluation, self._record_decision(decision.to_dict())
+
+    # -----------------------------
+    # 3b. SPECULATION
+    # -----------------------------
+    def _follow_up_prompt(self):
+        return self.prompts.follow_up(self._state(), self.last_skill, self.last_question)
+
+    def _speculate(self):
+        """Start both speculative branches for the question just posed."""
+        # A fused turn already returns the next question with the evaluation
+        if not self.speculative or self.fused:
+            return
+        self._discard(self._speculation)
+        # Move-on branch: assume the current skill just reached the threshold
+        confidence = dict(self.confidence)
+        confidence[self.last_skill] = MOVE_ON_SCORE
+        self._speculation = {
+            "decide": self._launch(
+                "decide", SYSTEM, self._decide_prompt(confidence), Decision
+            ),
+            "follow_up": self._launch(
+                "follow_up", SYSTEM, self._follow_up_prompt(), FollowUp
+            ),
+        }
+
+    def _launch(self, step, system_prompt, prompt, schema):
+        return _speculation_pool.submit(
+            _timed_ask, step, system_prompt, prompt, schema,
+            self.router.route(step), self.router.keep_alive
+        )
+
+    def _wait(self, future):
+        """(response or None, generation seconds, seconds spent waiting)."""
+        start = time.perf_counter()
+        try:
+            response, generation_s = future.result()
+        except Exception:
+            return None, 0.0, time.perf_counter() - start
+        return response, generation_s, time.perf_counter() - start
+
+    def _take_speculation(self):
+        spec, self._speculation = self._speculation, None
+        if spec:
+            self.speculation_stats["turns"] += 1
+        return spec
+
+    def _discard(self, spec):
+        for future in (spec or {}).values():
+            future.cancel()
+            if future.done() and not future.cancelled():
+                future.exception()   # retrieve so failures are not logged later
+            self.speculation_stats["discarded"] += 1
+
+    def _use_speculation(self, branch, result, schema):
+        """Prepared result parsed into schema, or None (counted as discarded)."""
+        response, generation_s, waited = result
+        try:
+            value = schema.parse(response) if response is not None else None
+        except SchemaError:
+            value = None
+        stats = self.speculation_stats
+        if value is None:
+            stats["discarded"] += 1
+            return None
+        stats["hits"] += 1
+        stats[f"{branch}_hits"] += 1
+        stats["saved_s"] += max(generation_s - waited, 0.0)
+        step = "decide" if branch == "move_on" else "follow_up"
+        model = self.router.route(step).model
+        self.router.record(step, model)
+        self.served.append((step, model))
+        self.timings.append({
+            "step": step, "model": model,
+            "streamed": False, "speculative": True,
+            "first_token_s": None, "first_visible_s": waited, "total_s": waited,
+        })
+        return value
+
+    def _apply_speculated_decision(self, decision, on_question):
+        decision = self._apply_decision(decision)
+        if on_question and decision.get("question"):
+            on_question(decision["question"])
+        return decision
+
+    def speculation_report(self):
+        stats = dict(self.speculation_stats)
+        stats["hit_rate"] = stats["hits"] / stats["turns"] if stats["turns"] else 0.0
+        return stats
+
+    def routing_report(self):
+        """{step: {model: count}} of who answered each step ("bank" = no model in budget)."""
+        report = {}
+        for step, model in self.served:
+            counts = report.setdefault(step, {})
+            counts[model] = counts.get(model, 0) + 1
+        return report
+
+    def progress(self):
+        """(resume skills scored so far, resume skills), counted by canonical skill."""
+        done = sum(1 for name in self.skill_names if name in self.confidence)
+        return done, len(self.skill_names)
+
+    # -----------------------------
+    # 3c. SERIALIZATION (session_store.py)
+    # -----------------------------
+    STATE_VERSION = 1
+
+    def to_state(self):
+        """Compact, JSON-ready interview state.
+
+        Only what the next turn needs: prompts are rebuilt from job_info and
+        resume_skills, timings are per-process diagnostics and in-flight
+        speculation is dropped (the next question is simply not prepared).
+        """
+        return {
+            "v": self.STATE_VERSION,
+            "session_id": self.session_id,
+            "job_info": self.job_info,
+            "resume_skills": self.resume_skills,
+            "asked": self.asked,
+            "asked_skills": self.asked_skills,
+            "confidence": self.confidence,
+            "last_skill": self.last_skill,
+            "last_question": self.last_question,
+            "answer_history": self.answer_history,
+            "served": [list(s) for s in self.served],
+            "speculation_stats": self.speculation_stats,
+            "fused": self.fused,
+            "speculative": self.speculative,
+            "state_budget": self.prompts.state_budget,
+        }
+
+    @classmethod
+    def from_state(cls, state, **overrides):
+        """Rehydrate an agent saved by to_state(); overrides go to __init__."""
+        if state.get("v") != cls.STATE_VERSION:
+            raise ValueError(f"unsupported agent state version {state.get('v')!r}")
+        kwargs = {
+            "speculative": state["speculative"],
+            "fused": state["fused"],
+            "state_budget": state["state_budget"],
+            "session_id": state.get("session_id"),
+        }
+        kwargs.update(overrides)
+        agent = cls(state["job_info"], state["resume_skills"], **kwargs)
+        agent.asked = list(state["asked"])
+        agent.asked_skills = list(state["asked_skills"])
+        agent.confidence = dict(state["confidence"])
+        agent.last_skill = state["last_skill"]
+        agent.last_question = state["last_question"]
+        agent.answer_history = list(state["answer_history"])
+        agent.served = [tuple(s) for s in state.get("served", [])]
+        agent.speculation_stats.update(state.get("speculation_stats", {}))
+        return agent
+
+    def suspend(self):
+        """Cancel prepared questions before the agent is dropped from memory."""
+        spec, self._speculation = self._speculation, None
+        self._discard(spec)
 
     # -----------------------------
     # 4. AI RISK DETECTION (NEW)
     # -----------------------------
     def compute_risk_score(self):
+        return self._risk_report(self.answer_matches())
+
+    def _risk_report(self, matches):
         answers = self.answer_history
 
-        if len(answers) < 2:
-            return {"risk": "LOW", "score": 0.1}
+        # matches: near-duplicates of other sessions' answers, {"answer": turn,
+        # "session", "turn", "jaccard", "cosine"} each, best first
+        copied = len({m["answer"] for m in matches})
+
+        if len(answers) < 2 and not copied:
+            return {"risk": "LOW", "score": 0.1, "matches": [], "copied_answers": 0}
 
-        # 1. Repetition check
-        unique_ratio = len(set(answers)) / len(answers)
+        risk_score = 0
 
-        # 2. Length consistency
-        lengths = [len(a.split()) for a in answers]
-        variance = max(lengths) - min(lengths)
+        if len(answers) >= 2:
+            # 1. Repetition check
+            unique_ratio = len(set(answers)) / len(answers)
 
-        # 3. Overly long answers (possible AI)
-        long_answers = all(len(a.split()) > 40 for a in answers)
+            # 2. Length consistency
+            lengths = [len(a.split()) for a in answers]
+            variance = max(lengths) - min(lengths)
 
-        risk_score = 0
+            # 3. Overly long answers (possible AI)
+            long_answers = all(len(a.split()) > 40 for a in answers)
 
-        if unique_ratio < 0.7:
-            risk_score += 0.4
+            if unique_ratio < 0.7:
+                risk_score += 0.4
 
-        if variance < 5:
-            risk_score += 0.3
+            if variance < 5:
+                risk_score += 0.3
 
-        if long_answers:
-            risk_score += 0.3
+            if long_answers:
+                risk_score += 0.3
 
+        # 4. Answers copied from other interviews
+        if copied:
+            risk_score += 0.4 if copied / len(answers) >= 0.5 else 0.2
+        risk_score = min(risk_score, 1.0)
+
+        report = {"matches": matches, "copied_answers": copied}
         if risk_score > 0.7:
-            return {"risk": "HIGH", "score": risk_score}
+            return {"risk": "HIGH", "score": risk_score, **report}
         elif risk_score > 0.4:
-            return {"risk": "MEDIUM", "score": risk_score}
+            return {"risk": "MEDIUM", "score": risk_score, **report}
         else:
-            return {"risk": "LOW", "score": risk_score}
+            return {"risk": "LOW", "score": risk_score, **report}
+
+    def _index_answer(self, turn, answer):
+        self.answer_index.add(self.session_id, turn, answer)
+
+    def answer_matches(self):
+        """Other sessions' near-duplicates of this session's answers (answer_index.py)."""
+        if self.answer_index is None or not self.answer_history:
+            return []
+        found = self.answer_index.find(self.answer_history, exclude_session=self.session_id)
+        return [
+            {"answer": turn, **match._asdict()}
+            for turn, answer_matches in enumerate(found)
+            for match in answer_matches
+        ]
+
+    def final_scores(self):
+        """Resume, interview and final score with the risk report (the results screen)."""
+        return self._final_scores(self.compute_risk_score())
+
+    def _final_scores(self, risk):
+        scores = self.confidence
+        interview_score = sum(scores.values()) / len(scores) if scores else 0
+
+        # Distinct canonical skills: "Py, Python, python3" counts once (since
+        # skill_index.py; raw lists with aliases used to score higher)
+        resume_score = min(1.0, len(self.skill_names) / 10)
+
+        risk_penalty = risk["score"] * 0.1
+
+        final_score = (
+            0.5 * resume_score +
+            0.4 * interview_score -
+            0.1 * risk_penalty
+        )
+        return {
+            "resume_score": resume_score,
+            "interview_score": interview_score,
+            "final_score": final_score,
+            "risk": risk,
+        }
+
+    # -----------------------------
+    # 5. LLM CALL (optionally streamed)
+    # -----------------------------
+    def _ask(self, step, system_prompt, prompt, schema, on_fields=None):
+        """Call the LLM with schema as constrained output and parse the reply.
+
+        If on_fields maps a JSON field to a callback, the reply is streamed
+        and each callback gets the growing value of its field. Returns a
+        schema instance, or None if the reply still does not parse after
+        max_repairs repair calls.
+
+        Records first_token_s (first chunk), first_visible_s (first text of a
+        watched field), total_s and the token counts from llm.last_call_stats()
+        for every call in self.timings.
+        """
+        on_fields = {k: f for k, f in (on_fields or {}).items() if f is not None}
+        format = schema.json_schema()
+        response = self._call(step, system_prompt, prompt, format, on_fields)
+
+        for attempt in range(self.max_repairs + 1):
+            if response is None:
+                return self._banked(step, schema)
+            value, error = self._parse_reply(step, schema, response, attempt)
+            if error is None or attempt == self.max_repairs:
+                return value
+            repair_prompt = self._repair_prompt(prompt, response, error)
+            get_metrics().record_retry(step, "repair")
+            response = self._call(f"{step}_repair", system_prompt, repair_prompt, format)
+
+    def _call(self, step, system_prompt, prompt, format, on_fields=None):
+        """Reply text from the first model of the step's route that answers
+        within its timeout, or None if all of them time out.
+
+        Any other error falls through to the next model too, and is raised
+        from the last one. Every attempt is recorded in self.timings.
+        """
+        chain = self.router.route(step).chain()
+        for i, (model, timeout) in enumerate(chain):
+            timing = self._start_timing(step, on_fields, system_prompt + prompt)
+            options = {"model": model, "timeout": timeout,
+                       "keep_alive": self.router.keep_alive}
+            try:
+                if not on_fields:
+                    response = ask_llm(system_prompt, prompt, format=format, **options)
+                else:
+                    parser = JSONFieldStream()
+                    chunks = []
+                    for chunk in ask_llm_stream(system_prompt, prompt, format=format,
+                                                **options):
+                        self._on_chunk(timing, parser, chunks, chunk, on_fields)
+                    response = extract_json("".join(chunks))
+            except LLM_ERRORS as e:
+                if not self._failed(step, timing, model, e, last=i == len(chain) - 1):
+                    raise
+                continue
+            self._finish_timing(timing, response)
+            self._served_by(step, timing["model"])
+            return response
+        return None
+
+    def _failed(self, step, timing, model, error, last):
+        """Record a failed attempt; False if the error should propagate."""
+        timed_out = isinstance(error, LLMTimeout)
+        if last and not timed_out:
+            return False
+        timing["total_s"] = time.perf_counter() - timing.pop("_start")
+        timing.update(model=model, error="timeout" if timed_out else type(error).__name__)
+        self.timings.append(timing)
+        self.router.record(step, model, failed=True)
+        get_metrics().record_call(timing)
+        if not last:
+            get_metrics().record_retry(step, "timeout" if timed_out else "error")
+        return True
+
+    def _served_by(self, step, model):
+        self.router.record(step, model)
+        self.served.append((step, model))
+
+    def _banked(self, step, schema):
+        """Reply for a step no routed model answered in time."""
+        self._served_by(step, "bank")
+        if schema is Evaluation:
+            return BANKED_EVALUATION
+        if schema is FollowUp:
+            return FollowUp(QUESTION_BANK[0].format(skill=self.last_skill or "this"))
+        decision = self._banked_decision()
+        if schema is Turn:
+            return Turn(**BANKED_EVALUATION.to_dict(), **decision.to_dict())
+        return decision
+
+    def _banked_decision(self):
+        skills = self.skill_names or ["general"]
+        # Least confident skill first (unscored counts as 0), then least asked
+        skill = min(skills, key=lambda s: (self.confidence.get(s, 0.0),
+                                           self.asked_skills.count(s)))
+        if self.confidence.get(skill, 0.0) >= MOVE_ON_SCORE:
+            return Decision("stop")
+        for i in range(len(QUESTION_BANK)):
+            question = QUESTION_BANK[(len(self.asked) + i) % len(QUESTION_BANK)]
+            question = question.format(skill=skill)
+            if question not in self.asked:
+                break
+        return Decision("ask", skill, question)
+
+    def _start_timing(self, step, on_fields, prompt_text=""):
+        return {"step": step, "streamed": bool(on_fields),
+                "prompt_tokens_est": approx_tokens(prompt_text),
+                "first_token_s": None, "first_visible_s": None,
+                "_start": time.perf_counter()}
+
+    def _on_chunk(self, timing, parser, chunks, chunk, on_fields):
+        elapsed = time.perf_counter() - timing["_start"]
+        if timing["first_token_s"] is None:
+            timing["first_token_s"] = elapsed
+        chunks.append(chunk)
+        for _, key, value in parser.feed(chunk):
+            callback = on_fields.get(key)
+            if callback is None or value in ("", None):
+                continue
+            if timing["first_visible_s"] is None and isinstance(value, str):
+                timing["first_visible_s"] = elapsed
+            callback(value)
+
+    def _finish_timing(self, timing, response):
+        timing["total_s"] = time.perf_counter() - timing.pop("_start")
+        timing.update(last_call_stats())
+        self.timings.append(timing)
+        get_metrics().record_call(timing)
+        return response
+
+    def _step_done(self, operation, start, result):
+        """Record one agent step's wall time; returns result."""
+        get_metrics().record_step(operation, time.perf_counter() - start,
+                                  served_by=self.served[-1][1] if self.served else None)
+        return result
 
     # -----------------------------
-    # 5. SAFE JSON PARSER
+    # 6. STRUCTURED REPLIES
     # -----------------------------
-    def _safe_json(self, text):
+    def _parse_reply(self, step, schema, response, attempt):
+        """(instance, None) or (None, error); counts failures, repairs and fallbacks."""
+        if attempt == 0:
+            _count(step, "replies")
+        try:
+            value = schema.parse(response)
+        except SchemaError as e:
+            _count(step, "parse_failures")
+            if attempt == self.max_repairs:
+                _count(step, "fallbacks")
+            else:
+                _count(step, "repairs")
+            return None, e
+        if attempt:
+            _count(step, "repaired")
+        return value, None
+
+    def _repair_prompt(self, prompt, reply, error):
+        # Same prefix as the original prompt, so the backend can reuse it
+        return f"""{prompt}
+Your previous reply was not valid:
+{reply}
+
+Problem: {error}
+
+Respond again with ONLY the JSON object described above.
+"""
+
+
+class AsyncInterviewAgent(InterviewAgent):
+    """InterviewAgent whose LLM steps are coroutines.
+
+    Same prompts, state updates and follow-up thresholds; calls go through
+    ask_llm_async, so many sessions can share one event loop and the
+    per-backend in-flight limit in llm.py.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indexing = []   # answer_index writes running in the default executor
+
+    async def decide_next(self, on_question=None):
+        start = time.perf_counter()
+        decision = await self._ask(
+            "decide", SYSTEM, self._decide_prompt(), Decision,
+            {"question": on_question}
+        )
+        return self._step_done("decide", start, self._apply_decision(decision))
+
+    async def evaluate_answer(self, answer, on_reason=None):
+        start = time.perf_counter()
+        evaluation = await self._ask(
+            "evaluate", SYSTEM, self._evaluate_prompt(answer), Evaluation,
+            {"reason": on_reason}
+        )
+        return self._step_done("evaluate", start, self._apply_evaluation(answer, evaluation))
+
+    async def next_step_after_evaluation(self, evaluation, on_question=None):
+        start = time.perf_counter()
+        spec = self._take_speculation()
+        follow_up = self._follow_up(evaluation)
+
+        if follow_up is not None:
+            if spec and not evaluation.get("follow_up"):
+                question = self._use_speculation(
+                    "follow_up", await self._wait(spec.pop("follow_up")), FollowUp
+                )
+                if question:
+                    follow_up["question"] = question.question
+            self._discard(spec)
+            self._speculate()
+            return self._step_done("follow_up", start, follow_up)
+
+        if spec:
+            decision = self._use_speculation(
+                "move_on", await self._wait(spec.pop("decide")), Decision
+            )
+            self._discard(spec)
+            if decision is not None:
+                return self._step_done(
+                    "decide", start, self._apply_speculated_decision(decision, on_question)
+                )
+        return await self.decide_next(on_question)
+
+    async def take_turn(self, answer, on_reason=None, on_question=None):
+        start = time.perf_counter()
+        if not self.fused:
+            evaluation = await self.evaluate_answer(answer, on_reason)
+            decision = await self.next_step_after_evaluation(evaluation, on_question)
+            return self._step_done("turn", start, (evaluation, decision))
+
+        turn = await self._ask(
+            "turn", SYSTEM, self._turn_prompt(answer), Turn,
+            self._turn_callbacks(on_reason, on_question)
+        )
+        evaluation, decision = self._apply_turn(answer, turn)
+        if decision is None:
+            decision = await self.decide_next(on_question)
+        return self._step_done("turn", start, (evaluation, decision))
+
+    # answer_index.py does SQLite writes and lookups (and loads the encoder on
+    # first use): run them in the default executor, not on the event loop
+    def _index_answer(self, turn, answer):
+        loop = asyncio.get_running_loop()
+        self._indexing.append(loop.run_in_executor(
+            None, self.answer_index.add, self.session_id, turn, answer
+        ))
+
+    async def compute_risk_score(self):
+        if self._indexing:
+            indexing, self._indexing = self._indexing, []
+            await asyncio.gather(*indexing)
+        matches = await asyncio.get_running_loop().run_in_executor(None, self.answer_matches)
+        return self._risk_report(matches)
+
+    async def final_scores(self):
+        return self._final_scores(await self.compute_risk_score())
+
+    def _launch(self, step, system_prompt, prompt, schema):
+        return asyncio.ensure_future(_timed_ask_async(
+            step, system_prompt, prompt, schema, self.router.route(step), self.router.keep_alive
+        ))
+
+    async def _wait(self, future):
+        start = time.perf_counter()
         try:
-            return json.loads(text)
-        except:
+            response, generation_s = await future
+        except Exception:
+            return None, 0.0, time.perf_counter() - start
+        return response, generation_s, time.perf_counter() - start
+
+    async def _ask(self, step, system_prompt, prompt, schema, on_fields=None):
+        on_fields = {k: f for k, f in (on_fields or {}).items() if f is not None}
+        format = schema.json_schema()
+        response = await self._call(step, system_prompt, prompt, format, on_fields)
+
+        for attempt in range(self.max_repairs + 1):
+            if response is None:
+                return self._banked(step, schema)
+            value, error = self._parse_reply(step, schema, response, attempt)
+            if error is None or attempt == self.max_repairs:
+                return value
+            repair_prompt = self._repair_prompt(prompt, response, error)
+            get_metrics().record_retry(step, "repair")
+            response = await self._call(f"{step}_repair", system_prompt, repair_prompt, format)
+
+    async def _call(self, step, system_prompt, prompt, format, on_fields=None):
+        chain = self.router.route(step).chain()
+        for i, (model, timeout) in enumerate(chain):
+            timing = self._start_timing(step, on_fields, system_prompt + prompt)
+            options = {"model": model, "timeout": timeout,
+                       "keep_alive": self.router.keep_alive}
             try:
-                start = text.find("{")
-                end = text.rfind("}") + 1
-                return json.loads(text[start:end])
-            except:
-                return {
-                    "action": "ask",
-                    "skill": "general",
-                    "question": "Tell me about your experience."
-                }
\ No newline at end of file
+                if not on_fields:
+                    response = await ask_llm_async(system_prompt, prompt, format=format,
+                                                   **options)
+                else:
+                    parser = JSONFieldStream()
+                    chunks = []
+                    async for chunk in ask_llm_stream_async(system_prompt, prompt,
+                                                            format=format, **options):
+                        self._on_chunk(timing, parser, chunks, chunk, on_fields)
+                    response = extract_json("".join(chunks))
+            except LLM_ERRORS as e:
+                if not self._failed(step, timing, model, e, last=i == len(chain) - 1):
+                    raise
+                continue
+            self._finish_timing(timing, response)
+            self._served_by(step, timing["model"])
+            return response
+        return None
@@ -0,0 +1,530 @@
+# answer_index.py
+#
+# Near-duplicate answers across interviews. Every answer of at least
+# MIN_WORDS words is indexed twice:
+#
+#   lexical   MinHash signature of its word 3-shingles, bucketed by LSH
+#             bands in SQLite; a lookup reads the answer's band buckets
+#             only, so the cost depends on the number of near-duplicates,
+#             not on the number of answers indexed
+#   semantic  SBERT embedding (the fine-tuned model of faiss_search.py),
+#             stored as float16 in SQLite and searched with a FAISS IVF-PQ
+#             index (~60 bytes per answer in RAM, saved next to the SQLite
+#             file); candidates are re-scored with the exact cosine. Catches
+#             paraphrases that share few shingles
+#
+# add() only writes the lexical index; embeddings are computed in batches
+# by a background thread, outside the index lock.
+#
+# find() returns, per answer, the other sessions' answers whose estimated
+# Jaccard or cosine similarity passes the thresholds. InterviewAgent.
+# compute_risk_score() uses it for "copied" answers. Without the model
+# (no faiss_assets) only the lexical index is used.
+#
+# Off unless NCO_ANSWER_INDEX is set: the index is shared by every run that
+# points at the same file, so scores depend on what was indexed before.
+#
+#   NCO_ANSWER_INDEX   SQLite file (unset, "" or "off": no copy detection)
+#
+#   python answer_index.py stats --path answer_index.sqlite
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+
+import numpy as np
+
+NUM_PERM = 72
+BANDS = 24                 # 24 bands x 3 rows: a 50% Jaccard pair is a candidate 96% of the time
+SHINGLE_WORDS = 3
+MIN_WORDS = 8              # shorter answers ("Not sure") are too common to compare
+MAX_CANDIDATES = 200       # lexical candidates verified per answer
+JACCARD_THRESHOLD = 0.5
+COSINE_THRESHOLD = 0.92
+SEMANTIC_K = 8
+MAX_MATCHES = 5            # per answer, one (the closest) per other session
+EMBED_BATCH = 32
+TRAIN_SIZE = 10000         # vectors searched exactly until IVF-PQ can be trained
+NLIST = 256
+NPROBE = 16
+SAVE_EVERY = 10000         # new vectors between writes of the FAISS file
+MAX_RETRY_S = 60           # backoff cap when encoding fails
+
+_PRIME = (1 << 61) - 1
+_MASK32 = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(1)
+# Fixed permutations: signatures are comparable across processes and runs
+_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+AnswerMatch = namedtuple("AnswerMatch", "session turn jaccard cosine")
+
+
+def shingles(text, k=SHINGLE_WORDS):
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def minhash(text):
+    """uint32[NUM_PERM] MinHash signature of text's word shingles."""
+    grams = shingles(text)
+    if not grams:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    hv = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams),
+                     dtype=np.uint64, count=len(grams))
+    hashed = ((np.outer(hv, _A) + _B) % np.uint64(_PRIME)) & _MASK32
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """One signed 64-bit bucket key per LSH band (FNV-1a over the band's rows)."""
+    rows = signature.reshape(BANDS, NUM_PERM // BANDS).astype(np.uint64)
+    keys = _FNV_OFFSET ^ np.arange(BANDS, dtype=np.uint64)
+    for column in rows.T:
+        keys = (keys ^ column) * _FNV_PRIME
+    return keys.view(np.int64).tolist()
+
+
+def jaccard_estimate(a, b):
+    return float(np.mean(a == b))
+
+
+def word_count(text):
+    return len(_TOKEN.findall(text.lower()))
+
+
+class AnswerIndex:
+    """Answers of every session, searchable for near-duplicates."""
+
+    def __init__(self, path="answer_index.sqlite", assets_dir="faiss_assets",
+                 jaccard_threshold=JACCARD_THRESHOLD, cosine_threshold=COSINE_THRESHOLD,
+                 semantic=True, encoder="torch"):
+        self.path = path
+        self.assets_dir = assets_dir
+        self.encoder = encoder
+        self.jaccard_threshold = jaccard_threshold
+        self.cosine_threshold = cosine_threshold
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY, session TEXT, turn INTEGER, words INTEGER,"
+            " signature BLOB, embedding BLOB, created REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS answers_session ON answers(session)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh ("
+            " bucket INTEGER, answer INTEGER, PRIMARY KEY (bucket, answer)) WITHOUT ROWID"
+        )
+        self._lock = threading.RLock()      # SQLite connection and vector index
+        self._semantic = semantic
+        self._searcher = None
+        self._load_lock = threading.Lock()
+        self._vectors = None                # FAISS index over embedded answers
+        self._vectors_upto = 0              # highest answer id in it
+        self._unsaved = 0
+        # Background embedder: (id, text) waiting for one batched encode
+        self._queue = deque()
+        self._queue_cond = threading.Condition()
+        self._embedding = False
+        self._closing = False
+        self._failures = 0
+        self._embedder = None
+        self.stats = {"added": 0, "skipped_short": 0, "lookups": 0, "candidates": 0,
+                      "lexical_matches": 0, "semantic_matches": 0, "embedded": 0,
+                      "embed_failures": 0}
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get("NCO_ANSWER_INDEX", "")
+        if path.lower() in ("", "off", "0", "none"):
+            return None
+        return cls(path)
+
+    # -----------------------------
+    # Indexing
+    # -----------------------------
+    def add(self, session, turn, text):
+        """Index one answer; returns its id, or None if too short to compare."""
+        return self.add_many([(session, turn, text)])[0]
+
+    def add_many(self, answers):
+        """[(session, turn, text)] in one transaction; ids (None when skipped)."""
+        ids = []
+        pending = []
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                lsh_rows = []
+                for session, turn, text in answers:
+                    words = word_count(text)
+                    if words < MIN_WORDS:
+                        self.stats["skipped_short"] += 1
+                        ids.append(None)
+                        continue
+                    signature = minhash(text)
+                    answer_id = self.conn.execute(
+                        "INSERT INTO answers (session, turn, words, signature, created)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (session, turn, words, signature.tobytes(), now)
+                    ).lastrowid
+                    lsh_rows.extend((bucket, answer_id) for bucket in band_buckets(signature))
+                    ids.append(answer_id)
+                    if self._semantic:
+                        pending.append((answer_id, text))
+                self.conn.executemany("INSERT OR IGNORE INTO lsh VALUES (?, ?)", lsh_rows)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.stats["added"] += sum(i is not None for i in ids)
+        if pending:
+            self._enqueue(pending)
+        return ids
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def find(self, texts, exclude_session=None):
+        """Per text, [AnswerMatch] of other sessions' near-duplicates, best first
+        (the closest answer of each session, at most MAX_MATCHES)."""
+        texts = list(texts)
+        results = [[] for _ in texts]
+        with self._lock:
+            self.stats["lookups"] += len(texts)
+            queries = [(i, t) for i, t in enumerate(texts) if word_count(t) >= MIN_WORDS]
+            found = [{} for _ in texts]    # answer id -> [session, turn, jaccard, cosine]
+            for i, text in queries:
+                self._find_lexical(text, exclude_session, found[i])
+        if queries and self._semantic_model() is not None:
+            try:
+                emb = np.asarray(self._searcher.encode([t for _, t in queries]),
+                                 dtype="float32")
+            except Exception:
+                emb = None
+            if emb is not None:
+                with self._lock:
+                    self._find_semantic(emb, [found[i] for i, _ in queries], exclude_session)
+        for i, hits in enumerate(found):
+            matches = [AnswerMatch(*hit) for hit in hits.values()
+                       if (hit[2] or 0) >= self.jaccard_threshold
+                       or (hit[3] or 0) >= self.cosine_threshold]
+            matches.sort(key=lambda m: -max(m.jaccard or 0, m.cosine or 0))
+            best = {}
+            for match in matches:
+                best.setdefault(match.session, match)
+            results[i] = list(best.values())[:MAX_MATCHES]
+        return results
+
+    def _find_lexical(self, text, exclude_session, hits):
+        signature = minhash(text)
+        buckets = band_buckets(signature)
+        rows = self.conn.execute(
+            "SELECT DISTINCT a.id, a.session, a.turn, a.signature FROM lsh l"
+            " JOIN answers a ON a.id = l.answer"
+            f" WHERE l.bucket IN ({','.join('?' * len(buckets))}) AND a.session IS NOT ?"
+            " LIMIT ?",
+            (*buckets, exclude_session, MAX_CANDIDATES)
+        ).fetchall()
+        self.stats["candidates"] += len(rows)
+        for answer_id, session, turn, blob in rows:
+            jaccard = jaccard_estimate(signature, np.frombuffer(blob, dtype=np.uint32))
+            if jaccard >= self.jaccard_threshold:
+                self.stats["lexical_matches"] += 1
+                hits[answer_id] = [session, turn, round(jaccard, 3), None]
+
+    def _find_semantic(self, emb, hits_per_text, exclude_session):
+        self._catch_up()
+        if self._vectors is None or not self._vectors.ntotal:
+            return
+        _, ids = self._vectors.search(emb, 4 * SEMANTIC_K)
+        wanted = {int(a) for row in ids for a in row if a >= 0}
+        if not wanted:
+            return
+        # Exact cosine from the stored embeddings (PQ scores are approximate);
+        # ids deleted since the FAISS file was saved have no row and drop out
+        rows = {
+            row[0]: row[1:] for row in self.conn.execute(
+                f"SELECT id, session, turn, embedding FROM answers WHERE id IN "
+                f"({','.join('?' * len(wanted))})", tuple(wanted)
+            )
+        }
+        for hits, query, row_ids in zip(hits_per_text, emb, ids):
+            for answer_id in row_ids:
+                row = rows.get(int(answer_id))
+                if row is None or row[0] == exclude_session or row[2] is None:
+                    continue
+                score = float(np.frombuffer(row[2], dtype=np.float16).astype("float32") @ query)
+                if score < self.cosine_threshold:
+                    continue
+                self.stats["semantic_matches"] += 1
+                hit = hits.setdefault(int(answer_id), [row[0], row[1], None, None])
+                hit[3] = round(score, 3)
+
+    # -----------------------------
+    # Semantic index
+    # -----------------------------
+    def _semantic_model(self):
+        """The shared encoder, loading it (and the vector index) on first use;
+        None without faiss, the model, or when loading fails."""
+        if self._searcher is not None or not self._semantic:
+            return self._searcher
+        with self._load_lock:
+            if self._searcher is not None or not self._semantic:
+                return self._searcher
+            try:
+                from faiss_search import NCOSemanticSearch
+                searcher = NCOSemanticSearch(self.assets_dir, encoder=self.encoder)
+                if not os.path.isdir(searcher.model_dir):
+                    raise FileNotFoundError(searcher.model_dir)
+                dim = searcher.model.get_sentence_embedding_dimension()
+                with self._lock:
+                    self._open_vectors(dim)
+            except Exception:
+                # Lexical matching only; answers queued for embedding are dropped
+                self._semantic = False
+                with self._queue_cond:
+                    self._queue.clear()
+                    self._queue_cond.notify_all()
+                return None
+            self._searcher = searcher
+            return searcher
+
+    def _vectors_files(self):
+        if self.path == ":memory:":
+            return []
+        # <path>.<highest answer id>.faiss, newest last
+        return sorted(glob.glob(glob.escape(self.path) + ".*.faiss"),
+                      key=lambda f: int(f.rsplit(".", 2)[1]))
+
+    def _open_vectors(self, dim):
+        import faiss
+        self._dim = dim
+        files = self._vectors_files()
+        if files:
+            self._vectors = faiss.read_index(files[-1])
+            self._vectors_upto = int(files[-1].rsplit(".", 2)[1])
+            if hasattr(self._vectors, "nprobe"):
+                self._vectors.nprobe = NPROBE
+        else:
+            # Exact search until there are enough vectors to train IVF-PQ
+            self._vectors = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+            self._vectors_upto = 0
+        self._catch_up()
+
+    def _catch_up(self, chunk=4096):
+        # Embeddings written since the last look, by this or another process.
+        # An answer embedded out of id order by another process is only
+        # picked up when this process restarts.
+        if self._vectors is None:
+            return
+        while True:
+            rows = self.conn.execute(
+                "SELECT id, embedding FROM answers WHERE id > ? AND embedding IS NOT NULL"
+                " ORDER BY id LIMIT ?", (self._vectors_upto, chunk)
+            ).fetchall()
+            if not rows:
+                break
+            ids = np.array([r[0] for r in rows], dtype="int64")
+            vectors = np.stack([np.frombuffer(r[1], dtype=np.float16) for r in rows])
+            self._vectors.add_with_ids(vectors.astype("float32"), ids)
+            self._vectors_upto = int(ids[-1])
+            self._unsaved += len(rows)
+        if not hasattr(self._vectors, "nprobe") and self._vectors.ntotal >= TRAIN_SIZE:
+            self._train()
+        if self._unsaved >= SAVE_EVERY:
+            self._save_vectors()
+
+    def _train(self):
+        import faiss
+        rows = self.conn.execute(
+            "SELECT id, embedding FROM answers WHERE embedding IS NOT NULL AND id <= ?",
+            (self._vectors_upto,)
+        ).fetchall()
+        ids = np.array([r[0] for r in rows], dtype="int64")
+        vectors = np.stack([np.frombuffer(r[1], dtype=np.float16) for r in rows]).astype("float32")
+        m = next(m for m in (48, 32, 24, 16, 12, 8, 4, 2, 1) if self._dim % m == 0)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatIP(self._dim), self._dim, NLIST, m, 8,
+                                 faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.add_with_ids(vectors, ids)
+        index.nprobe = NPROBE
+        self._vectors = index
+        self._save_vectors()
+
+    def _save_vectors(self):
+        self._unsaved = 0
+        if self.path == ":memory:" or self._vectors is None:
+            return
+        import faiss
+        # The id in the name says where catch-up resumes, so a file and its
+        # position can never disagree (several processes may write)
+        target = f"{self.path}.{self._vectors_upto}.faiss"
+        tmp = f"{target}.{os.getpid()}.tmp"
+        faiss.write_index(self._vectors, tmp)
+        os.replace(tmp, target)
+        for old in self._vectors_files()[:-2]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    # -----------------------------
+    # Background embedder
+    # -----------------------------
+    def _enqueue(self, items):
+        with self._queue_cond:
+            if not self._semantic:
+                return
+            self._queue.extend(items)
+            if self._embedder is None:
+                self._embedder = threading.Thread(target=self._embed_loop, daemon=True,
+                                                  name="answer-embedder")
+                self._embedder.start()
+            self._queue_cond.notify_all()
+
+    def _embed_loop(self):
+        while True:
+            with self._queue_cond:
+                while not self._queue and not self._closing:
+                    self._queue_cond.wait()
+                if not self._queue:
+                    return
+                batch = [self._queue.popleft()
+                         for _ in range(min(EMBED_BATCH, len(self._queue)))]
+                self._embedding = True
+            try:
+                failed = not self._embed(batch)
+            finally:
+                with self._queue_cond:
+                    self._embedding = False
+                    self._queue_cond.notify_all()
+            if failed:
+                # Back off, then retry the same batch (it was put back in front)
+                with self._queue_cond:
+                    self._queue_cond.wait_for(lambda: self._closing,
+                                              min(2 ** self._failures, MAX_RETRY_S))
+                    if self._closing:
+                        return
+
+    def _embed(self, batch):
+        """Encode batch (no lock held) and store it; False if it was re-queued."""
+        if self._semantic_model() is None:
+            return True
+        try:
+            emb = np.asarray(self._searcher.encode([text for _, text in batch]),
+                             dtype="float32")
+        except Exception:
+            with self._queue_cond:
+                self._queue.extendleft(reversed(batch))
+            self._failures += 1
+            self.stats["embed_failures"] += 1
+            return False
+        self._failures = 0
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "UPDATE answers SET embedding = ? WHERE id = ?",
+                [(vec.astype(np.float16).tobytes(), answer_id)
+                 for (answer_id, _), vec in zip(batch, emb)]
+            )
+            self.conn.execute("COMMIT")
+            self.stats["embedded"] += len(batch)
+            self._catch_up()
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until queued answers are embedded; False on timeout."""
+        with self._queue_cond:
+            return self._queue_cond.wait_for(
+                lambda: not (self._queue or self._embedding) or not self._semantic, timeout
+            )
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def delete_session(self, session):
+        with self._lock:
+            ids = [row[0] for row in self.conn.execute(
+                "SELECT id FROM answers WHERE session = ?", (session,)
+            )]
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "DELETE FROM lsh WHERE answer IN (SELECT id FROM answers WHERE session = ?)",
+                (session,)
+            )
+            self.conn.execute("DELETE FROM answers WHERE session = ?", (session,))
+            self.conn.execute("COMMIT")
+            if ids and self._vectors is not None:
+                self._vectors.remove_ids(np.array(ids, dtype="int64"))
+                self._unsaved += len(ids)
+
+    def size(self):
+        return self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def close(self, timeout=30):
+        self.flush(timeout)
+        with self._queue_cond:
+            self._closing = True
+            self._queue_cond.notify_all()
+        if self._embedder is not None:
+            self._embedder.join(timeout)
+        with self._lock:
+            if self._unsaved:
+                self._save_vectors()
+            self.conn.close()
+
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_answer_index():
+    """Process-wide index from NCO_ANSWER_INDEX; None when it is not set."""
+    global _index, _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            _index = AnswerIndex.from_env()
+            _index_loaded = True
+        return _index
+
+
+def set_answer_index(index):
+    global _index, _index_loaded
+    _index, _index_loaded = index, True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["stats"])
+    parser.add_argument("--path", default=os.environ.get("NCO_ANSWER_INDEX",
+                                                         "answer_index.sqlite"))
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.path)
+    answers, sessions, embedded = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT session), COUNT(embedding) FROM answers"
+    ).fetchone()
+    buckets = conn.execute("SELECT COUNT(*) FROM lsh").fetchone()[0]
+    print(json.dumps({"answers": answers, "sessions": sessions, "embedded": embedded,
+                      "lsh_rows": buckets}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
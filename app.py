@@ -4,9 +4,13 @@ import sys
 import os
 
 try:
-    from resume_parser import extract_skills
-    from faiss_search import NCOSemanticSearch
-    from agent import InterviewAgent
+    from resume_parser import FORMATS, extract_skills, resume_text
+    from faiss_search import get_searcher
+    from agent import InterviewAgent, parse_stats
+    from llm import get_backend
+    from llm_router import get_router
+    from metrics import serve_from_env
+    from session_store import get_session_store
 except ImportError as e:
     st.error(f"Import Error: {str(e)} - Please install missing dependencies.")
     st.stop()
@@ -18,6 +22,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Load the routed models now and keep them loaded between turns
+get_router().start_keepalive()
+
+# GET /metrics when NCO_METRICS_PORT is set
+serve_from_env()
+
 st.markdown("""
     <style>
     .stChatMessage {
@@ -45,38 +55,67 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # SESSION STATE
-if "interview_initialized" not in st.session_state:
-    st.session_state.interview_initialized = False
-    st.session_state.agent = None
-    st.session_state.job_info = None
-    st.session_state.resume_skills = None
-    st.session_state.messages = []
-    st.session_state.interview_complete = False
-    st.session_state.asked_skills = []
+# Only the session id is kept per browser tab (and in the URL, so a reload
+# after a server restart resumes the interview); the interview itself lives
+# in the session store, which holds idle sessions on disk, not in memory.
+store = get_session_store()
 
 
-def initialize_interview():
+def url_session_id():
     try:
-        with open("resumes/resume1.txt") as f:
-            resume_text = f.read()
-        resume_skills = extract_skills(resume_text)
+        return st.query_params.get("session")
+    except AttributeError:   # streamlit < 1.30
+        return st.experimental_get_query_params().get("session", [None])[0]
+
+
+def set_url_session_id(session_id):
+    try:
+        st.query_params.clear()
+        if session_id:
+            st.query_params["session"] = session_id
+    except AttributeError:
+        st.experimental_set_query_params(**({"session": session_id} if session_id else {}))
+
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = url_session_id()
 
-        searcher = NCOSemanticSearch()
-        job_matches = searcher.search("software engineer", k=1)
+session = store.load(st.session_state.session_id)
+if session is None and st.session_state.session_id:
+    # Unknown or purged id: start over
+    st.session_state.session_id = None
+    set_url_session_id(None)
+
+
+def initialize_interview(upload=None):
+    try:
+        if upload is not None:
+            text = resume_text(upload.getvalue(), upload.name)
+        else:
+            with open("resumes/resume1.txt") as f:
+                text = f.read()
+        resume_skills = extract_skills(text)
+
+        searcher = get_searcher()
+        job_matches = (
+            searcher.match_resume(resume_skills, k=1)
+            or searcher.search("software engineer", k=1)
+        )
         top_job = job_matches[0]
 
         agent = InterviewAgent(
             job_info=top_job,
-            resume_skills=resume_skills
+            resume_skills=resume_skills,
+            # NCO_SPECULATIVE=1: prepare the next question while the answer is
+            # typed (extra LLM calls; see benchmarks/bench_speculation.py)
+            speculative=os.environ.get("NCO_SPECULATIVE") == "1",
+            # NCO_FUSED_TURN=1: evaluate + next question in one LLM call
+            fused=os.environ.get("NCO_FUSED_TURN") == "1"
         )
 
-        st.session_state.agent = agent
-        st.session_state.job_info = top_job
-        st.session_state.resume_skills = resume_skills
-        st.session_state.interview_initialized = True
-        st.session_state.messages = []
-        st.session_state.interview_complete = False
-        st.session_state.asked_skills = []
+        session = store.create(agent)
+        st.session_state.session_id = session.id
+        set_url_session_id(session.id)
 
         return True
     except Exception as e:
@@ -84,23 +123,30 @@ def initialize_interview():
         return False
 
 
-def get_next_question():
-    if st.session_state.agent is None:
+def stream_into(placeholder):
+    # Progressive render: the agent calls this with the field text so far
+    return lambda text: placeholder.markdown(text + " ▌")
+
+
+def get_next_question(on_question=None):
+    if session is None:
         return None
     try:
-        return st.session_state.agent.decide_next()
+        return session.agent.decide_next(on_question)
     except Exception as e:
         st.error(f"Error getting next question: {str(e)}")
         return None
 
 
 def start_interview():
-    decision = get_next_question()
+    with st.chat_message("assistant", avatar="🤖"):
+        placeholder = st.empty()
+    decision = get_next_question(stream_into(placeholder))
 
     if decision:
         if decision.get("action") == "stop":
-            st.session_state.interview_complete = True
-            st.session_state.messages.append({
+            session.complete = True
+            session.messages.append({
                 "role": "agent",
                 "content": "Interview complete! Thank you."
             })
@@ -108,31 +154,32 @@ def start_interview():
             question = decision.get("question", "")
             skill = decision.get("skill", "")
             if question:
-                st.session_state.asked_skills.append(skill)
-                st.session_state.messages.append({
+                session.asked_skills.append(skill)
+                session.messages.append({
                     "role": "agent",
                     "content": question,
                     "skill": skill
                 })
+        store.save(session)
 
 
 # SIDEBAR
 with st.sidebar:
     st.title("📋 Interview Info")
 
-    if st.session_state.interview_initialized:
+    if session is not None:
         st.subheader("Job Role")
-        st.write(f"**Title:** {st.session_state.job_info['Title']}")
-        st.write(f"**Code:** {st.session_state.job_info['NCO_Code']}")
+        st.write(f"**Title:** {session.job_info['Title']}")
+        st.write(f"**Code:** {session.job_info['NCO_Code']}")
 
         with st.expander("Job Description"):
-            st.write(st.session_state.job_info['Description'])
+            st.write(session.job_info['Description'])
 
         st.divider()
 
         st.subheader("Your Skills")
-        if st.session_state.resume_skills:
-            skills = st.session_state.resume_skills
+        if session.resume_skills:
+            skills = session.resume_skills
             if isinstance(skills, list):
                 display_skills = ", ".join(skills)
             else:
@@ -143,24 +190,60 @@ with st.sidebar:
 
         st.subheader("Interview Progress")
 
-        agent = st.session_state.agent
-        skills = st.session_state.resume_skills or []
-        if isinstance(skills, list):
-            total_skills = len(skills)
-        else:
-            total_skills = len(skills.split(","))
-
-        done_skills = len(agent.confidence) if agent else 0
+        agent = session.agent
+        # Counted by canonical skill: "Py" and "Python" are one skill, and
+        # scores for skills outside the resume (e.g. "general") do not count
+        done_skills, total_skills = agent.progress()
 
         progress = done_skills / max(total_skills, 1)
 
         st.progress(progress)
         st.write(f"{done_skills}/{total_skills} skills evaluated")
 
-        if st.session_state.asked_skills:
-            for i, skill in enumerate(st.session_state.asked_skills, 1):
+        if session.asked_skills:
+            for i, skill in enumerate(session.asked_skills, 1):
                 st.write(f"{i}. {skill}")
 
+        if agent and agent.timings:
+            st.divider()
+            st.subheader("LLM Latency")
+            backend = get_backend()
+            st.caption(f"{backend.name} · {backend.model}")
+            last = agent.timings[-1]
+            visible = last["first_visible_s"]
+            st.write(f"Last {last['step']} ({last.get('model', backend.model)}): first visible "
+                     f"{f'{visible:.2f}s' if visible is not None else 'n/a'}"
+                     f" · total {last['total_s']:.2f}s")
+            if agent.served and agent.served[-1][1] == "bank":
+                st.caption("No model answered within the latency budget; "
+                           "the last reply came from the question bank.")
+            spec = agent.speculation_report()
+            if spec["turns"]:
+                st.write(f"Prepared next question used: {spec['hits']}/{spec['turns']} "
+                         f"turns · saved {spec['saved_s']:.1f}s")
+            with st.expander("All calls"):
+                st.table([
+                    {
+                        "step": t["step"],
+                        "model": t.get("model"),
+                        "error": t.get("error"),
+                        "prompt tokens": t.get("prompt_tokens") or t["prompt_tokens_est"],
+                        "prefill (s)": t.get("prefill_s"),
+                        "first token (s)": t["first_token_s"],
+                        "first visible (s)": t["first_visible_s"],
+                        "total (s)": round(t["total_s"], 2),
+                    }
+                    for t in agent.timings
+                ])
+                routing = agent.routing_report()
+                if routing:
+                    st.caption("Served by (model per step)")
+                    st.table([{"step": step, **models} for step, models in routing.items()])
+                counters = parse_stats()
+                if counters:
+                    st.caption("Reply parsing (failures / repairs / fallbacks)")
+                    st.table([{"prompt": step, **c} for step, c in counters.items()])
+
     else:
         st.info("Initialize interview to see details.")
 
@@ -168,7 +251,7 @@ with st.sidebar:
 # MAIN UI
 st.title("🎤 NCO Interview Agent")
 
-if not st.session_state.interview_initialized:
+if session is None:
     st.subheader("Welcome to the Interview System")
 
     col1, col2 = st.columns(2)
@@ -182,16 +265,20 @@ if not st.session_state.interview_initialized:
         """)
 
     with col2:
+        upload = st.file_uploader(
+            "Resume (txt, pdf or docx; the sample resume if none)",
+            type=sorted({ext.lstrip(".") for ext in FORMATS})
+        )
         if st.button("Start Interview", type="primary", use_container_width=True):
             with st.spinner("Initializing interview..."):
-                if initialize_interview():
+                if initialize_interview(upload):
                     st.success("Interview initialized successfully!")
                     st.rerun()
 
 else:
     st.subheader("Interview Chat")
 
-    for msg in st.session_state.messages:
+    for msg in session.messages:
         if msg["role"] == "agent":
             with st.chat_message("assistant", avatar="🤖"):
                 st.write(msg["content"])
@@ -201,14 +288,15 @@ else:
             with st.chat_message("user", avatar="👤"):
                 st.write(msg["content"])
 
-    if not st.session_state.interview_complete:
+    if not session.complete:
 
         # 🔴 EXIT BUTTON
         if st.button("🛑 End Interview", use_container_width=True):
-            st.session_state.interview_complete = True
+            session.complete = True
+            store.save(session)
             st.rerun()
 
-        if not st.session_state.messages:
+        if not session.messages:
             if st.button("Get First Question", use_container_width=True):
                 start_interview()
                 st.rerun()
@@ -221,7 +309,7 @@ else:
                     "Your answer:",
                     placeholder="Type your response here...",
                     label_visibility="collapsed",
-                    key=f"input_{len(st.session_state.messages)}"
+                    key=f"input_{len(session.messages)}"
                 )
 
             with col2:
@@ -233,18 +321,29 @@ else:
                 submit_button = True
 
             if submit_button and user_input:
-                agent = st.session_state.agent
+                agent = session.agent
 
-                st.session_state.messages.append({
+                session.messages.append({
                     "role": "user",
                     "content": user_input
                 })
 
+                with st.chat_message("user", avatar="👤"):
+                    st.write(user_input)
+                with st.chat_message("assistant", avatar="🤖"):
+                    feedback = st.empty()
+                with st.chat_message("assistant", avatar="🤖"):
+                    next_question = st.empty()
+
                 with st.spinner("Evaluating answer..."):
 
-                    evaluation = agent.evaluate_answer(user_input)
+                    evaluation, decision = agent.take_turn(
+                        user_input,
+                        on_reason=stream_into(feedback),
+                        on_question=stream_into(next_question)
+                    )
 
-                    st.session_state.messages.append({
+                    session.messages.append({
                         "role": "agent",
                         "content": f"""
 **Score:** {evaluation.get("score", 0):.2f}  
@@ -255,11 +354,9 @@ else:
 """
                     })
 
-                    decision = agent.next_step_after_evaluation(evaluation)
-
                     if decision["action"] == "stop":
-                        st.session_state.interview_complete = True
-                        st.session_state.messages.append({
+                        session.complete = True
+                        session.messages.append({
                             "role": "agent",
                             "content": "✅ Interview complete. Great job!"
                         })
@@ -267,42 +364,28 @@ else:
                         question = decision["question"]
                         skill = decision.get("skill", "")
 
-                        st.session_state.asked_skills.append(skill)
+                        session.asked_skills.append(skill)
 
-                        st.session_state.messages.append({
+                        session.messages.append({
                             "role": "agent",
                             "content": question,
                             "skill": skill
                         })
 
+                store.save(session)
                 st.rerun()
 
     else:
         st.success("✅ Interview Complete!")
 
-        agent = st.session_state.agent
+        agent = session.agent
         scores = agent.confidence
 
-        if scores:
-            interview_score = sum(scores.values()) / len(scores)
-        else:
-            interview_score = 0
-
-        skills = st.session_state.resume_skills or []
-        if isinstance(skills, list):
-            skill_count = len(skills)
-        else:
-            skill_count = len(skills.split(","))
-
-        resume_score = min(1.0, skill_count / 10)
-        risk_data = agent.compute_risk_score()
-        risk_penalty = risk_data["score"] * 0.1
-
-        final_score = (
-            0.5 * resume_score +
-            0.4 * interview_score -
-            0.1 * risk_penalty
-        )
+        results = agent.final_scores()
+        resume_score = results["resume_score"]
+        interview_score = results["interview_score"]
+        final_score = results["final_score"]
+        risk_data = results["risk"]
 
         st.subheader("📊 Final Results")
 
@@ -335,17 +418,26 @@ else:
 
         st.write(f"Risk Level: **{risk_data['risk']}**")
         st.write(f"Risk Score: {risk_data['score']:.2f}")
+        if risk_data["matches"]:
+            st.write(f"Answers matching other interviews: {risk_data['copied_answers']}")
+            for match in risk_data["matches"][:10]:
+                similarity = ", ".join(
+                    f"{kind} {match[kind]:.2f}" for kind in ("jaccard", "cosine")
+                    if match[kind] is not None
+                )
+                st.write(f"- Answer {match['answer'] + 1} ~ session `{match['session']}` "
+                         f"answer {match['turn'] + 1} ({similarity})")
 
         st.subheader("🕵️ Behavior Monitoring (Simulated)")
-        tab_switches = len(st.session_state.messages) // 3
+        tab_switches = len(session.messages) // 3
         st.write(f"Tab switches detected: {tab_switches}")
 
         col1, col2 = st.columns(2)
 
         with col1:
             if st.button("Start New Interview", use_container_width=True):
-                st.session_state.interview_initialized = False
-                st.session_state.messages = []
+                st.session_state.session_id = None
+                set_url_session_id(None)
                 st.rerun()
 
         with col2:
@@ -354,16 +446,16 @@ else:
 INTERVIEW SUMMARY
 =================
 
-Job Role: {st.session_state.job_info['Title']}
-Job Code: {st.session_state.job_info['NCO_Code']}
+Job Role: {session.job_info['Title']}
+Job Code: {session.job_info['NCO_Code']}
 
 Final Score: {final_score:.2f}
 
 Skills Evaluated:
-{chr(10).join([f"- {skill}" for skill in st.session_state.asked_skills])}
+{chr(10).join([f"- {skill}" for skill in session.asked_skills])}
 
 Interview Transcript:
-{chr(10).join([f"{msg['role'].upper()}: {msg['content']}" for msg in st.session_state.messages])}
+{chr(10).join([f"{msg['role'].upper()}: {msg['content']}" for msg in session.messages])}
 """
                 st.download_button(
                     label="Download Summary",
@@ -1,5 +1,4 @@
 import streamlit as st
-import json
 import time
 
 # Set page config first
@@ -14,24 +13,46 @@ st.title("🎤 NCO Interview Agent")
 # Try to import dependencies
 try:
     from resume_parser import extract_skills
-    from faiss_search import NCOSemanticSearch
+    from faiss_search import get_searcher
     from agent import InterviewAgent
+    from session_store import get_session_store
 except Exception as e:
     st.error(f"❌ Import Error: {str(e)}")
     st.stop()
 
-# Initialize session state
-if "started" not in st.session_state:
-    st.session_state.started = False
-    st.session_state.agent = None
-    st.session_state.job_info = None
-    st.session_state.skills = None
-    st.session_state.messages = []
-    st.session_state.done = False
-    st.session_state.loading = False
+# Initialize session state: the interview itself is in the session store,
+# this tab only keeps its id (also in the URL, to resume after a restart)
+store = get_session_store()
+
+
+def set_url_session_id(session_id):
+    try:
+        st.query_params.clear()
+        if session_id:
+            st.query_params["session"] = session_id
+    except AttributeError:   # streamlit < 1.30
+        st.experimental_set_query_params(**({"session": session_id} if session_id else {}))
+
+
+if "session_id" not in st.session_state:
+    try:
+        st.session_state.session_id = st.query_params.get("session")
+    except AttributeError:
+        st.session_state.session_id = st.experimental_get_query_params().get("session", [None])[0]
+
+session = store.load(st.session_state.session_id)
+if session is None:
+    st.session_state.session_id = None
+
+if "loading" not in st.session_state:
+    # Resumed mid-turn: the last answer still needs its next question
+    st.session_state.loading = bool(
+        session and session.messages and not session.complete
+        and session.messages[-1]["role"] == "user"
+    )
 
 # Main app logic
-if not st.session_state.started:
+if session is None:
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -48,20 +69,22 @@ if not st.session_state.started:
                 # Load resume
                 with open("resumes/resume1.txt") as f:
                     resume_text = f.read()
-                st.session_state.skills = extract_skills(resume_text)
+                skills = extract_skills(resume_text)
                 
                 # Search for job
-                searcher = NCOSemanticSearch()
-                jobs = searcher.search("software engineer", k=1)
-                st.session_state.job_info = jobs[0]
-                
-                # Create agent
-                st.session_state.agent = InterviewAgent(
-                    job_info=st.session_state.job_info,
-                    resume_skills=st.session_state.skills
+                searcher = get_searcher()
+                jobs = (
+                    searcher.match_resume(skills, k=1)
+                    or searcher.search("software engineer", k=1)
                 )
                 
-                st.session_state.started = True
+                # Create agent
+                session = store.create(InterviewAgent(
+                    job_info=jobs[0],
+                    resume_skills=skills
+                ))
+                st.session_state.session_id = session.id
+                set_url_session_id(session.id)
                 st.rerun()
             except FileNotFoundError as e:
                 st.error(f"❌ File not found: {str(e)}")
@@ -73,14 +96,14 @@ else:
     # Show job info
     with st.sidebar:
         st.subheader("📋 Job Info")
-        st.write(f"**{st.session_state.job_info['Title']}**")
-        st.write(f"Code: {st.session_state.job_info['NCO_Code']}")
+        st.write(f"**{session.job_info['Title']}**")
+        st.write(f"Code: {session.job_info['NCO_Code']}")
     
     # Chat interface
     st.subheader("Interview")
     
     # Display messages
-    for msg in st.session_state.messages:
+    for msg in session.messages:
         if msg["role"] == "agent":
             with st.chat_message("assistant"):
                 st.write(msg["content"])
@@ -89,7 +112,7 @@ else:
                 st.write(msg["content"])
     
     # Get first question if needed
-    if not st.session_state.messages and not st.session_state.done:
+    if not session.messages and not session.complete:
         st.info("Click the button below to get your first question.")
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
@@ -98,47 +121,35 @@ else:
                 st.rerun()
     
     # Process first question if loading
-    if st.session_state.loading and not st.session_state.messages:
+    if st.session_state.loading and not session.messages:
         with st.spinner("Generating first question... This may take a moment."):
             try:
-                decision = st.session_state.agent.decide_next()
-                
-                # Clean up the response
-                decision = decision.strip()
-                if decision.startswith("```"):
-                    decision = decision.split("```")[1]
-                    if decision.startswith("json"):
-                        decision = decision[4:]
-                    decision = decision.strip()
-                
-                decision_json = json.loads(decision)
+                # decide_next() returns an already-parsed dict
+                decision_json = session.agent.decide_next()
                 
                 if decision_json.get("action") == "stop":
-                    st.session_state.done = True
-                    st.session_state.messages.append({
+                    session.complete = True
+                    session.messages.append({
                         "role": "agent",
                         "content": "Interview ended."
                     })
                 else:
                     question = decision_json.get("question", "No question provided")
-                    st.session_state.messages.append({
+                    session.messages.append({
                         "role": "agent",
                         "content": question
                     })
                 
                 st.session_state.loading = False
+                store.save(session)
                 st.rerun()
                 
-            except json.JSONDecodeError as e:
-                st.error(f"JSON Parse Error: {str(e)}")
-                st.write("Response:", decision[:200] if 'decision' in locals() else "No response")
-                st.session_state.loading = False
             except Exception as e:
                 st.error(f"Error: {str(e)}")
                 st.session_state.loading = False
     
     # Answer input
-    if not st.session_state.done and st.session_state.messages and not st.session_state.loading:
+    if not session.complete and session.messages and not st.session_state.loading:
         col1, col2 = st.columns([0.85, 0.15], gap="small")
         
         with col1:
@@ -154,47 +165,37 @@ else:
         
         if send_clicked and answer:
             # Add user message
-            st.session_state.messages.append({
+            session.messages.append({
                 "role": "user",
                 "content": answer
             })
-            
-            # Update agent
-            st.session_state.agent.asked.append(answer)
+            store.save(session)
             
             st.session_state.loading = True
             st.rerun()
     
     # Process next question if loading after answer
-    if st.session_state.loading and len(st.session_state.messages) > 0 and st.session_state.messages[-1]["role"] == "user":
+    if st.session_state.loading and len(session.messages) > 0 and session.messages[-1]["role"] == "user":
         with st.spinner("Agent is thinking..."):
             try:
-                decision = st.session_state.agent.decide_next()
-                
-                # Clean up the response
-                decision = decision.strip()
-                if decision.startswith("```"):
-                    decision = decision.split("```")[1]
-                    if decision.startswith("json"):
-                        decision = decision[4:]
-                    decision = decision.strip()
-                
-                decision_json = json.loads(decision)
+                # decide_next() returns an already-parsed dict
+                decision_json = session.agent.decide_next()
                 
                 if decision_json.get("action") == "stop":
-                    st.session_state.messages.append({
+                    session.messages.append({
                         "role": "agent",
                         "content": "✅ Interview Complete! Thank you for your responses."
                     })
-                    st.session_state.done = True
+                    session.complete = True
                 else:
                     question = decision_json.get("question", "No question")
-                    st.session_state.messages.append({
+                    session.messages.append({
                         "role": "agent",
                         "content": question
                     })
                 
                 st.session_state.loading = False
+                store.save(session)
                 st.rerun()
                 
             except Exception as e:
@@ -202,21 +203,20 @@ else:
                 st.session_state.loading = False
     
     # Restart button
-    if st.session_state.done:
+    if session.complete:
         st.divider()
         st.success("Interview Completed!")
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Start New Interview", use_container_width=True):
-                st.session_state.started = False
-                st.session_state.messages = []
-                st.session_state.done = False
+                st.session_state.session_id = None
+                set_url_session_id(None)
                 st.session_state.loading = False
                 st.rerun()
         
         with col2:
             # Export transcript
-            summary = "\n".join([f"{msg['role'].upper()}: {msg['content']}" for msg in st.session_state.messages])
+            summary = "\n".join([f"{msg['role'].upper()}: {msg['content']}" for msg in session.messages])
             st.download_button(
                 label="Download Transcript",
                 data=summary,
@@ -0,0 +1,318 @@
+# batch_runner.py
+#
+# Headless interviews: every resume in a directory (txt / PDF / DOCX, parsed
+# and cached by resume_ingest.py) is matched to a role (or
+# screened for one fixed --job) and interviewed by an AsyncInterviewAgent,
+# with answers taken from a script or simulated from a candidate profile.
+# --parallel workers share one event loop and the backend's connection
+# pool; each finished session is written as one JSON line (transcript,
+# skill scores, final scores and compute_risk_score()), and a summary with
+# interviews/min and per-step latency percentiles is printed at the end.
+#
+#   python batch_runner.py resumes/ --out results.jsonl --parallel 32
+#   python batch_runner.py resumes/ --job job.json --profile mixed --max-turns 8
+#   python batch_runner.py resumes/ --answers answers.json        # scripted
+#   LLM_BACKEND=mock python batch_runner.py resumes/ --parallel 128   # with mock_llm_server.py
+#
+# --answers is JSON: a list of answers used by every session, or
+# {"<resume file name>": [...], "*": [...]} per resume with a default.
+# Without it, answers are simulated (--profile strong | weak | mixed | copy).
+# Copy detection (answer_index.py) is off unless --answer-index names a file
+# for this run; NCO_ANSWER_INDEX is ignored so earlier runs never count.
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import llm
+from agent import AsyncInterviewAgent
+from answer_index import AnswerIndex, set_answer_index
+from llm_router import get_router
+from metrics import get_metrics
+from resume_ingest import ResumeIngestor
+from skill_index import get_canonicalizer
+
+PROFILES = ("strong", "weak", "mixed", "copy")
+
+STRONG_ANSWERS = (
+    "In my last project I used {skill} for the core of the service. I started by "
+    "measuring where time actually went, then changed the data layout and added a "
+    "cache in front of the slow path. I wrote tests for the edge cases first, "
+    "rolled it out behind a flag and watched the error rate and p99 latency.",
+    "I would break the problem down before touching {skill}: reproduce it, isolate "
+    "the smallest failing case, and check the assumptions in the logs. Once the "
+    "cause is clear I fix it, add a regression test and document the trade-off "
+    "I made, for example memory against speed.",
+    "The main trade-off with {skill} is simplicity against control. For a small "
+    "team I prefer the boring, well-documented option and only optimise the part "
+    "that profiling shows is hot, keeping the interface stable so it can change later.",
+)
+WEAK_ANSWERS = (
+    "Not sure, I have only used {skill} a little.",
+    "I would search online and try things until it works.",
+    "I think {skill} is used for that, but I do not remember the details.",
+)
+COPY_ANSWER = ("As an experienced professional, I leverage best practices and industry "
+               "standards to deliver robust, scalable and maintainable solutions using "
+               "{skill}, ensuring alignment with business objectives and stakeholder needs.")
+
+
+class AnswerSource:
+    """Answers for one session: scripted (in order, then cycled) or simulated."""
+
+    def __init__(self, scripted=None, profile="mixed", seed=0):
+        if profile not in PROFILES:
+            raise ValueError(f"unknown profile {profile!r}; expected one of {PROFILES}")
+        self.scripted = list(scripted or [])
+        self.profile = profile
+        self.rng = random.Random(seed)
+
+    def answer(self, turn, skill, question):
+        if self.scripted:
+            return self.scripted[turn % len(self.scripted)]
+        skill = skill or "this"
+        if self.profile == "copy":
+            return COPY_ANSWER.format(skill=skill)
+        strong = self.profile == "strong" or (
+            self.profile == "mixed" and self.rng.random() < 0.6
+        )
+        pool = STRONG_ANSWERS if strong else WEAK_ANSWERS
+        return self.rng.choice(pool).format(skill=skill)
+
+
+def load_answers(path):
+    """{resume file name or "*": [answers]} from an --answers file."""
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {"*": data} if isinstance(data, list) else data
+
+
+def load_resumes(directory, limit=None):
+    """[{"path", "skills"} or {"path", "error"}] via the cached ingestion stage."""
+    ingestor = ResumeIngestor.from_env()
+    resumes = []
+    try:
+        for record in ingestor.ingest(directory):
+            resumes.append({key: record[key] for key in ("path", "skills", "error")
+                            if key in record})
+            if limit and len(resumes) >= limit:
+                break
+    finally:
+        ingestor.close()
+    return resumes
+
+
+class BatchRunner:
+    def __init__(self, job=None, answers=None, profile="mixed", max_turns=10,
+                 fused=False, speculative=False, seed=0):
+        self.job = job                   # fixed role; None matches each resume
+        self.answers = answers or {}
+        self.profile = profile
+        self.max_turns = max_turns
+        self.fused = fused
+        self.speculative = speculative
+        self.seed = seed
+        # Job matching is CPU-bound (encoder + index); one thread keeps it
+        # off the event loop without competing with itself
+        self._match_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="match")
+        self.turn_seconds = []
+        self.calls = []
+
+    def _match(self, skills):
+        from faiss_search import get_searcher
+        searcher = get_searcher()
+        matches = (
+            (searcher.match_resume(skills, k=1) if skills else [])
+            or searcher.search("software engineer", k=1)
+        )
+        return matches[0]
+
+    def _answer_source(self, path, index):
+        name = os.path.basename(path)
+        scripted = self.answers.get(name, self.answers.get("*"))
+        return AnswerSource(scripted, self.profile, seed=self.seed * 1_000_003 + index)
+
+    async def interview(self, index, resume):
+        """One session for an ingested resume; returns its JSONL record."""
+        start = time.perf_counter()
+        path = resume["path"]
+        record = {"session": uuid.uuid4().hex, "resume": path}
+        agent = None
+        try:
+            if "error" in resume:
+                raise ValueError(f"unreadable resume: {resume['error']}")
+            skills = resume["skills"]
+            job = self.job
+            if job is None:
+                job = await asyncio.get_running_loop().run_in_executor(
+                    self._match_pool, self._match, skills
+                )
+            record["job"] = {key: job.get(key) for key in ("NCO_Code", "Title")}
+            record["skills"] = skills
+
+            agent = AsyncInterviewAgent(job, skills, speculative=self.speculative,
+                                        fused=self.fused, session_id=record["session"])
+            answers = self._answer_source(path, index)
+            transcript = []
+            decision = await agent.decide_next()
+            for turn in range(self.max_turns):
+                if decision.get("action") == "stop":
+                    break
+                skill, question = decision.get("skill"), decision.get("question")
+                answer = answers.answer(turn, skill, question)
+                turn_start = time.perf_counter()
+                evaluation, decision = await agent.take_turn(answer)
+                self.turn_seconds.append(time.perf_counter() - turn_start)
+                transcript.append({
+                    "skill": skill, "question": question, "answer": answer,
+                    "score": evaluation.get("score"), "level": evaluation.get("level"),
+                    "reason": evaluation.get("reason"),
+                })
+            record.update({
+                "transcript": transcript,
+                "completed": decision.get("action") == "stop",
+                "confidence": agent.confidence,
+                **(await agent.final_scores()),
+            })
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if agent is not None:
+                agent.suspend()
+                self.calls.extend(agent.timings)
+                record["served"] = agent.routing_report()
+            record["wall_s"] = time.perf_counter() - start
+        return record
+
+    async def run(self, resumes, parallel, out):
+        """Interview every resume with parallel workers; records go to out as they finish."""
+        queue = asyncio.Queue()
+        for item in enumerate(resumes):
+            queue.put_nowait(item)
+        records = []
+
+        async def worker():
+            while True:
+                try:
+                    index, resume = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                record = await self.interview(index, resume)
+                records.append(record)
+                if out is not None:
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+
+        await asyncio.gather(*(worker() for _ in range(max(1, parallel))))
+        return records
+
+
+def _percentiles(values):
+    return np.percentile(values, [50, 95, 99]) if len(values) else (float("nan"),) * 3
+
+
+def report(runner, records, elapsed, parallel):
+    done = [r for r in records if "error" not in r]
+    failed = len(records) - len(done)
+    print(f"backend {llm.get_backend()!r}")
+    print(f"{len(records)} interviews ({failed} failed), parallel {parallel}, "
+          f"in {elapsed:.1f}s: {len(done) / elapsed * 60:,.1f} interviews/min, "
+          f"{len(runner.turn_seconds) / elapsed * 60:,.0f} turns/min")
+    if done:
+        turns = [len(r["transcript"]) for r in done]
+        print(f"turns per interview: mean {np.mean(turns):.1f}, "
+              f"completed by the agent {sum(r['completed'] for r in done)}/{len(done)}")
+    if runner.turn_seconds:
+        p50, p95, p99 = _percentiles(runner.turn_seconds)
+        print(f"turn latency      p50 {p50:.3f}s  p95 {p95:.3f}s  p99 {p99:.3f}s")
+
+    print(f"{'step':<18} {'calls':>6} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7}")
+    for step in sorted({c["step"] for c in runner.calls}):
+        totals = [c["total_s"] for c in runner.calls if c["step"] == step]
+        p50, p95, p99 = _percentiles(totals)
+        print(f"{step:<18} {len(totals):>6} {p50:>7.3f} {p95:>7.3f} {p99:>7.3f}")
+
+    if done:
+        risks = {}
+        for r in done:
+            risks[r["risk"]["risk"]] = risks.get(r["risk"]["risk"], 0) + 1
+        scores = [r["final_score"] for r in done]
+        print(f"final score mean {np.mean(scores):.2f} (min {min(scores):.2f}, "
+              f"max {max(scores):.2f}); risk {risks}")
+        copied = [r for r in done if r["risk"]["matches"]]
+        if copied:
+            print(f"sessions with answers matching other sessions: {len(copied)}/{len(done)} "
+                  f"({sum(r['risk']['copied_answers'] for r in copied)} answers)")
+    if failed:
+        errors = {}
+        for r in records:
+            if "error" in r:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+        for error, n in sorted(errors.items(), key=lambda e: -e[1])[:5]:
+            print(f"  {n} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("resumes", help="directory of txt / PDF / DOCX resumes (searched recursively)")
+    parser.add_argument("--out", default="batch_results.jsonl",
+                        help="one JSON line per session ('-' to skip)")
+    parser.add_argument("--parallel", type=int, default=16,
+                        help="interviews in flight (also the per-host LLM in-flight cap)")
+    parser.add_argument("--job", help="JSON file with one role (NCO_Code, Title, "
+                                      "Description) to screen every resume for")
+    parser.add_argument("--answers", help="scripted answers (JSON list or per-resume map)")
+    parser.add_argument("--profile", choices=PROFILES, default="mixed",
+                        help="simulated candidate when no script is given")
+    parser.add_argument("--max-turns", type=int, default=10)
+    parser.add_argument("--fused", action="store_true",
+                        help="evaluate and pick the next step in one call")
+    parser.add_argument("--speculative", action="store_true")
+    parser.add_argument("--limit", type=int, help="only the first N resumes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--metrics-log", help="write per-call/per-step JSONL events here")
+    parser.add_argument("--answer-index",
+                        help="SQLite file for copy detection between this run's sessions "
+                             "(use a new file per run; default: off)")
+    args = parser.parse_args()
+
+    resumes = load_resumes(args.resumes, args.limit)
+    if not resumes:
+        parser.error(f"no resumes found in {args.resumes}")
+    job = None
+    if args.job:
+        with open(args.job, encoding="utf-8") as f:
+            job = json.load(f)
+    if args.metrics_log:
+        get_metrics().set_log(args.metrics_log)
+
+    set_answer_index(AnswerIndex(args.answer_index) if args.answer_index else None)
+    llm.configure(max_inflight=args.parallel)
+    get_router().warm()
+    # Agents canonicalize skills on the event loop; lookups there must not
+    # wait for the vocabulary index
+    get_canonicalizer().build()
+
+    runner = BatchRunner(job, load_answers(args.answers), args.profile, args.max_turns,
+                         args.fused, args.speculative, args.seed)
+    out = None if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        start = time.perf_counter()
+        records = asyncio.run(runner.run(resumes, args.parallel, out))
+        elapsed = time.perf_counter() - start
+    finally:
+        if out is not None:
+            out.close()
+    report(runner, records, elapsed, args.parallel)
+
+
+if __name__ == "__main__":
+    main()
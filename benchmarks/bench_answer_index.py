@@ -0,0 +1,126 @@
+# benchmarks/bench_answer_index.py
+#
+# answer_index.py at scale: index --answers synthetic answers (random
+# technical prose, 8 per session), then look up edited copies of indexed
+# answers and fresh answers. Reports insert rate, lookup latency, recall
+# on the copies, false matches on the fresh answers and LSH candidates
+# per lookup, next to a brute-force signature scan of the same index.
+#
+#   python benchmarks/bench_answer_index.py --answers 200000
+#   python benchmarks/bench_answer_index.py --answers 20000 --semantic   # needs the model
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from answer_index import AnswerIndex, minhash
+
+WORDS = ("cache index query latency shard replica queue worker thread lock batch "
+         "stream vector embedding model train deploy container image cluster node "
+         "pod service request response retry timeout backoff schema table join "
+         "partition commit rollback transaction pipeline feature label metric drift "
+         "monitor alert log trace profile memory cpu disk network socket buffer "
+         "compile test mock fixture deploy rollout canary gradient loss optimizer "
+         "tensor kernel layer python sql docker kubernetes aws git java react").split()
+
+
+def random_answer(rng):
+    vocab = WORDS + [f"term{rng.randint(0, 20000)}" for _ in range(12)]
+    return " ".join(rng.choice(vocab) for _ in range(rng.randint(25, 60)))
+
+
+def edited(rng, text, share):
+    words = text.split()
+    for i in range(len(words)):
+        if rng.random() < share:
+            words[i] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def percentiles(values):
+    return np.percentile(values, [50, 99]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--edit-share", type=float, default=0.05,
+                        help="share of words replaced in the planted copies")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--semantic", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = AnswerIndex(os.path.join(tmp, "answers.sqlite"), semantic=args.semantic)
+        elapsed = 0.0
+        sample = {}
+        batch = []
+        for i in range(args.answers):
+            text = random_answer(rng)
+            if len(sample) < args.queries and rng.random() < 2 * args.queries / args.answers:
+                sample[f"s{i // 8}"] = text
+            batch.append((f"s{i // 8}", i % 8, text))
+            if len(batch) >= args.batch or i == args.answers - 1:
+                start = time.perf_counter()
+                index.add_many(batch)
+                elapsed += time.perf_counter() - start
+                batch = []
+        size = os.path.getsize(os.path.join(tmp, "answers.sqlite"))
+        print(f"indexed {index.size():,} answers in {elapsed:.1f}s "
+              f"({args.answers / elapsed:,.0f}/s), {size / 1e6:.0f} MB")
+
+        copies = [(session, edited(rng, text, args.edit_share))
+                  for session, text in sample.items()]
+        fresh = [random_answer(rng) for _ in range(len(copies))]
+
+        hits, latencies = 0, []
+        before = index.stats["candidates"]
+        for session, text in copies:
+            start = time.perf_counter()
+            matches = index.find([text], exclude_session="query")[0]
+            latencies.append(time.perf_counter() - start)
+            hits += any(m.session == session for m in matches)
+        candidates = (index.stats["candidates"] - before) / max(len(copies), 1)
+        p50, p99 = percentiles(latencies)
+        print(f"copies ({args.edit_share:.0%} words edited): recall {hits / len(copies):.3f}, "
+              f"lookup p50 {p50:.2f} ms p99 {p99:.2f} ms, {candidates:.1f} candidates")
+
+        false, latencies = 0, []
+        for text in fresh:
+            start = time.perf_counter()
+            false += bool(index.find([text], exclude_session="query")[0])
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = percentiles(latencies)
+        print(f"fresh answers: {false}/{len(fresh)} matched, "
+              f"lookup p50 {p50:.2f} ms p99 {p99:.2f} ms")
+
+        # Brute force: every signature in RAM, compared with each query
+        start = time.perf_counter()
+        signatures = np.stack([
+            np.frombuffer(blob, dtype=np.uint32)
+            for (blob,) in index.conn.execute("SELECT signature FROM answers")
+        ])
+        load_s = time.perf_counter() - start
+        latencies = []
+        for _, text in copies[:100]:
+            start = time.perf_counter()
+            estimates = (signatures == minhash(text)).mean(axis=1)
+            np.flatnonzero(estimates >= index.jaccard_threshold)
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = percentiles(latencies)
+        print(f"brute-force scan: p50 {p50:.2f} ms p99 {p99:.2f} ms per lookup "
+              f"(+{load_s:.1f}s and {signatures.nbytes / 1e6:.0f} MB to load signatures)")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
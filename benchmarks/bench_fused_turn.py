@@ -0,0 +1,81 @@
+# benchmarks/bench_fused_turn.py
+#
+# Per-turn latency, LLM calls and prompt tokens of the two-call flow
+# (evaluate_answer + next_step_after_evaluation) vs the fused single-call
+# turn, over the same scripted answers against the configured LLM.
+#
+#   python benchmarks/bench_fused_turn.py [--turns 8]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import InterviewAgent
+from llm import get_cache
+
+JOB = {
+    "NCO_Code": "2512.0100",
+    "Title": "Software Developer",
+    "Description": "Designs, writes and tests software for applications and systems.",
+}
+SKILLS = ["python", "sql", "docker", "machine learning", "git"]
+ANSWERS = [
+    "I would profile first, then cache the hot path and add an index on the join key.",
+    "Use a multi-stage Dockerfile so the runtime image has only the wheels and app code.",
+    "Not sure, probably restart the service.",
+    "Split by time so validation data is strictly after training data, then track drift.",
+    "Rebase the feature branch, resolve conflicts commit by commit and rerun the tests.",
+]
+
+
+def run(fused, turns):
+    agent = InterviewAgent(JOB, SKILLS, fused=fused)
+    decision = agent.decide_next()
+    rows = []
+    for i in range(turns):
+        if decision.get("action") == "stop":
+            break
+        calls_before = len(agent.timings)
+        start = time.perf_counter()
+        evaluation, decision = agent.take_turn(ANSWERS[i % len(ANSWERS)])
+        calls = agent.timings[calls_before:]
+        rows.append({
+            "latency_s": time.perf_counter() - start,
+            "calls": len(calls),
+            "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in calls),
+            "completion_tokens": sum(c.get("completion_tokens", 0) for c in calls),
+            "moved_on": float(evaluation.get("score", 0) or 0) >= 0.8,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=8)
+    args = parser.parse_args()
+
+    # Both flows must actually reach the model
+    get_cache().mode = "off"
+
+    print(f"{'flow':<9} {'turns':>5} {'calls/turn':>10} {'mean s':>7} {'p95 s':>6} "
+          f"{'prompt tok/turn':>15} {'gen tok/turn':>12} {'mean s (moved on)':>17}")
+    for fused in (False, True):
+        rows = run(fused, args.turns)
+        if not rows:
+            continue
+        latency = [r["latency_s"] for r in rows]
+        moved = [r["latency_s"] for r in rows if r["moved_on"]]
+        print(f"{'fused' if fused else 'two-call':<9} {len(rows):>5} "
+              f"{np.mean([r['calls'] for r in rows]):>10.2f} "
+              f"{np.mean(latency):>7.2f} {np.percentile(latency, 95):>6.2f} "
+              f"{np.mean([r['prompt_tokens'] for r in rows]):>15.0f} "
+              f"{np.mean([r['completion_tokens'] for r in rows]):>12.0f} "
+              f"{np.mean(moved) if moved else float('nan'):>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_index_types.py
+#
+# Recall@k against exact search, p50/p99 single-query latency and index
+# size for each index type in index_builder.py. Uses synthetic clustered
+# unit vectors, so no NCO assets are needed.
+#
+#   python benchmarks/bench_index_types.py [--n 50000] [--dim 384] [--k 10]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_builder import build_index, index_size_bytes, search_parameters
+
+
+def synthetic(n, dim, n_queries, clusters, seed=0):
+    # Clustered data looks more like sentence embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    data = centers[rng.integers(0, clusters, n)]
+    data += 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    queries = data[rng.integers(0, n, n_queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype("float32")
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return data, queries
+
+
+def recall(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index, queries, k, params):
+    found = np.empty((len(queries), k), dtype="int64")
+    latencies = []
+    kwargs = {"params": params} if params is not None else {}
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        _, I = index.search(q[None, :], k, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found[i] = I[0]
+    return found, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    data, queries = synthetic(args.n, args.dim, args.queries, args.clusters)
+    print(f"{args.n} x {args.dim} vectors, {args.queries} queries, k={args.k}\n")
+
+    exact = build_index(data, "flat")
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{'index':<7} {'knob':<12} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'size MB':>8} {'build s':>8}")
+    for kind in ("flat", "ivf", "hnsw", "ivfpq"):
+        start = time.perf_counter()
+        index = build_index(data, kind)
+        build_s = time.perf_counter() - start
+        size_mb = index_size_bytes(index) / 1e6
+
+        if kind in ("ivf", "ivfpq"):
+            knobs = [(f"nprobe={v}", search_parameters(index, nprobe=v))
+                     for v in args.nprobe]
+        elif kind == "hnsw":
+            knobs = [(f"efSearch={v}", search_parameters(index, ef_search=v))
+                     for v in args.ef_search]
+        else:
+            knobs = [("-", None)]
+
+        for label, params in knobs:
+            found, p50, p99 = measure(index, queries, args.k, params)
+            print(f"{kind:<7} {label:<12} {recall(found, truth):>7.3f} {p50:>8.3f} "
+                  f"{p99:>8.3f} {size_mb:>8.1f} {build_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# benchmarks/bench_llm_load.py
+#
+# Load test of the interview pipeline: many concurrent AsyncInterviewAgent
+# sessions against the configured LLM backend, usually the mock server, so
+# prompts, parsing, streaming and the async client are exercised end to end
+# without a GPU.
+#
+#   python benchmarks/bench_llm_load.py --spawn --sessions 500 --concurrency 128
+#   python benchmarks/bench_llm_load.py --spawn --fused --ttft-ms 300 --tokens-per-s 30
+#   LLM_BACKEND=ollama python benchmarks/bench_llm_load.py --sessions 4 --concurrency 2
+#   LLM_ROUTES=routes.json python benchmarks/bench_llm_load.py --spawn   # per-step models
+#
+# --spawn starts mock_llm_server.py on --port for the run (and selects the
+# mock backend); without it the LLM_* environment decides where calls go.
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import llm
+from agent import AsyncInterviewAgent, parse_stats
+from llm_router import get_router
+from metrics import get_metrics
+
+JOB = {
+    "NCO_Code": "2512.0100",
+    "Title": "Software Developer",
+    "Description": "Designs, writes and tests software for applications and systems.",
+}
+SKILLS = ["python", "sql", "docker", "machine learning", "git", "kubernetes", "aws"]
+ANSWERS = [
+    "I would profile first, then cache the hot path and add an index on the join key.",
+    "Use a multi-stage Dockerfile so the runtime image has only the wheels and app code.",
+    "Not sure, probably restart the service.",
+    "Split by time so validation data is strictly after training data, then track drift.",
+]
+
+
+def spawn_mock(args):
+    cmd = [sys.executable, os.path.join(ROOT, "mock_llm_server.py"),
+           "--port", str(args.port), "--ttft-ms", str(args.ttft_ms),
+           "--spread-ms", str(args.spread_ms), "--tokens-per-s", str(args.tokens_per_s),
+           "--stop-rate", "0"]
+    for item in args.model_scale:
+        cmd += ["--model-scale", item]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + "/health", timeout=0.2)
+            return proc, url
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("mock LLM server did not start")
+
+
+async def session(index, turns, fused, stream, results):
+    agent = AsyncInterviewAgent(JOB, SKILLS[index % 3:] + SKILLS[:index % 3], fused=fused)
+    callback = (lambda text: None) if stream else None
+    decision = await agent.decide_next(on_question=callback)
+    for turn in range(turns):
+        if decision.get("action") == "stop":
+            break
+        start = time.perf_counter()
+        _, decision = await agent.take_turn(
+            ANSWERS[(index + turn) % len(ANSWERS)], on_reason=callback, on_question=callback
+        )
+        results["turns"].append(time.perf_counter() - start)
+    results["calls"].extend(agent.timings)
+
+
+async def run(args):
+    results = {"turns": [], "calls": []}
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        async with limit:
+            await session(i, args.turns, args.fused, args.stream, results)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.sessions)))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="interviews in flight (also the per-host LLM in-flight cap)")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--fused", action="store_true")
+    parser.add_argument("--stream", action="store_true",
+                        help="pass streaming callbacks, as the UI does")
+    parser.add_argument("--spawn", action="store_true", help="run the mock server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--spread-ms", type=float, default=50)
+    parser.add_argument("--tokens-per-s", type=float, default=50)
+    parser.add_argument("--model-scale", action="append", default=[], metavar="MODEL=X",
+                        help="mock latency multiplier for one model (repeatable)")
+    parser.add_argument("--metrics-log", help="write per-call/per-step JSONL events here")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="print the /metrics text after the run")
+    args = parser.parse_args()
+    if args.metrics_log:
+        get_metrics().set_log(args.metrics_log)
+
+    proc = None
+    if args.spawn:
+        proc, url = spawn_mock(args)
+        llm.configure("mock", hosts=[url], max_inflight=args.concurrency)
+    else:
+        llm.configure(max_inflight=args.concurrency)
+    # Every call must reach the backend
+    llm.get_cache().mode = "off"
+
+    try:
+        results, elapsed = asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    turns = np.array(results["turns"])
+    calls = results["calls"]
+    print(f"backend {llm.get_backend()!r}")
+    print(f"{args.sessions} sessions x {args.turns} turns, concurrency {args.concurrency}, "
+          f"{'fused' if args.fused else 'two-call'}{', streamed' if args.stream else ''}")
+    print(f"{len(turns)} turns and {len(calls)} LLM calls in {elapsed:.1f}s: "
+          f"{len(turns) / elapsed * 60:,.0f} turns/min, {len(calls) / elapsed:,.1f} calls/s")
+    if len(turns):
+        p50, p95, p99 = np.percentile(turns, [50, 95, 99])
+        print(f"turn latency      p50 {p50:.3f}s  p95 {p95:.3f}s  p99 {p99:.3f}s")
+
+    print(f"{'step':<18} {'calls':>6} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7}")
+    for step in sorted({c["step"] for c in calls}):
+        totals = [c["total_s"] for c in calls if c["step"] == step]
+        p50, p95, p99 = np.percentile(totals, [50, 95, 99])
+        print(f"{step:<18} {len(totals):>6} {p50:>7.3f} {p95:>7.3f} {p99:>7.3f}")
+
+    routing = get_router().report()
+    if routing["served"]:
+        print("served by: " + "; ".join(
+            f"{step} " + ", ".join(f"{m} x{n}" for m, n in models.items())
+            for step, models in routing["served"].items()
+        ))
+    if routing["failed"]:
+        print(f"over budget / failed: {routing['failed']}")
+
+    failures = {step: s["fallbacks"] for step, s in parse_stats().items() if s["fallbacks"]}
+    if failures:
+        print(f"fallbacks: {failures}")
+    if args.prometheus:
+        print(get_metrics().render())
+
+
+if __name__ == "__main__":
+    main()
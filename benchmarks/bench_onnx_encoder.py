@@ -0,0 +1,85 @@
+# benchmarks/bench_onnx_encoder.py
+#
+# Import time, load time and queries/sec of the torch SentenceTransformer vs
+# the int8 ONNX encoder, plus the parity check from onnx_encoder.py. Each
+# backend is measured in its own process so one import cannot warm the other.
+#
+#   python onnx_encoder.py export                      # once
+#   python benchmarks/bench_onnx_encoder.py [--assets faiss_assets]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def child(assets, backend, n_single, n_batch):
+    start = time.perf_counter()
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+    else:
+        import onnxruntime  # noqa: F401
+        from onnx_encoder import OnnxEncoder
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if backend == "torch":
+        model = SentenceTransformer(os.path.join(assets, "sbert_nco_finetuned"))
+    else:
+        model = OnnxEncoder(os.path.join(assets, "sbert_nco_finetuned_onnx"))
+    load_s = time.perf_counter() - start
+
+    n = max(n_single, n_batch)
+    queries = [f"senior software engineer level {i}" for i in range(n)]
+    model.encode(queries[:4], normalize_embeddings=True)
+
+    start = time.perf_counter()
+    for q in queries[:n_single]:
+        model.encode([q], normalize_embeddings=True)
+    single_qps = n_single / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.encode(queries[:n_batch], batch_size=64, normalize_embeddings=True)
+    batch_qps = n_batch / (time.perf_counter() - start)
+
+    print(json.dumps({
+        "import_s": import_s, "load_s": load_s,
+        "single_qps": single_qps, "batch_qps": batch_qps,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--single", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1024)
+    parser.add_argument("--child", choices=["torch", "onnx"])
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.assets, args.child, args.single, args.batch)
+        return
+
+    print(f"{'backend':<8} {'import s':>9} {'load s':>8} "
+          f"{'single q/s':>11} {'batch q/s':>10}")
+    for backend in ("torch", "onnx"):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", backend,
+             "--assets", args.assets, "--single", str(args.single),
+             "--batch", str(args.batch)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{backend:<8} {r['import_s']:>9.2f} {r['load_s']:>8.2f} "
+              f"{r['single_qps']:>11.1f} {r['batch_qps']:>10.1f}")
+
+    from onnx_encoder import parity_check
+    print("\nparity vs torch:", json.dumps(parity_check(args.assets)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_prompt_growth.py
+#
+# Prompt size per turn with the capped rolling state vs an unbounded one
+# (state_budget=None), and how much of each prompt is shared with the
+# previous one (the part a backend can serve from its prefix/KV cache).
+#
+#   python benchmarks/bench_prompt_growth.py [--turns 30]          # offline
+#   python benchmarks/bench_prompt_growth.py --live [--turns 30]   # real LLM:
+#       prompt tokens and prefill seconds reported by the backend per turn
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import InterviewAgent
+from llm import get_cache
+from prompts import approx_tokens
+
+JOB = {
+    "NCO_Code": "2512.0100",
+    "Title": "Software Developer",
+    "Description": "Designs, writes and tests software for applications and systems.",
+}
+SKILLS = ["python", "sql", "docker", "machine learning", "git", "kubernetes", "aws"]
+ANSWERS = [
+    "I would profile first, then cache the hot path and add an index on the join key.",
+    "Use a multi-stage Dockerfile so the runtime image has only the wheels and app code.",
+    "Not sure, probably restart the service.",
+    "Split by time so validation data is strictly after training data, then track drift.",
+]
+
+
+def shared_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def offline(budget, turns):
+    """Prompt tokens per turn, driving the agent state without an LLM."""
+    agent = InterviewAgent(JOB, SKILLS, state_budget=budget)
+    rows = []
+    previous = ""
+    for turn in range(turns):
+        skill = SKILLS[turn % len(SKILLS)]
+        question = (f"Turn {turn}: walk me through how you would use {skill} "
+                    f"to diagnose a production incident affecting checkout latency?")
+        agent._record_decision({"action": "ask", "skill": skill, "question": question})
+        prompt = agent._evaluate_prompt(ANSWERS[turn % len(ANSWERS)])
+        agent.confidence[skill] = 0.5 + (turn % 5) / 10
+        rows.append((approx_tokens(prompt), shared_prefix(previous, prompt) / len(prompt)))
+        previous = prompt
+    return rows
+
+
+def live(budget, turns):
+    agent = InterviewAgent(JOB, SKILLS, state_budget=budget)
+    decision = agent.decide_next()
+    for turn in range(turns):
+        if decision.get("action") == "stop":
+            break
+        _, decision = agent.take_turn(ANSWERS[turn % len(ANSWERS)])
+    return [
+        (t["step"], t.get("prompt_tokens", 0), t["prompt_tokens_est"],
+         t.get("prefill_s", 0.0), t["total_s"])
+        for t in agent.timings
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=300)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if not args.live:
+        capped = offline(args.budget, args.turns)
+        unbounded = offline(None, args.turns)
+        print(f"{'turn':>4} {'capped tok':>10} {'shared':>7} {'unbounded tok':>13} {'shared':>7}")
+        for turn, (c, u) in enumerate(zip(capped, unbounded), 1):
+            if turn in (1, 2, 3, 5, 10, 20, 30) or turn == args.turns:
+                print(f"{turn:>4} {c[0]:>10} {c[1]:>7.0%} {u[0]:>13} {u[1]:>7.0%}")
+        return
+
+    get_cache().mode = "off"
+    for budget in (args.budget, None):
+        print(f"\nstate_budget={budget}")
+        print(f"{'call':>4} {'step':<16} {'prompt tok':>10} {'est tok':>8} "
+              f"{'prefill s':>9} {'total s':>8}")
+        for i, (step, tokens, est, prefill, total) in enumerate(live(budget, args.turns), 1):
+            print(f"{i:>4} {step:<16} {tokens:>10} {est:>8} {prefill:>9.3f} {total:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks/bench_resume_ingest.py
+#
+# Resumes/sec of resume_ingest.py on a synthetic corpus: a cold run (empty
+# cache) in-process and over the process pool, a warm re-run of the
+# unchanged corpus, and a run after touching a share of the files (their
+# mtime changes, their content does not, so they hit the hash cache).
+#
+#   python benchmarks/bench_resume_ingest.py --files 10000 --workers 4
+#
+# The corpus mixes txt and DOCX; PDFs are included when pypdf is installed.
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from resume_ingest import ResumeIngestor
+
+SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "AWS", "Git", "Java", "React",
+          "Machine Learning", "FAISS", "Pandas", "Linux", "CI/CD", "Go", "C++",
+          "PostgreSQL", "Spark", "TensorFlow", "Node.js", "Terraform"]
+HEADINGS = [("Skills:", "- {}"), ("TECHNICAL SKILLS", "• {}"), ("Key Skills", "{}, ")]
+
+
+def resume_lines(rng, i):
+    skills = rng.sample(SKILLS, rng.randint(3, 9))
+    heading, item = rng.choice(HEADINGS)
+    lines = [f"Name: Candidate {i}", f"Role: {rng.choice(['Developer', 'Analyst', 'Engineer'])}",
+             "", "Summary", "Engineer with experience building services and data pipelines. " * 3,
+             "", heading]
+    if item.endswith(", "):
+        lines.append(", ".join(skills))
+    else:
+        lines += [item.format(s) for s in skills]
+    lines += ["", "Experience"]
+    lines += [f"- Worked on project {rng.randint(1, 999)} using {rng.choice(skills)}."
+              for _ in range(rng.randint(3, 8))]
+    lines += ["", "Education:", "B.Tech in Computer Science"]
+    return lines
+
+
+def write_docx(path, lines):
+    body = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+                   for line in lines)
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/'
+                f'2006/main"><w:body>{body}</w:body></w:document>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.'
+                         'openxmlformats.org/package/2006/content-types"><Default Extension='
+                         '"xml" ContentType="application/xml"/><Override PartName="/word/'
+                         'document.xml" ContentType="application/vnd.openxmlformats-'
+                         'officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr("word/document.xml", document)
+
+
+def write_pdf(path, lines):
+    # One page, Helvetica, one text line per resume line
+    def text(s):
+        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    ops = ["BT /F1 9 Tf 40 800 Td 11 TL"] + [
+        f"({text(line.encode('latin-1', 'replace').decode('latin-1'))}) Tj T*" for line in lines
+    ] + ["ET"]
+    stream = "\n".join(ops).encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % n + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, xref))
+    with open(path, "wb") as f:
+        f.write(out.getvalue())
+
+
+def build_corpus(directory, files, pdf_share, docx_share, seed=0):
+    rng = random.Random(seed)
+    for i in range(files):
+        sub = os.path.join(directory, f"batch{i // 1000:03d}")
+        os.makedirs(sub, exist_ok=True)
+        lines = resume_lines(rng, i)
+        kind = rng.random()
+        if kind < pdf_share:
+            write_pdf(os.path.join(sub, f"r{i:06d}.pdf"), lines)
+        elif kind < pdf_share + docx_share:
+            write_docx(os.path.join(sub, f"r{i:06d}.docx"), lines)
+        else:
+            with open(os.path.join(sub, f"r{i:06d}.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+
+def timed(label, ingestor, directory):
+    start = time.perf_counter()
+    skills = 0
+    for record in ingestor.ingest(directory):
+        skills += len(record.get("skills", ()))
+    elapsed = time.perf_counter() - start
+    s = ingestor.stats
+    print(f"{label:<30} {s['files'] / elapsed:>9,.0f} resumes/s  {elapsed:>7.2f}s  "
+          f"parsed {s['parsed']:>6}  stat hits {s['stat_hits']:>6}  "
+          f"hash hits {s['hash_hits']:>6}  errors {s['errors']}  skills {skills}")
+    ingestor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--docx-share", type=float, default=0.3)
+    parser.add_argument("--pdf-share", type=float, default=0.2)
+    parser.add_argument("--touch-share", type=float, default=0.1)
+    args = parser.parse_args()
+
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("pypdf not installed: corpus without PDFs")
+        args.pdf_share = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "resumes")
+        start = time.perf_counter()
+        build_corpus(corpus, args.files, args.pdf_share, args.docx_share)
+        print(f"corpus: {args.files} files ({args.pdf_share:.0%} pdf, "
+              f"{args.docx_share:.0%} docx) built in {time.perf_counter() - start:.1f}s")
+
+        timed("cold, in process", ResumeIngestor(None, workers=0), corpus)
+        cache = os.path.join(tmp, "cache.sqlite")
+        timed(f"cold, {args.workers} workers",
+              ResumeIngestor(cache, args.workers, args.chunk_size), corpus)
+        timed("warm, unchanged", ResumeIngestor(cache, args.workers, args.chunk_size), corpus)
+
+        rng = random.Random(1)
+        for root, _, names in os.walk(corpus):
+            for name in names:
+                if rng.random() < args.touch_share:
+                    os.utime(os.path.join(root, name))
+        timed(f"warm, {args.touch_share:.0%} touched",
+              ResumeIngestor(cache, args.workers, args.chunk_size), corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_search_batch.py
+#
+# Throughput of search() in a loop vs one search_batch() call.
+#
+#   python benchmarks/bench_search_batch.py [--assets faiss_assets] [--k 3]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faiss_search import get_searcher
+
+
+def make_queries(searcher, n):
+    titles = [t for t in searcher.columns["Title"].tolist() if t]
+    # Unique strings so the query-embedding cache cannot short-circuit encoding
+    return [f"{titles[i % len(titles)].lower()} {i}" for i in range(n)]
+
+
+def same_results(a, b, tol=1e-4):
+    # Codes/order must match exactly; scores may differ by float noise from padding
+    for ra, rb in zip(a, b):
+        if [h["NCO_Code"] for h in ra] != [h["NCO_Code"] for h in rb]:
+            return False
+        if any(abs(x["score"] - y["score"]) > tol for x, y in zip(ra, rb)):
+            return False
+    return len(a) == len(b)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 32, 1024])
+    args = parser.parse_args()
+
+    searcher = get_searcher(args.assets, cache_size=0).warm_up()
+    searcher.search("warm up", k=args.k)
+
+    print(f"{'queries':>8} {'loop q/s':>10} {'batch q/s':>10} {'speedup':>8}  identical")
+    for n in args.sizes:
+        queries = make_queries(searcher, n)
+
+        start = time.perf_counter()
+        looped = [searcher.search(q, k=args.k) for q in queries]
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = searcher.search_batch(queries, k=args.k)
+        batch_s = time.perf_counter() - start
+
+        print(
+            f"{n:>8} {n / loop_s:>10.1f} {n / batch_s:>10.1f} "
+            f"{loop_s / batch_s:>7.1f}x  {same_results(looped, batched)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
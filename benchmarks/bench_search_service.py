@@ -0,0 +1,98 @@
+# benchmarks/bench_search_service.py
+#
+# Load generator: throughput and tail latency of concurrent search() calls
+# in-process vs through search_service.py with micro-batching.
+#
+#   python benchmarks/bench_search_service.py --spawn [--assets faiss_assets]
+#   python benchmarks/bench_search_service.py --address http://127.0.0.1:8765
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from faiss_search import NCOSemanticSearch
+from search_service import SearchClient
+
+
+def run_load(search, queries, concurrency, k):
+    def timed(query):
+        start = time.perf_counter()
+        search(query, k)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, queries))
+    wall = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return len(queries) / wall, p50, p95, p99
+
+
+def wait_for(client, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            client.search("warm up", 1)
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("search service did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--address", help="running service, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--spawn", action="store_true", help="start a service for the run")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    proc = None
+    address = args.address
+    if args.spawn:
+        address = f"http://127.0.0.1:{args.port}"
+        proc = subprocess.Popen([
+            sys.executable, os.path.join(ROOT, "search_service.py"),
+            "--assets", args.assets, "--port", str(args.port),
+            "--window-ms", str(args.window_ms), "--max-batch", str(args.max_batch),
+        ])
+    if not address:
+        parser.error("pass --address or --spawn")
+
+    try:
+        local = NCOSemanticSearch(args.assets, cache_size=0).warm_up()
+        client = SearchClient(address)
+        wait_for(client)
+
+        titles = [t for t in local.columns["Title"].tolist() if t]
+        print(f"{'path':<8} {'conc':>5} {'q/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for concurrency in args.concurrency:
+            for name, search in (("inproc", local.search), ("service", client.search)):
+                # Unique strings so no embedding cache can answer them
+                queries = [
+                    f"{titles[i % len(titles)]} {name} {concurrency} {i}"
+                    for i in range(args.requests)
+                ]
+                qps, p50, p95, p99 = run_load(search, queries, concurrency, args.k)
+                print(f"{name:<8} {concurrency:>5} {qps:>9.1f} {p50:>8.2f} "
+                      f"{p95:>8.2f} {p99:>8.2f}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/bench_session_store.py
+#
+# Many paused interviews in a bounded SessionStore: save throughput, blob
+# size, resident memory, rehydrate latency and resume after a "restart"
+# (a second store over the same file). No LLM calls: each session's state
+# is filled in as if it had run --turns turns.
+#
+#   python benchmarks/bench_session_store.py --sessions 20000 --resident 256
+#   python benchmarks/bench_session_store.py --sessions 20000 --resident 20000  # all in RAM
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from agent import InterviewAgent
+from session_store import SessionStore
+
+JOB = {
+    "NCO_Code": "2512.0100",
+    "Title": "Software Developer",
+    "Description": "Designs, writes and tests software for applications and systems.",
+}
+SKILLS = ["python", "sql", "docker", "machine learning", "git", "kubernetes", "aws"]
+ANSWERS = [
+    "I would profile first, then cache the hot path and add an index on the join key.",
+    "Use a multi-stage Dockerfile so the runtime image has only the wheels and app code.",
+    "Not sure, probably restart the service.",
+    "Split by time so validation data is strictly after training data, then track drift.",
+]
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def played_agent(index, turns):
+    """An agent whose state looks like turns answered questions."""
+    rng = random.Random(index)
+    agent = InterviewAgent(JOB, SKILLS[index % 3:] + SKILLS[:index % 3], speculative=True)
+    messages, asked_skills = [], []
+    for turn in range(turns):
+        skill = SKILLS[(index + turn // 2) % len(SKILLS)]
+        question = (f"Session {index}: walk me through how you would use {skill} "
+                    f"to debug a slow production request, step {turn}.")
+        answer = ANSWERS[rng.randrange(len(ANSWERS))]
+        agent.asked.append(question)
+        agent.asked_skills.append(skill)
+        agent.last_skill, agent.last_question = skill, question
+        agent.answer_history.append(answer)
+        agent.confidence[skill] = round(rng.random(), 2)
+        asked_skills.append(skill)
+        messages += [
+            {"role": "agent", "content": question, "skill": skill},
+            {"role": "user", "content": answer},
+            {"role": "agent", "content": f"**Score:** {agent.confidence[skill]:.2f}"},
+        ]
+    return agent, messages, asked_skills
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--resident", type=int, default=256)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--loads", type=int, default=2000)
+    parser.add_argument("--path", help="SQLite file (default: a temporary one)")
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.path
+    if path is None:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "sessions.sqlite")
+
+    rss_before = _rss_mb()
+    store = SessionStore(path, max_resident=args.resident)
+    ids = []
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        agent, messages, asked_skills = played_agent(i, args.turns)
+        session = store.create(agent)
+        session.messages, session.asked_skills = messages, asked_skills
+        store.save(session)
+        ids.append(session.id)
+    create_s = time.perf_counter() - start
+    start = time.perf_counter()
+    store.flush()
+    flush_s = time.perf_counter() - start
+    rss_after = _rss_mb()
+
+    stats = store.stats()
+    disk = stats["disk"]
+    print(f"{args.sessions} sessions x {args.turns} turns, resident cap {args.resident}")
+    print(f"create+save {args.sessions / create_s:,.0f} sessions/s; final flush {flush_s:.2f}s; "
+          f"{stats['writes']} rows in {stats['batches']} batches")
+    print(f"on disk {disk['bytes'] / 1e6:.1f} MB ({disk['bytes'] / args.sessions:,.0f} B/session "
+          f"compressed); resident {stats['resident']}; RSS +{rss_after - rss_before:.1f} MB")
+
+    rng = random.Random(0)
+    latencies = []
+    for session_id in rng.choices(ids, k=args.loads):
+        start = time.perf_counter()
+        store.load(session_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    stats = store.stats()
+    print(f"{args.loads} random loads: p50 {p50:.2f} ms  p99 {p99:.2f} ms "
+          f"(hits {stats['hits']}, rehydrated {stats['rehydrated']})")
+    store.close()
+
+    # Restart: a new store over the same file resumes every interview
+    store = SessionStore(path, max_resident=args.resident)
+    check = rng.sample(range(args.sessions), min(100, args.sessions))
+    for i in check:
+        agent, messages, _ = played_agent(i, args.turns)
+        session = store.load(ids[i])
+        assert session is not None, ids[i]
+        assert session.agent.confidence == agent.confidence
+        assert session.agent.asked == agent.asked
+        assert session.messages == messages
+    print(f"after restart: {len(check)} sampled sessions resumed with identical state")
+    store.close()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
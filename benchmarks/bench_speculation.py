@@ -0,0 +1,72 @@
+# benchmarks/bench_speculation.py
+#
+# Wait time per turn (evaluate + next question) with and without speculative
+# pre-generation, over scripted interviews against the configured LLM.
+# The typing delay is the window speculation gets to run in.
+#
+#   python benchmarks/bench_speculation.py [--turns 6] [--typing-s 10]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import InterviewAgent
+from llm import get_cache
+
+JOB = {
+    "NCO_Code": "2512.0100",
+    "Title": "Software Developer",
+    "Description": "Designs, writes and tests software for applications and systems.",
+}
+SKILLS = ["python", "sql", "docker", "machine learning"]
+ANSWERS = [
+    "I would profile first, then cache the hot path and add an index on the join key.",
+    "Not sure, probably restart the service.",
+    "Use a multi-stage Dockerfile so the runtime image has only the wheels and app code.",
+    "Split by time so validation data is strictly after training data, then track drift.",
+]
+
+
+def run(speculative, turns, typing_s):
+    agent = InterviewAgent(JOB, SKILLS, speculative=speculative)
+    decision = agent.decide_next()
+    waits = []
+    for i in range(turns):
+        if decision.get("action") == "stop":
+            break
+        time.sleep(typing_s)
+        start = time.perf_counter()
+        evaluation = agent.evaluate_answer(ANSWERS[i % len(ANSWERS)])
+        decision = agent.next_step_after_evaluation(evaluation)
+        waits.append(time.perf_counter() - start)
+    return waits, agent.speculation_report()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--typing-s", type=float, default=10)
+    args = parser.parse_args()
+
+    # Identical prompts across the two runs must not be answered from cache
+    get_cache().mode = "off"
+
+    print(f"{'mode':<12} {'turns':>5} {'mean wait s':>12} {'p95 wait s':>11} "
+          f"{'hit rate':>9} {'saved s':>8}")
+    for speculative in (False, True):
+        waits, spec = run(speculative, args.turns, args.typing_s)
+        name = "speculative" if speculative else "sequential"
+        p95 = np.percentile(waits, 95) if waits else 0.0
+        print(f"{name:<12} {len(waits):>5} {np.mean(waits) if waits else 0:>12.2f} "
+              f"{p95:>11.2f} {spec['hit_rate']:>9.0%} {spec['saved_s']:>8.1f}")
+        if speculative:
+            print(f"  move-on hits {spec['move_on_hits']}, follow-up hits "
+                  f"{spec['follow_up_hits']}, discarded {spec['discarded']}")
+
+
+if __name__ == "__main__":
+    main()
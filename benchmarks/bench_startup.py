@@ -0,0 +1,112 @@
+# benchmarks/bench_startup.py
+#
+# Cold-start time and per-process RSS of the CSV path vs the mmap path.
+# Each mode is measured in fresh worker processes, all alive at the same
+# time, so the shared page-cache pages of the mmap mode show up as
+# RssFile (shared) rather than RssAnon (private to each worker).
+#
+#   python benchmarks/bench_startup.py [--assets faiss_assets] [--workers 4]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _memory():
+    fields = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("VmRSS", "RssAnon", "RssFile"):
+                    fields[name] = int(value.split()[0]) / 1024
+    except OSError:
+        from faiss_search import _rss_mb
+        fields["VmRSS"] = _rss_mb()
+    return fields
+
+
+def child(assets, mode, with_model):
+    start = time.perf_counter()
+    from faiss_search import NCOSemanticSearch
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    searcher = NCOSemanticSearch(assets, mmap=(mode == "mmap"))
+    searcher.index
+    cols = searcher.columns
+    if with_model:
+        searcher.model
+    load_s = time.perf_counter() - start
+
+    # Touch metadata for a spread of rows, as searches would
+    import numpy as np
+    n = searcher.index.ntotal
+    rows = np.random.default_rng(0).integers(0, n, size=(100, 10))
+    start = time.perf_counter()
+    for name in ("NCO_Code", "Title", "Description"):
+        cols[name][rows].tolist()
+    lookup_ms = (time.perf_counter() - start) * 1000
+
+    report = {"import_s": import_s, "load_s": load_s, "lookup_ms": lookup_ms}
+    print(json.dumps({**report, **_memory()}), flush=True)
+    # Stay alive until the parent has measured every worker
+    sys.stdin.read()
+
+
+def run_mode(assets, mode, workers, with_model):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, "--assets", assets]
+    if with_model:
+        cmd.append("--with-model")
+    procs = [
+        subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    reports = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--with-model", action="store_true")
+    parser.add_argument("--child", choices=["csv", "mmap"])
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.assets, args.child, args.with_model)
+        return
+
+    # Build the columnar store up front so its one-off conversion is not timed
+    from metadata_store import open_metadata_store
+    open_metadata_store(os.path.join(args.assets, "index_df_canonical.csv"))
+
+    print(
+        f"{'mode':<5} {'import s':>8} {'load s':>8} {'lookup ms':>10} "
+        f"{'RSS MB':>8} {'anon MB':>8} {'file MB':>8}"
+    )
+    for mode in ("csv", "mmap"):
+        reports = run_mode(args.assets, mode, args.workers, args.with_model)
+
+        def avg(key):
+            values = [r[key] for r in reports if key in r]
+            return sum(values) / len(values) if values else float("nan")
+
+        print(
+            f"{mode:<5} {avg('import_s'):>8.3f} {avg('load_s'):>8.3f} "
+            f"{avg('lookup_ms'):>10.2f} "
+            f"{avg('VmRSS'):>8.1f} {avg('RssAnon'):>8.1f} {avg('RssFile'):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# build_pipeline.py
+#
+# Build and incrementally maintain the search assets from raw NCO records.
+#
+#   python build_pipeline.py build  --source nco_records.csv
+#   python build_pipeline.py update --source changed_records.csv --delete 2512.0100
+#
+# The source is a CSV with NCO_Code, Title and Description columns. Records
+# are streamed in chunks and encoded in batches, so memory stays bounded by
+# the chunk size (plus the index itself). Vectors are stored in an
+# IndexIDMap2 under a stable id derived from NCO_Code, which lets an update
+# re-encode only new or changed records and delete by code. Every output
+# file is written to a temporary path and moved into place with os.replace.
+import argparse
+import csv
+import hashlib
+import os
+import time
+
+import faiss
+import numpy as np
+
+from faiss_search import NCOSemanticSearch, reload_assets
+from metadata_store import build_metadata_store
+
+INDEX_FILE = "nco_faiss.index"
+METADATA_FILE = "index_df_canonical.csv"
+FIELDS = ["NCO_Code", "Title", "Description", "faiss_id", "content_hash"]
+TEXT_TEMPLATE = "{Title}. {Description}"
+
+
+def code_id(code):
+    """Stable non-negative int64 FAISS id for an NCO code."""
+    key = str(code).strip().encode("utf-8")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def record_text(record, template=TEXT_TEMPLATE):
+    return template.format(
+        Title=record.get("Title", ""),
+        Description=record.get("Description", "")
+    ).strip()
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def stream_records(path, chunk_size=1024):
+    """Yield lists of at most chunk_size records (dicts) from a CSV."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            code = (row.get("NCO_Code") or "").strip()
+            if not code:
+                continue
+            chunk.append({
+                "NCO_Code": code,
+                "Title": (row.get("Title") or "").strip(),
+                "Description": (row.get("Description") or "").strip(),
+            })
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _encode(model, texts, batch_size):
+    emb = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    return np.ascontiguousarray(emb, dtype="float32")
+
+
+def _write_outputs(assets_dir, index, rows):
+    """Atomically replace the metadata, columnar store and index.
+
+    Metadata goes first: the searcher drops ids it cannot find in the
+    metadata, so a reader never sees a row for a vector that is not there.
+    """
+    rows = sorted(rows, key=lambda r: r["faiss_id"])
+
+    csv_path = os.path.join(assets_dir, METADATA_FILE)
+    with open(csv_path + ".tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(csv_path + ".tmp", csv_path)
+    build_metadata_store(csv_path, os.path.splitext(csv_path)[0] + ".meta")
+
+    index_path = os.path.join(assets_dir, INDEX_FILE)
+    faiss.write_index(index, index_path + ".tmp")
+    os.replace(index_path + ".tmp", index_path)
+
+    reload_assets(assets_dir)
+
+
+def build(source, assets_dir="faiss_assets", chunk_size=1024, batch_size=64,
+          template=TEXT_TEMPLATE):
+    """Full rebuild of index and metadata from a source CSV."""
+    model = NCOSemanticSearch(assets_dir).model
+    index = None
+    rows = {}
+    stats = {"records": 0, "duplicates": 0}
+
+    for chunk in stream_records(source, chunk_size):
+        fresh = []
+        for record in chunk:
+            fid = code_id(record["NCO_Code"])
+            if fid in rows:
+                stats["duplicates"] += 1
+                continue
+            text = record_text(record, template)
+            rows[fid] = {**record, "faiss_id": fid, "content_hash": content_hash(text)}
+            fresh.append((fid, text))
+        if not fresh:
+            continue
+
+        emb = _encode(model, [text for _, text in fresh], batch_size)
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(emb.shape[1]))
+        index.add_with_ids(emb, np.array([fid for fid, _ in fresh], dtype="int64"))
+        stats["records"] += len(fresh)
+
+    if index is None:
+        raise ValueError(f"no NCO records found in {source}")
+
+    _write_outputs(assets_dir, index, rows.values())
+    return stats
+
+
+def _read_rows(assets_dir):
+    rows = {}
+    path = os.path.join(assets_dir, METADATA_FILE)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            if "faiss_id" not in row:
+                raise ValueError(
+                    "metadata has no faiss_id column; run a full build first"
+                )
+            row["faiss_id"] = int(row["faiss_id"])
+            rows[row["faiss_id"]] = {name: row.get(name, "") for name in FIELDS}
+    return rows
+
+
+def update(assets_dir="faiss_assets", source=None, delete_codes=(), chunk_size=1024,
+           batch_size=64, template=TEXT_TEMPLATE):
+    """Add, update or delete records by NCO_Code without a full re-encode.
+
+    Records whose text is unchanged are skipped, so only new and edited
+    records go through the model.
+    """
+    index = faiss.read_index(os.path.join(assets_dir, INDEX_FILE))
+    if not isinstance(index, faiss.IndexIDMap2):
+        raise ValueError(f"{INDEX_FILE} is not ID-mapped; run a full build first")
+    rows = _read_rows(assets_dir)
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    removed = [code_id(code) for code in delete_codes if code_id(code) in rows]
+    if removed:
+        index.remove_ids(np.array(removed, dtype="int64"))
+        for fid in removed:
+            del rows[fid]
+        stats["deleted"] = len(removed)
+
+    model = None
+    for chunk in (stream_records(source, chunk_size) if source else []):
+        changed = []
+        for record in chunk:
+            fid = code_id(record["NCO_Code"])
+            text = record_text(record, template)
+            digest = content_hash(text)
+            old = rows.get(fid)
+            if old is not None and old["content_hash"] == digest:
+                stats["unchanged"] += 1
+                continue
+            stats["updated" if old is not None else "added"] += 1
+            rows[fid] = {**record, "faiss_id": fid, "content_hash": digest}
+            changed.append((fid, text))
+        if not changed:
+            continue
+
+        ids = np.array([fid for fid, _ in changed], dtype="int64")
+        index.remove_ids(ids)       # no-op for new codes
+        if model is None:
+            model = NCOSemanticSearch(assets_dir).model
+        emb = _encode(model, [text for _, text in changed], batch_size)
+        index.add_with_ids(emb, ids)
+
+    _write_outputs(assets_dir, index, rows.values())
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["build", "update"])
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--source", help="CSV with NCO_Code, Title, Description")
+    parser.add_argument("--delete", nargs="*", default=[], metavar="NCO_CODE")
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--template", default=TEXT_TEMPLATE,
+                        help="text encoded per record, e.g. '{Title}. {Description}'")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "build":
+        if not args.source:
+            parser.error("build needs --source")
+        stats = build(args.source, args.assets, args.chunk_size, args.batch_size,
+                      args.template)
+    else:
+        stats = update(args.assets, args.source, args.delete, args.chunk_size,
+                       args.batch_size, args.template)
+    print(stats, f"{time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# embedding_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(query):
+    # Tokenizers split on whitespace anyway, so this does not change the embedding
+    return " ".join(str(query).split())
+
+
+def model_fingerprint(model_dir, chunk=1024 * 1024):
+    """Stable hash of a model directory (file names, sizes and contents).
+
+    Large weight files are hashed by size plus their first and last MB so
+    fingerprinting a few hundred MB of weights stays cheap.
+    """
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(model_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            h.update(os.path.relpath(path, model_dir).encode())
+            h.update(str(size).encode())
+            with open(path, "rb") as f:
+                if size <= 8 * chunk:
+                    h.update(f.read())
+                else:
+                    h.update(f.read(chunk))
+                    f.seek(-chunk, os.SEEK_END)
+                    h.update(f.read(chunk))
+    return h.hexdigest()[:16]
+
+
+class _DiskEmbeddingStore:
+    """Ring buffer of embeddings in a memory-mapped .f32 file plus an
+    append-only key log.
+
+    Each put appends one "row<TAB>key" line per embedding (normalized keys
+    contain no tabs or newlines), so a miss costs O(batch), not O(capacity);
+    the last entry for a row wins on replay. The log is compacted to one
+    line per live row once it grows past 2 x capacity lines. Single writer
+    per directory; readers in other processes see rows appended before
+    they open the store.
+    """
+
+    def __init__(self, directory, capacity):
+        self.directory = directory
+        self.capacity = capacity
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.log_path = os.path.join(directory, "keys.log")
+        self.data_path = os.path.join(directory, "embeddings.f32")
+        self.rows = {}                      # key -> row
+        self.keys = [None] * capacity       # row -> key
+        self.next_row = 0
+        self.dim = None
+        self.data = None
+        self._log = None
+        self._log_lines = 0
+
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = self._legacy_meta()
+        if meta.get("capacity") == capacity and os.path.exists(self.data_path):
+            self.dim = meta["dim"]
+            self.data = np.memmap(
+                self.data_path, dtype="float32", mode="r+", shape=(capacity, self.dim)
+            )
+            self._replay()
+
+    def _legacy_meta(self):
+        # Stores written before the key log kept everything in keys.json
+        legacy = os.path.join(self.directory, "keys.json")
+        try:
+            with open(legacy) as f:
+                meta = json.load(f)
+            if meta.get("capacity") != self.capacity:
+                return {}
+            with open(self.log_path, "w", encoding="utf-8") as f:
+                order = sorted(meta["rows"].items(),
+                               key=lambda kv: (kv[1] - meta["next_row"]) % self.capacity)
+                f.writelines(f"{row}\t{key}\n" for key, row in order)
+                f.write(f"{(meta['next_row'] - 1) % self.capacity}\n")
+            with open(self.meta_path, "w") as f:
+                json.dump({"capacity": self.capacity, "dim": meta["dim"]}, f)
+            os.remove(legacy)
+        except (OSError, ValueError, KeyError):
+            return {}
+        return {"capacity": self.capacity, "dim": meta["dim"]}
+
+    def _replay(self):
+        try:
+            f = open(self.log_path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                row, sep, key = line.rstrip("\n").partition("\t")
+                if not row.isdigit() or int(row) >= self.capacity:
+                    continue    # torn last line after a crash
+                if sep:
+                    self._assign(int(row), key)
+                # A bare "row" line (from compaction) only moves the position
+                self.next_row = (int(row) + 1) % self.capacity
+                self._log_lines += 1
+
+    def _assign(self, row, key):
+        old_key = self.keys[row]
+        if old_key is not None and self.rows.get(old_key) == row:
+            del self.rows[old_key]
+        old_row = self.rows.get(key)
+        if old_row is not None and old_row != row:
+            self.keys[old_row] = None
+        self.keys[row] = key
+        self.rows[key] = row
+
+    def get(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return np.array(self.data[row])
+
+    def put_many(self, items):
+        if not items:
+            return
+        if self.data is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.dim = int(len(items[0][1]))
+            self.data = np.memmap(
+                self.data_path, dtype="float32", mode="w+",
+                shape=(self.capacity, self.dim)
+            )
+            with open(self.meta_path, "w") as f:
+                json.dump({"capacity": self.capacity, "dim": self.dim}, f)
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+
+        lines = []
+        for key, vec in items:
+            row = self.next_row
+            self.data[row] = vec
+            self._assign(row, key)
+            lines.append(f"{row}\t{key}\n")
+            self.next_row = (row + 1) % self.capacity
+
+        # Vectors reach the file before the log lines that point at them
+        self.data.flush()
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log.write("".join(lines))
+        self._log.flush()
+        self._log_lines += len(lines)
+        if self._log_lines > 2 * self.capacity:
+            self._compact()
+
+    def _compact(self):
+        # Oldest row first, so replaying leaves next_row where it is
+        order = [(self.next_row + i) % self.capacity for i in range(self.capacity)]
+        live = [(row, self.keys[row]) for row in order if self.keys[row] is not None]
+        tmp = self.log_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{row}\t{key}\n" for row, key in live)
+            if not live or live[-1][0] != (self.next_row - 1) % self.capacity:
+                # Keep the write position even when the newest row was dropped
+                f.write(f"{(self.next_row - 1) % self.capacity}\n")
+        self._log.close()
+        os.replace(tmp, self.log_path)
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log_lines = len(live) + 1
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of normalized query embeddings, optionally backed by disk.
+
+    The disk tier lives under persist_dir/<fingerprint>/, so embeddings from
+    a different fine-tuned model are never reused.
+    """
+
+    def __init__(self, maxsize=4096, persist_dir=None, fingerprint=None,
+                 disk_capacity=100000):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if persist_dir:
+            if not fingerprint:
+                raise ValueError("a model fingerprint is required for the disk cache")
+            self._disk = _DiskEmbeddingStore(
+                os.path.join(persist_dir, fingerprint), disk_capacity
+            )
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._lru)
+
+    def stats(self):
+        return {
+            "size": len(self._lru),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remember(self, key, vec):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def encode(self, queries, encode_fn):
+        """Embeddings for queries; only cache misses are passed to encode_fn.
+
+        encode_fn takes a list of strings and returns normalized embeddings,
+        and is called at most once per call (one batched forward pass).
+        """
+        keys = [normalize_query(q) for q in queries]
+        found = {}
+        missing = []
+        seen = set()
+
+        with self._lock:
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    found[key] = vec
+                    continue
+                vec = self._disk.get(key) if self._disk else None
+                if vec is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vec)
+                    found[key] = vec
+                    continue
+                self.misses += 1
+                missing.append(key)
+
+        if missing:
+            emb = np.asarray(encode_fn(missing), dtype="float32")
+            with self._lock:
+                for key, vec in zip(missing, emb):
+                    self._remember(key, vec)
+                    found[key] = vec
+                if self._disk:
+                    self._disk.put_many(list(zip(missing, emb)))
+
+        return np.stack([found[key] for key in keys])
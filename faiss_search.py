@@ -1,44 +1,500 @@
 # faiss_search.py
 import faiss
-import pandas as pd
+import math
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import os
+import resource
+import sys
+import threading
+import time
+
+from embedding_cache import QueryEmbeddingCache, model_fingerprint
+from index_builder import search_parameters
+from lexical_search import LexicalIndex, looks_like_code, reciprocal_rank_fusion
+from metadata_store import open_metadata_store
+
+
+# -----------------------------
+# SHARED ASSET REGISTRY
+# -----------------------------
+# Index, metadata and model are loaded once per process and shared by every
+# searcher (Streamlit sessions, main.py, ...). Each asset has its own lock so
+# a slow model load does not block an index load for another assets_dir.
+_registry_lock = threading.Lock()
+_asset_locks = {}
+_assets = {}
+_asset_stats = {}
+_searchers = {}
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # No /proc (macOS): fall back to peak RSS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            return peak / (1024 * 1024)
+        return peak / 1024
+
+
+def _load_asset(kind, path, loader):
+    key = (kind, os.path.abspath(path))
+
+    asset = _assets.get(key)
+    if asset is not None:
+        return asset
+
+    with _registry_lock:
+        lock = _asset_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        asset = _assets.get(key)
+        if asset is None:
+            rss_before = _rss_mb()
+            start = time.perf_counter()
+            asset = loader(path)
+            _asset_stats[key] = {
+                "asset": kind,
+                "path": key[1],
+                "load_seconds": time.perf_counter() - start,
+                "rss_delta_mb": _rss_mb() - rss_before,
+            }
+            _assets[key] = asset
+    return asset
+
+
+# pandas and sentence_transformers (torch) are imported on first load so that
+# processes which never touch them (e.g. mmap workers) do not pay for them
+def _read_metadata(path):
+    import pandas as pd
+    # Keep codes as written ("2512.0100"), not as floats
+    return pd.read_csv(path, dtype={"NCO_Code": str}).fillna("")
+
+
+def _load_model(path):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(path)
+
+
+def _load_onnx_encoder(path):
+    from onnx_encoder import OnnxEncoder
+    return OnnxEncoder(path)
+
+
+def _read_index_mmap(path):
+    # Flat codes and IVF inverted lists are mmapped by different flags;
+    # IVF files start with an "Iw.." fourcc
+    with open(path, "rb") as f:
+        fourcc = f.read(4)
+    if fourcc.startswith(b"Iw") or not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    else:
+        flags = faiss.IO_FLAG_MMAP_IFC
+    return faiss.read_index(path, flags)
+
+
+def _metadata_columns(df):
+    n = len(df)
+    columns = {}
+    for name in ("NCO_Code", "Title", "Description"):
+        if name in df.columns:
+            columns[name] = df[name].to_numpy()
+        else:
+            columns[name] = np.full(n, "", dtype=object)
+    if "faiss_id" in df.columns:
+        columns["faiss_id"] = df["faiss_id"].to_numpy(dtype="int64")
+    return columns
+
+
+def _id_lookup(ids):
+    # Sorted ids plus the row of each, for searchsorted id -> row mapping
+    ids = np.asarray(ids)
+    if len(ids) < 2 or np.all(ids[1:] > ids[:-1]):
+        return ids, None
+    order = np.argsort(ids, kind="stable")
+    return ids[order], order
+
+
+def reload_assets(assets_dir="faiss_assets"):
+    """Drop the cached index and metadata for assets_dir (e.g. after a rebuild).
+
+    The model is kept; the next search reloads the files from disk.
+    """
+    prefix = os.path.abspath(assets_dir) + os.sep
+    with _registry_lock:
+        for key in list(_assets):
+            if key[0] not in ("model", "onnx_model") and key[1].startswith(prefix):
+                _assets.pop(key, None)
+                _asset_stats.pop(key, None)
+
+
+def asset_report():
+    """Load time and resident-memory growth for every asset loaded so far."""
+    return [dict(stats) for stats in _asset_stats.values()]
+
+
+def get_searcher(assets_dir="faiss_assets", **options):
+    """Process-wide shared searcher for assets_dir (assets load lazily).
+
+    options are passed to NCOSemanticSearch; each distinct set of options
+    gets its own searcher, but all of them share the loaded assets. If
+    NCO_SEARCH_SERVICE is set, a SearchClient for that service is returned;
+    assets and options are the service's, so passing any raises ValueError.
+    """
+    # NCO_SEARCH_SERVICE points every caller at a running search_service.py
+    service = os.environ.get("NCO_SEARCH_SERVICE")
+    if service:
+        if options or assets_dir != "faiss_assets":
+            raise ValueError(
+                f"NCO_SEARCH_SERVICE={service} is set: assets_dir and searcher options "
+                f"({', '.join(sorted(options)) or assets_dir}) are configured on "
+                "search_service.py, not per caller; unset it to search locally"
+            )
+        from search_service import SearchClient
+        key = ("service", service)
+        with _registry_lock:
+            if key not in _searchers:
+                _searchers[key] = SearchClient(service)
+            return _searchers[key]
+
+    key = (os.path.abspath(assets_dir), tuple(sorted(options.items())))
+    with _registry_lock:
+        searcher = _searchers.get(key)
+        if searcher is None:
+            searcher = NCOSemanticSearch(assets_dir, **options)
+            _searchers[key] = searcher
+    return searcher
+
+
+def warm_up(assets_dir="faiss_assets"):
+    """Eagerly load all assets so the first search does not pay for it."""
+    searcher = get_searcher(assets_dir)
+    searcher.warm_up()
+    return searcher
+
 
 class NCOSemanticSearch:
-    def __init__(self, assets_dir="faiss_assets"):
+    def __init__(self, assets_dir="faiss_assets", cache_size=4096, cache_dir=None,
+                 mmap=False, index_name="nco_faiss.index", nprobe=None,
+                 ef_search=None, encoder="torch"):
         self.assets_dir = assets_dir
+        # encoder="onnx" uses the int8 ONNX export (onnx_encoder.py), no torch
+        if encoder not in ("torch", "onnx"):
+            raise ValueError(f"unknown encoder {encoder!r}")
+        self.encoder = encoder
+        # index_name selects a variant from index_builder.py; nprobe (IVF) and
+        # ef_search (HNSW) are applied per search, the shared index is not modified
+        self.index_name = index_name
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        # mmap=True: index pages and columnar metadata (metadata_store.py) are
+        # mapped from disk and shared between processes via the page cache
+        self.mmap = mmap
 
-        self.index = faiss.read_index(
-            os.path.join(assets_dir, "nco_faiss.index")
+        # Repeated job-intent strings skip the transformer entirely
+        fingerprint = None
+        if cache_dir:
+            fingerprint = model_fingerprint(self.model_dir)
+        self.embedding_cache = QueryEmbeddingCache(
+            maxsize=cache_size,
+            persist_dir=cache_dir,
+            fingerprint=fingerprint
         )
 
-        self.df = pd.read_csv(
-            os.path.join(assets_dir, "index_df_canonical.csv")
-        ).fillna("")
+    @property
+    def index(self):
+        path = os.path.join(self.assets_dir, self.index_name)
+        if self.mmap:
+            return _load_asset("index_mmap", path, _read_index_mmap)
+        return _load_asset("index", path, faiss.read_index)
 
-        self.model = SentenceTransformer(
-            os.path.join(assets_dir, "sbert_nco_finetuned")
+    @property
+    def df(self):
+        return _load_asset(
+            "metadata",
+            os.path.join(self.assets_dir, "index_df_canonical.csv"),
+            _read_metadata
         )
 
-    def search(self, query, k=3):
-        emb = self.model.encode(
-            [query],
-            normalize_embeddings=True
+    @property
+    def model_dir(self):
+        if self.encoder == "onnx":
+            return os.path.join(self.assets_dir, "sbert_nco_finetuned_onnx")
+        return os.path.join(self.assets_dir, "sbert_nco_finetuned")
+
+    @property
+    def model(self):
+        if self.encoder == "onnx":
+            return _load_asset("onnx_model", self.model_dir, _load_onnx_encoder)
+        return _load_asset("model", self.model_dir, _load_model)
+
+    @property
+    def columns(self):
+        # Metadata as plain numpy arrays so hits can be fetched with one
+        # fancy-indexing call per column instead of a df.iloc per row
+        path = os.path.join(self.assets_dir, "index_df_canonical.csv")
+        if self.mmap:
+            return _load_asset("metadata_store", path, open_metadata_store)
+        return _load_asset(
+            "columns",
+            path,
+            lambda path: _metadata_columns(self.df)
         )
 
-        D, I = self.index.search(
-            np.array(emb).astype("float32"), k
+    @property
+    def id_lookup(self):
+        # Indexes built by build_pipeline.py store NCO_Code-derived ids rather
+        # than row positions; the metadata then carries a faiss_id column
+        ids = self.columns.get("faiss_id")
+        if ids is None:
+            return None
+        return _load_asset(
+            "id_lookup",
+            os.path.join(self.assets_dir, "index_df_canonical.csv"),
+            lambda path: _id_lookup(ids)
         )
 
-        results = []
-        for score, idx in zip(D[0], I[0]):
-            row = self.df.iloc[idx]
-            results.append({
+    @property
+    def lexical(self):
+        cols = self.columns
+        return _load_asset(
+            "lexical",
+            os.path.join(self.assets_dir, "index_df_canonical.csv"),
+            lambda path: LexicalIndex(
+                cols["NCO_Code"].tolist(),
+                cols["Title"].tolist(),
+                cols["Description"].tolist()
+            )
+        )
+
+    def warm_up(self):
+        self.index
+        self.columns
+        self.id_lookup
+        self.model
+        return self
+
+    def encode(self, queries, batch_size=None):
+        """Normalized embeddings for queries, encoding cache misses in one batch."""
+        return self.embedding_cache.encode(
+            list(queries),
+            lambda missing: self.model.encode(
+                missing,
+                batch_size=batch_size or len(missing),
+                normalize_embeddings=True
+            )
+        )
+
+    def search(self, query, k=3):
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries, k=3, batch_size=None):
+        """Search many queries with one encode pass and one index search.
+
+        Returns one result list per query, in the same format as search().
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+
+        emb = self.encode(queries, batch_size=batch_size)
+
+        D, I = self._search_index(emb, k)
+        return self._results(D, I)
+
+    def match_resume(self, skills, k=3, aggregate="mean", weights=None,
+                     sections=None, section_weight=0.5, pool=50):
+        """Rank NCO roles against a whole resume in one encode and one search.
+
+        Every skill (and optional resume section text) is encoded in a
+        single batch and searched together; each text keeps its top `pool`
+        roles. A role's similarity to a text that did not retrieve it is
+        taken as that text's lowest retrieved score (an upper bound); texts
+        that retrieved nothing are left out. aggregate is "mean" (weighted
+        mean over texts) or "max" (best text). Each result carries per-text
+        "skills" contributions. weights needs one finite, non-negative entry
+        per skill.
+        """
+        skills = list(skills)
+        weights = list(weights) if weights is not None else [1.0] * len(skills)
+        if len(weights) != len(skills):
+            raise ValueError(f"got {len(weights)} weights for {len(skills)} skills")
+        if not all(math.isfinite(x) and x >= 0 for x in [*weights, section_weight]):
+            raise ValueError("weights must be finite and non-negative")
+        pairs = list(zip(skills, weights))
+        pairs += [(section, section_weight) for section in (sections or [])]
+        pairs = [(str(text), weight) for text, weight in pairs if str(text).strip()]
+        texts = [text for text, _ in pairs]
+        w = [weight for _, weight in pairs]
+        if not texts:
+            return []
+        w = np.asarray(w, dtype="float32")
+        if aggregate == "mean" and not w.sum() > 0:
+            raise ValueError(f"weights must have a positive total, got {w.sum()}")
+
+        D, I = self._search_index(self.encode(texts), pool)
+        rows, valid = self._rows(I)
+        # A text with no valid hit (low nprobe / ef, only deleted ids) has no
+        # floor; left in, its inf would swamp every role's score
+        retrieved = valid.any(axis=1)
+        if not retrieved.all():
+            texts = [text for text, keep in zip(texts, retrieved) if keep]
+            w, D, rows, valid = w[retrieved], D[retrieved], rows[retrieved], valid[retrieved]
+            if aggregate == "mean" and not w.sum() > 0:
+                return []
+
+        candidates, inverse = np.unique(rows[valid], return_inverse=True)
+        if not len(candidates):
+            return []
+        floor = np.where(valid, D, np.inf).min(axis=1)
+        sims = np.repeat(floor[:, None], len(candidates), axis=1)
+        text_idx = np.nonzero(valid)[0]
+        np.maximum.at(sims, (text_idx, inverse), D[valid])
+
+        if aggregate == "max":
+            best = sims.argmax(axis=0)
+            role_scores = sims.max(axis=0)
+            share = np.zeros_like(sims)
+            share[best, np.arange(len(candidates))] = role_scores
+        elif aggregate == "mean":
+            share = sims * w[:, None] / w.sum()
+            role_scores = share.sum(axis=0)
+        else:
+            raise ValueError(f"unknown aggregate {aggregate!r}")
+
+        top = np.argsort(-role_scores, kind="stable")[:k]
+        results = self._hits(candidates[top], role_scores[top], "resume")
+        for result, col in zip(results, top):
+            result["skills"] = sorted(
+                (
+                    {
+                        "skill": text,
+                        "similarity": float(sims[i, col]),
+                        "contribution": float(share[i, col])
+                    }
+                    for i, text in enumerate(texts)
+                ),
+                key=lambda item: -item["contribution"]
+            )
+        return results
+
+    def lookup_code(self, code):
+        """Exact NCO_Code lookup without the model, or None."""
+        row = self.lexical.codes.get(code)
+        if row is None:
+            return None
+        return self._hits([row], [1.0], "code")[0]
+
+    def hybrid_search(self, query, k=3, candidates=50, rrf_k=60,
+                      fast_path=True, fast_path_ratio=2.0):
+        """BM25 + dense search fused with reciprocal-rank fusion.
+
+        NCO codes typed directly are answered from the code index. With
+        fast_path, a decisive lexical match (exact title, a single matching
+        job, or a top BM25 score >= fast_path_ratio x the runner-up) is
+        returned without running the encoder. Each hit has a "match" key:
+        "code", "lexical" or "hybrid".
+        """
+        lexical = self.lexical
+
+        if looks_like_code(query):
+            row = lexical.codes.get(query)
+            rows = [row] if row is not None else lexical.codes.prefix(query, k)
+            if rows:
+                return self._hits(rows, [1.0] * len(rows), "code")
+
+        lex_rows, lex_scores = lexical.bm25.search(query, candidates)
+
+        if fast_path and len(lex_rows):
+            bm25_scores = dict(zip(lex_rows.tolist(), lex_scores.tolist()))
+            rows = list(bm25_scores)
+            title_row = lexical.bm25.exact_title(query)
+            if title_row is not None:
+                rows = [title_row] + [r for r in rows if r != title_row]
+            if (title_row is not None or len(rows) == 1
+                    or lex_scores[0] >= fast_path_ratio * lex_scores[1]):
+                rows = rows[:k]
+                scores = [bm25_scores.get(r, float(lex_scores[0])) for r in rows]
+                return self._hits(rows, scores, "lexical")
+
+        D, I = self._search_index(self.encode([query]), candidates)
+        rows, valid = self._rows(I)
+        dense_rows = rows[0][valid[0]].tolist()
+
+        fused = reciprocal_rank_fusion([lex_rows.tolist(), dense_rows], rrf_k)[:k]
+        return self._hits([r for r, _ in fused], [s for _, s in fused], "hybrid")
+
+    def _hits(self, rows, scores, match):
+        cols = self.columns
+        rows = np.asarray(rows, dtype="int64")
+        codes = cols["NCO_Code"][rows].tolist()
+        titles = cols["Title"][rows].tolist()
+        descriptions = cols["Description"][rows].tolist()
+        return [
+            {
                 "score": float(score),
-                "NCO_Code": row["NCO_Code"],
-                "Title": row["Title"],
-                "Description": row.get("Description", "")
-            })
+                "NCO_Code": code,
+                "Title": title,
+                "Description": desc,
+                "match": match
+            }
+            for score, code, title, desc in zip(scores, codes, titles, descriptions)
+        ]
+
+    def _search_index(self, emb, k):
+        index = self.index
+        x = np.ascontiguousarray(emb, dtype="float32")
+        params = search_parameters(index, self.nprobe, self.ef_search)
+        if params is None:
+            return index.search(x, k)
+        return index.search(x, k, params=params)
+
+    def _rows(self, I):
+        valid = I >= 0          # FAISS pads with -1 when it has < k hits
+        lookup = self.id_lookup
+        if lookup is None:
+            return np.where(valid, I, 0), valid
+
+        sorted_ids, order = lookup
+        if len(sorted_ids) == 0:
+            return np.zeros_like(I), np.zeros_like(valid)
+        pos = np.minimum(np.searchsorted(sorted_ids, I), len(sorted_ids) - 1)
+        # Ids missing from the metadata (mid-rebuild) are dropped like padding
+        valid &= sorted_ids[pos] == I
+        rows = pos if order is None else order[pos]
+        return np.where(valid, rows, 0), valid
+
+    def _results(self, D, I):
+        cols = self.columns
+        rows, valid = self._rows(I)
+
+        scores = D.tolist()
+        codes = cols["NCO_Code"][rows].tolist()
+        titles = cols["Title"][rows].tolist()
+        descriptions = cols["Description"][rows].tolist()
+
+        results = []
+        for q in range(I.shape[0]):
+            hits = []
+            for j in np.flatnonzero(valid[q]):
+                hits.append({
+                    "score": scores[q][j],
+                    "NCO_Code": codes[q][j],
+                    "Title": titles[q][j],
+                    "Description": descriptions[q][j]
+                })
+            results.append(hits)
         return results
 
+
+if __name__ == "__main__":
+    # python faiss_search.py [assets_dir]  -> warm up and print the asset report
+    warm_up(sys.argv[1] if len(sys.argv) > 1 else "faiss_assets")
+    for stats in asset_report():
+        print(
+            f"{stats['asset']:<9} {stats['load_seconds']:7.2f}s "
+            f"{stats['rss_delta_mb']:8.1f} MB  {stats['path']}"
+        )
@@ -0,0 +1,168 @@
+# index_builder.py
+#
+# Build alternative FAISS index types from the same normalized embeddings.
+#
+#   python index_builder.py --assets faiss_assets --types ivf hnsw ivfpq
+#
+# Each variant is written next to the original as nco_faiss_<type>.index and
+# can be selected with NCOSemanticSearch(index_name="nco_faiss_hnsw.index").
+import argparse
+import math
+import os
+import time
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+
+
+def default_nlist(n):
+    # ~4*sqrt(n) lists, but keep >= 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def default_pq_m(d):
+    # Sub-quantizer count must divide d; aim for ~8 dims per sub-vector
+    for m in range(max(1, d // 8), 0, -1):
+        if d % m == 0:
+            return m
+    return 1
+
+
+def build_index(vectors, kind="flat", nlist=None, hnsw_m=32,
+                ef_construction=200, pq_m=None, pq_bits=8, train_size=100000,
+                ids=None):
+    """Inner-product index of the given type over normalized vectors.
+
+    With ids the index is wrapped in an IndexIDMap2 and returns those ids
+    instead of row positions.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, d = vectors.shape
+
+    if kind == "flat":
+        index = faiss.IndexFlatIP(d)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+    elif kind in ("ivf", "ivfpq"):
+        nlist = nlist or default_nlist(n)
+        quantizer = faiss.IndexFlatIP(d)
+        if kind == "ivf":
+            index = faiss.IndexIVFFlat(
+                quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            # Small corpora cannot train 2^8 centroids per sub-quantizer
+            pq_bits = max(4, min(pq_bits, int(math.log2(max(n // 39, 1)))))
+            index = faiss.IndexIVFPQ(
+                quantizer, d, nlist, pq_m or default_pq_m(d), pq_bits,
+                faiss.METRIC_INNER_PRODUCT
+            )
+        train = vectors
+        if n > train_size:
+            rng = np.random.default_rng(0)
+            train = vectors[rng.choice(n, train_size, replace=False)]
+        index.train(train)
+    else:
+        raise ValueError(f"unknown index type {kind!r}, expected one of {INDEX_TYPES}")
+
+    if ids is not None:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+    else:
+        index.add(vectors)
+    return index
+
+
+def search_parameters(index, nprobe=None, ef_search=None):
+    """Per-call SearchParameters for the runtime knobs, or None.
+
+    Passing these to index.search() leaves the (shared) index untouched, so
+    searchers with different knobs can use the same loaded index.
+    """
+    if nprobe is not None and faiss.try_extract_index_ivf(index) is not None:
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if ef_search is not None and isinstance(_base_index(index), faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
+
+def _base_index(index):
+    # Unwrap IndexIDMap / IndexPreTransform style wrappers
+    index = faiss.downcast_index(index)
+    while hasattr(index, "index"):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index):
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf = faiss.downcast_index(ivf)
+        return "ivfpq" if isinstance(ivf, faiss.IndexIVFPQ) else "ivf"
+    if isinstance(_base_index(index), faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def index_size_bytes(index):
+    return int(faiss.serialize_index(index).size)
+
+
+def load_embeddings(index_path):
+    """Recover (vectors, ids) from an exact (flat) index.
+
+    ids is None for a plain positional index and the id array for an
+    ID-mapped one (as written by build_pipeline.py).
+    """
+    index = faiss.read_index(index_path)
+    if index_kind(index) != "flat":
+        raise ValueError(f"{index_path} is not a flat index; pass --embeddings")
+    if isinstance(index, faiss.IndexIDMap):
+        ids = faiss.vector_to_array(index.id_map)
+        flat = faiss.downcast_index(index.index)
+        return flat.reconstruct_n(0, flat.ntotal), ids
+    return index.reconstruct_n(0, index.ntotal), None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--source", default="nco_faiss.index",
+                        help="flat index to take the embeddings from")
+    parser.add_argument("--embeddings", help=".npy matrix to use instead of --source")
+    parser.add_argument("--types", nargs="+", default=["ivf", "hnsw", "ivfpq"],
+                        choices=INDEX_TYPES)
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--pq-m", type=int)
+    parser.add_argument("--pq-bits", type=int, default=8)
+    args = parser.parse_args()
+
+    ids = None
+    if args.embeddings:
+        vectors = np.load(args.embeddings)
+    else:
+        vectors, ids = load_embeddings(os.path.join(args.assets, args.source))
+
+    for kind in args.types:
+        start = time.perf_counter()
+        index = build_index(
+            vectors, kind, nlist=args.nlist, hnsw_m=args.hnsw_m,
+            ef_construction=args.ef_construction, pq_m=args.pq_m,
+            pq_bits=args.pq_bits, ids=ids
+        )
+        path = os.path.join(args.assets, f"nco_faiss_{kind}.index")
+        faiss.write_index(index, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        print(
+            f"{kind:<6} {index.ntotal} vectors  {time.perf_counter() - start:6.2f}s  "
+            f"{os.path.getsize(path) / 1e6:8.2f} MB  -> {path}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# json_stream.py
+import json
+
+
+class JSONFieldStream:
+    """Incremental parser for the top-level fields of a streamed JSON object.
+
+    Feed it text chunks as they arrive; feed() returns events:
+      ("partial", key, text)  a string value grew (text so far)
+      ("done", key, value)    a value is complete (any JSON type)
+    Text before the first "{" (prose, code fences) is ignored.
+    """
+
+    def __init__(self):
+        self.state = "start"    # start, key, colon, value, string, raw, after, end
+        self.key = None
+        self.buf = []
+        self.in_key = False
+        self.escape = False
+        self.depth = 0          # nesting inside a non-string value
+        self.in_nested_string = False
+        self.fields = {}
+
+    def _decode(self, raw):
+        try:
+            return json.loads('"' + raw + '"')
+        except ValueError:
+            # Partial escape at the end of a chunk: show what is decodable
+            cut = raw.rfind("\\")
+            try:
+                return json.loads('"' + raw[:cut] + '"') if cut != -1 else raw
+            except ValueError:
+                return raw
+
+    def _finish_raw(self, events):
+        raw = "".join(self.buf).strip()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        self.fields[self.key] = value
+        events.append(("done", self.key, value))
+        self.buf = []
+
+    def feed(self, chunk):
+        events = []
+        grew = False
+
+        for ch in chunk:
+            state = self.state
+            if state == "start":
+                if ch == "{":
+                    self.state = "key"
+            elif state == "key":
+                if self.in_key:
+                    if self.escape:
+                        self.escape = False
+                        self.buf.append(ch)
+                    elif ch == "\\":
+                        self.escape = True
+                        self.buf.append(ch)
+                    elif ch == '"':
+                        self.key = self._decode("".join(self.buf))
+                        self.buf = []
+                        self.in_key = False
+                        self.state = "colon"
+                    else:
+                        self.buf.append(ch)
+                elif ch == '"':
+                    self.in_key = True
+                elif ch == "}":
+                    self.state = "end"
+            elif state == "colon":
+                if ch == ":":
+                    self.state = "value"
+            elif state == "value":
+                if ch == '"':
+                    self.state = "string"
+                elif not ch.isspace():
+                    self.state = "raw"
+                    self.depth = 1 if ch in "{[" else 0
+                    self.buf = [ch]
+            elif state == "string":
+                if self.escape:
+                    self.escape = False
+                    self.buf.append(ch)
+                elif ch == "\\":
+                    self.escape = True
+                    self.buf.append(ch)
+                elif ch == '"':
+                    value = self._decode("".join(self.buf))
+                    self.fields[self.key] = value
+                    events.append(("done", self.key, value))
+                    self.buf = []
+                    grew = False
+                    self.state = "after"
+                else:
+                    self.buf.append(ch)
+                    grew = True
+            elif state == "raw":
+                if self.in_nested_string:
+                    if self.escape:
+                        self.escape = False
+                    elif ch == "\\":
+                        self.escape = True
+                    elif ch == '"':
+                        self.in_nested_string = False
+                    self.buf.append(ch)
+                elif ch == '"':
+                    self.in_nested_string = True
+                    self.buf.append(ch)
+                elif ch in "{[":
+                    self.depth += 1
+                    self.buf.append(ch)
+                elif ch in "}]" and self.depth > 0:
+                    self.depth -= 1
+                    self.buf.append(ch)
+                elif self.depth == 0 and ch in ",}":
+                    self._finish_raw(events)
+                    self.state = "key" if ch == "," else "end"
+                else:
+                    self.buf.append(ch)
+            elif state == "after":
+                if ch == ",":
+                    self.state = "key"
+                elif ch == "}":
+                    self.state = "end"
+
+        if grew and self.state == "string":
+            events.append(("partial", self.key, self._decode("".join(self.buf))))
+        return events
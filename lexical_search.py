@@ -0,0 +1,123 @@
+# lexical_search.py
+import bisect
+import math
+import re
+from collections import defaultdict
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+CODE_RE = re.compile(r"\d{1,4}(?:\.\d{0,4})?")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def normalize_code(code):
+    return str(code).strip()
+
+
+def looks_like_code(query):
+    return CODE_RE.fullmatch(query.strip()) is not None
+
+
+class BM25Index:
+    """In-memory inverted index with BM25 scoring over Title + Description.
+
+    Title terms are counted title_weight times, so a title match outranks
+    the same word in a description. Per-posting BM25 weights are computed
+    at build time; a query is then a sum of a few numpy arrays.
+    """
+
+    def __init__(self, titles, descriptions, k1=1.2, b=0.75, title_weight=3):
+        self.n = len(titles)
+        tfs = []
+        lengths = np.zeros(self.n, dtype="float32")
+        df = defaultdict(int)
+
+        for i, (title, desc) in enumerate(zip(titles, descriptions)):
+            tf = defaultdict(int)
+            for term in tokenize(title):
+                tf[term] += title_weight
+            for term in tokenize(desc):
+                tf[term] += 1
+            tfs.append(tf)
+            lengths[i] = sum(tf.values())
+            for term in tf:
+                df[term] += 1
+
+        avgdl = float(lengths.mean()) if self.n else 0.0
+        norm = k1 * (1 - b + b * lengths / max(avgdl, 1e-9))
+
+        postings = defaultdict(lambda: ([], []))
+        for i, tf in enumerate(tfs):
+            for term, freq in tf.items():
+                idf = math.log(1 + (self.n - df[term] + 0.5) / (df[term] + 0.5))
+                docs, weights = postings[term]
+                docs.append(i)
+                weights.append(idf * freq * (k1 + 1) / (freq + norm[i]))
+
+        self.postings = {
+            term: (np.array(docs, dtype="int64"), np.array(weights, dtype="float32"))
+            for term, (docs, weights) in postings.items()
+        }
+        self.normalized_titles = {}
+        for i, title in enumerate(titles):
+            self.normalized_titles.setdefault(" ".join(tokenize(title)), i)
+
+    def search(self, query, k=10):
+        """Top-k (rows, scores), best first; only documents with a match."""
+        scores = np.zeros(self.n, dtype="float32")
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return order, scores[order]
+
+    def exact_title(self, query):
+        """Row whose title equals the query (ignoring case/punctuation), or None."""
+        return self.normalized_titles.get(" ".join(tokenize(query)))
+
+
+class CodeIndex:
+    """O(1) exact NCO_Code lookup plus sorted prefix lookup ("2512." -> all 2512.xxxx)."""
+
+    def __init__(self, codes):
+        self.rows = {}
+        for i, code in enumerate(codes):
+            self.rows.setdefault(normalize_code(code), i)
+        self.sorted_codes = sorted(self.rows)
+
+    def get(self, code):
+        return self.rows.get(normalize_code(code))
+
+    def prefix(self, prefix, limit=10):
+        prefix = normalize_code(prefix)
+        start = bisect.bisect_left(self.sorted_codes, prefix)
+        rows = []
+        for code in self.sorted_codes[start:start + limit]:
+            if not code.startswith(prefix):
+                break
+            rows.append(self.rows[code])
+        return rows
+
+
+class LexicalIndex:
+    def __init__(self, codes, titles, descriptions):
+        self.codes = CodeIndex(codes)
+        self.bm25 = BM25Index(titles, descriptions)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked row lists; returns [(row, score)] best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
@@ -1,19 +1,108 @@
 # llm.py
-import ollama
+import contextvars
 import json
 import re
 
-def ask_llm(system_prompt, user_prompt):
-    response = ollama.chat(
-        model="llama3.1:8b",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+from llm_backends import LLM_ERRORS, LLMTimeout, create_backend
+from llm_cache import LLMCache, cache_key
+
+# Which server answers: LLM_BACKEND=ollama|openai|mock, LLM_MODEL, LLM_HOSTS,
+# LLM_MAX_INFLIGHT (see llm_backends.py), or configure() at runtime
+_backend = create_backend()
+
+
+# Identical prompts (demo mode, regression runs) are answered from here;
+# see llm_cache.py for LLM_CACHE_MODE / LLM_CACHE_PATH
+_cache = LLMCache.from_env()
+
+
+# Token counts / timings of the latest call in this thread or asyncio task
+_last_call = contextvars.ContextVar("llm_last_call", default=None)
+
+
+def _record_call(response=None, model=None):
+    # response is None for a cache hit
+    get = response.get if response is not None else (lambda key: None)
+    _last_call.set({
+        "model": model or _backend.model,
+        "cached": response is None,
+        "prompt_tokens": get("prompt_eval_count") or 0,
+        "completion_tokens": get("eval_count") or 0,
+        "prefill_s": (get("prompt_eval_duration") or 0) / 1e9,
+        "generate_s": (get("eval_duration") or 0) / 1e9,
+        "load_s": (get("load_duration") or 0) / 1e9,
+        "queue_s": get("queue_s") or 0.0,
+    })
+
+
+def last_call_stats():
+    """Model, tokens and prefill/generation/load/queue seconds of the last call."""
+    return dict(_last_call.get() or {})
+
+
+def get_cache():
+    return _cache
+
+
+def set_cache(cache):
+    """Swap the process-wide response cache (e.g. LLMCache(mode="replay"))."""
+    global _cache
+    _cache = cache
+
+
+def get_backend():
+    return _backend
+
+
+def configure(backend=None, model=None, hosts=None, max_inflight=None, **kwargs):
+    """Switch backend/model/hosts; unset arguments keep their current values.
+
+    backend is a name from llm_backends.BACKENDS or an LLMBackend instance.
+    """
+    global _backend
+    if backend is not None and not isinstance(backend, str):
+        _backend = backend
+        return _backend
+    name = backend or _backend.name
+    if hosts is None and name == _backend.name:
+        hosts = _backend.hosts
+    _backend = create_backend(
+        name,
+        model=model or _backend.model,
+        hosts=hosts,
+        max_inflight=max_inflight or _backend.max_inflight,
+        **kwargs
     )
-    
-    content = response["message"]["content"]
-    
+    return _backend
+
+
+def configure_async(hosts=None, max_inflight=None):
+    """Set the async hosts / in-flight cap; applies to loops that start after."""
+    return configure(hosts=list(hosts) if hosts is not None else None,
+                     max_inflight=max_inflight)
+
+
+def _model_id(model=None):
+    model = model or _backend.model
+    if _backend.name == "ollama":
+        return model
+    return f"{_backend.name}:{model}"
+
+
+def _key(system_prompt, user_prompt, options, format, model=None):
+    if format is not None:
+        options = {**(options or {}), "format": format}
+    return cache_key(_model_id(model), options, system_prompt, user_prompt)
+
+
+def _messages(system_prompt, user_prompt):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def extract_json(content):
     # Try to extract JSON if wrapped in code blocks
     if "```" in content:
         json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL)
@@ -28,3 +117,108 @@ def ask_llm(system_prompt, user_prompt):
     
     return content.strip()
 
+
+def ask_llm(system_prompt, user_prompt, options=None, format=None, model=None,
+            timeout=None, keep_alive=None):
+    """model overrides the backend's model for this call; timeout (seconds,
+    whole call) raises LLMTimeout; keep_alive is passed to the server."""
+    key = _key(system_prompt, user_prompt, options, format, model)
+    content = _cache.get(key)
+    if content is None:
+        response = _backend.chat(
+            _messages(system_prompt, user_prompt),
+            options=options,
+            format=format,
+            model=model,
+            timeout=timeout,
+            keep_alive=keep_alive
+        )
+        content = response["content"]
+        _cache.put(key, _model_id(model), content)
+        _record_call(response, model)
+    else:
+        _record_call(None, model)
+    
+    return extract_json(content)
+
+
+def ask_llm_stream(system_prompt, user_prompt, options=None, format=None, model=None,
+                   timeout=None, keep_alive=None):
+    """Yield raw content chunks as the model generates them.
+
+    Join the chunks and pass them through extract_json() for the same
+    result ask_llm() would return. A cached reply arrives as one chunk.
+    """
+    key = _key(system_prompt, user_prompt, options, format, model)
+    content = _cache.get(key)
+    if content is not None:
+        _record_call(None, model)
+        yield content
+        return
+
+    chunks = []
+    for chunk in _backend.stream(
+        _messages(system_prompt, user_prompt),
+        options=options,
+        format=format,
+        model=model,
+        timeout=timeout,
+        keep_alive=keep_alive
+    ):
+        if chunk["done"]:
+            _record_call(chunk, model)
+        text = chunk["content"]
+        if text:
+            chunks.append(text)
+            yield text
+    _cache.put(key, _model_id(model), "".join(chunks))
+
+
+async def ask_llm_async(system_prompt, user_prompt, options=None, format=None, model=None,
+                        timeout=None, keep_alive=None):
+    key = _key(system_prompt, user_prompt, options, format, model)
+    content = _cache.get(key)
+    if content is not None:
+        _record_call(None, model)
+        return extract_json(content)
+
+    response = await _backend.achat(
+        _messages(system_prompt, user_prompt),
+        options=options,
+        format=format,
+        model=model,
+        timeout=timeout,
+        keep_alive=keep_alive
+    )
+    content = response["content"]
+    _cache.put(key, _model_id(model), content)
+    _record_call(response, model)
+    return extract_json(content)
+
+
+async def ask_llm_stream_async(system_prompt, user_prompt, options=None, format=None,
+                               model=None, timeout=None, keep_alive=None):
+    """Async counterpart of ask_llm_stream(); holds a backend slot until done."""
+    key = _key(system_prompt, user_prompt, options, format, model)
+    content = _cache.get(key)
+    if content is not None:
+        _record_call(None, model)
+        yield content
+        return
+
+    chunks = []
+    async for chunk in _backend.astream(
+        _messages(system_prompt, user_prompt),
+        options=options,
+        format=format,
+        model=model,
+        timeout=timeout,
+        keep_alive=keep_alive
+    ):
+        if chunk["done"]:
+            _record_call(chunk, model)
+        text = chunk["content"]
+        if text:
+            chunks.append(text)
+            yield text
+    _cache.put(key, _model_id(model), "".join(chunks))
@@ -0,0 +1,473 @@
+# llm_backends.py
+#
+# Pluggable chat backends for llm.py. Every backend takes the same
+# (messages, options, format) call and returns Ollama-style replies:
+#   {"content": str, "prompt_eval_count": int, "eval_count": int,
+#    "prompt_eval_duration": ns, "eval_duration": ns, "load_duration": ns}
+# (async calls add "queue_s", the time spent waiting for a slot)
+# Streams yield {"content": piece, "done": False} chunks and a final
+# {"content": "", "done": True, **stats}.
+#
+# Selected by environment (or llm.configure()):
+#   LLM_BACKEND       ollama (default) | openai | mock
+#   LLM_MODEL         model name (default llama3.1:8b)
+#   LLM_HOSTS         comma-separated server URLs; calls are spread over them
+#                     (OLLAMA_HOSTS is still honoured for the ollama backend)
+#   LLM_API_KEY       bearer token for OpenAI-compatible servers
+#   LLM_MAX_INFLIGHT  concurrent async generations per server (default 4)
+#
+# chat()/stream() and their async versions also take model= (per-call
+# override), timeout= (seconds for the whole call, LLMTimeout when exceeded)
+# and keep_alive= (how long the server keeps the model loaded afterwards).
+#
+# "openai" is any OpenAI-compatible server (vLLM, llama.cpp server, LM
+# Studio, ...) at e.g. http://127.0.0.1:8000/v1; "mock" is mock_llm_server.py.
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import weakref
+
+import httpx
+import ollama
+
+DEFAULT_MODEL = "llama3.1:8b"
+MOCK_URL = "http://127.0.0.1:11435"
+OPENAI_URL = "http://127.0.0.1:8000/v1"
+
+
+class LLMTimeout(TimeoutError):
+    """A call that did not finish within its timeout."""
+
+
+# What a failed call raises, for callers that fall back to another model
+LLM_ERRORS = (LLMTimeout, ConnectionError, httpx.HTTPError, ollama.ResponseError)
+
+
+def _env_hosts(*names):
+    for name in names:
+        hosts = [h.strip() for h in os.environ.get(name, "").split(",") if h.strip()]
+        if hosts:
+            return hosts
+    return None
+
+
+# httpx's connection pool scans every connection on each request, which
+# gets CPU-bound at high concurrency, so large in-flight caps are split over
+# several smaller clients
+CONNECTIONS_PER_CLIENT = 16
+
+
+class _AsyncSlot:
+    """One server in one event loop: pooled keep-alive clients and an in-flight cap."""
+
+    def __init__(self, clients, max_inflight):
+        self.clients = clients
+        self._next = itertools.cycle(clients)
+        self.semaphore = asyncio.Semaphore(max_inflight)
+        self.waiting = 0   # queued + running, for least-loaded selection
+
+    @property
+    def client(self):
+        return next(self._next)
+
+
+class LLMBackend:
+    name = ""
+    default_hosts = [None]
+
+    def __init__(self, model=None, hosts=None, max_inflight=4, **client_options):
+        self.model = model or DEFAULT_MODEL
+        self.hosts = list(hosts or self.default_hosts)
+        self.max_inflight = max_inflight
+        self.client_options = client_options
+        self._clients = {}
+        self._next_host = itertools.cycle(range(len(self.hosts)))
+        self._lock = threading.Lock()
+        # httpx async clients and semaphores are bound to the loop that
+        # created them, so each event loop gets its own set (the cap
+        # therefore applies per loop)
+        self._slots = weakref.WeakKeyDictionary()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(model={self.model!r}, hosts={self.hosts!r})"
+
+    # -- implemented by subclasses; request holds model, messages, options,
+    #    format and keep_alive --
+    def _make_client(self, host, timeout=None):
+        raise NotImplementedError
+
+    def _make_async_client(self, host):
+        raise NotImplementedError
+
+    def _chat(self, client, request):
+        raise NotImplementedError
+
+    def _stream(self, client, request):
+        raise NotImplementedError
+
+    async def _achat(self, client, request):
+        raise NotImplementedError
+
+    async def _astream(self, client, request):
+        raise NotImplementedError
+        yield
+
+    def warm(self, model=None, keep_alive=None):
+        """Load model on every host ahead of use; False if the backend can't."""
+        return False
+
+    def _request(self, messages, options, format, model, keep_alive):
+        return {"model": model or self.model, "messages": messages, "options": options,
+                "format": format, "keep_alive": keep_alive}
+
+    # -- sync: round-robin over hosts --
+    def _client(self, timeout=None):
+        with self._lock:
+            host = self.hosts[next(self._next_host)]
+        return self._host_client(host, timeout)
+
+    def _host_client(self, host, timeout=None):
+        with self._lock:
+            client = self._clients.get((host, timeout))
+            if client is None:
+                client = self._clients[host, timeout] = self._make_client(host, timeout)
+        return client
+
+    def chat(self, messages, options=None, format=None, model=None, timeout=None,
+             keep_alive=None):
+        request = self._request(messages, options, format, model, keep_alive)
+        if timeout is None:
+            return self._chat(self._client(), request)
+        # Streamed under the hood so the deadline can be checked as it runs
+        pieces = []
+        for chunk in self._deadline_stream(request, timeout):
+            pieces.append(chunk["content"])
+            if chunk["done"]:
+                return {**chunk, "content": "".join(pieces)}
+
+    def stream(self, messages, options=None, format=None, model=None, timeout=None,
+               keep_alive=None):
+        request = self._request(messages, options, format, model, keep_alive)
+        if timeout is None:
+            return self._stream(self._client(), request)
+        return self._deadline_stream(request, timeout)
+
+    def _deadline_stream(self, request, timeout):
+        # The clients fix their read timeout per request, so a chunk that
+        # stalls near the deadline could hold the caller for another full
+        # timeout; the stream is read on a thread instead and each chunk is
+        # waited for with only the time that is left
+        deadline = time.monotonic() + timeout
+        chunks = queue.Queue()
+        stop = threading.Event()
+
+        def pump():
+            stream = self._stream(self._client(timeout), request)
+            try:
+                for chunk in stream:
+                    if stop.is_set():
+                        return
+                    chunks.put((chunk, None))
+                chunks.put((None, None))
+            except Exception as e:
+                chunks.put((None, e))
+            finally:
+                # Closing the response drops the connection, which stops generation
+                stream.close()
+
+        threading.Thread(target=pump, name="llm-stream", daemon=True).start()
+        try:
+            while True:
+                try:
+                    chunk, error = chunks.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    raise LLMTimeout(f"{request['model']} exceeded {timeout}s") from None
+                if isinstance(error, httpx.TimeoutException):
+                    raise LLMTimeout(f"{request['model']} exceeded {timeout}s") from None
+                if error is not None:
+                    raise error
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            stop.set()
+
+    # -- async: least-loaded host, capped in-flight per host --
+    def _pick_slot(self):
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            shards = -(-self.max_inflight // CONNECTIONS_PER_CLIENT)
+            slots = [
+                _AsyncSlot([self._make_async_client(host) for _ in range(shards)],
+                           self.max_inflight)
+                for host in self.hosts
+            ]
+            self._slots[loop] = slots
+        return min(slots, key=lambda s: s.waiting)
+
+    async def achat(self, messages, options=None, format=None, model=None, timeout=None,
+                    keep_alive=None):
+        """The timeout includes time spent queued for a slot."""
+        request = self._request(messages, options, format, model, keep_alive)
+        if timeout is None:
+            return await self._achat_slot(request)
+        try:
+            return await asyncio.wait_for(self._achat_slot(request), timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeout(f"{request['model']} exceeded {timeout}s") from None
+
+    async def _achat_slot(self, request):
+        slot = self._pick_slot()
+        slot.waiting += 1
+        queued = time.perf_counter()
+        try:
+            async with slot.semaphore:
+                queue_s = time.perf_counter() - queued
+                return {**await self._achat(slot.client, request), "queue_s": queue_s}
+        finally:
+            slot.waiting -= 1
+
+    async def astream(self, messages, options=None, format=None, model=None, timeout=None,
+                      keep_alive=None):
+        """Holds a slot until the stream is finished."""
+        request = self._request(messages, options, format, model, keep_alive)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stream = self._astream_slot(request)
+        try:
+            while True:
+                try:
+                    if deadline is None:
+                        chunk = await stream.__anext__()
+                    else:
+                        chunk = await asyncio.wait_for(
+                            stream.__anext__(), max(deadline - time.monotonic(), 0)
+                        )
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise LLMTimeout(f"{request['model']} exceeded {timeout}s") from None
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _astream_slot(self, request):
+        slot = self._pick_slot()
+        slot.waiting += 1
+        queued = time.perf_counter()
+        try:
+            async with slot.semaphore:
+                queue_s = time.perf_counter() - queued
+                async for chunk in self._astream(slot.client, request):
+                    yield {**chunk, "queue_s": queue_s} if chunk["done"] else chunk
+        finally:
+            slot.waiting -= 1
+
+    def _limits(self):
+        per_client = min(self.max_inflight, CONNECTIONS_PER_CLIENT)
+        return httpx.Limits(max_connections=per_client,
+                            max_keepalive_connections=per_client)
+
+
+# -----------------------------
+# Ollama
+# -----------------------------
+_OLLAMA_STATS = ("prompt_eval_count", "eval_count", "prompt_eval_duration", "eval_duration",
+                 "load_duration")
+
+
+def _ollama_reply(response, content=None):
+    reply = {k: response.get(k) or 0 for k in _OLLAMA_STATS}
+    reply["content"] = response["message"]["content"] if content is None else content
+    return reply
+
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def _make_client(self, host, timeout=None):
+        return ollama.Client(host=host, timeout=timeout, **self.client_options)
+
+    def _make_async_client(self, host):
+        return ollama.AsyncClient(host=host, limits=self._limits(), **self.client_options)
+
+    def warm(self, model=None, keep_alive=None):
+        # A chat request without messages only loads the model
+        for host in self.hosts:
+            self._host_client(host).chat(model=model or self.model, keep_alive=keep_alive)
+        return True
+
+    def _chat(self, client, request):
+        return _ollama_reply(client.chat(**request))
+
+    def _stream(self, client, request):
+        for chunk in client.chat(**request, stream=True):
+            if chunk.get("done"):
+                yield {**_ollama_reply(chunk), "done": True}
+            else:
+                yield {"content": chunk["message"]["content"], "done": False}
+
+    async def _achat(self, client, request):
+        return _ollama_reply(await client.chat(**request))
+
+    async def _astream(self, client, request):
+        async for chunk in await client.chat(**request, stream=True):
+            if chunk.get("done"):
+                yield {**_ollama_reply(chunk), "done": True}
+            else:
+                yield {"content": chunk["message"]["content"], "done": False}
+
+
+class MockBackend(OllamaBackend):
+    """Ollama protocol against mock_llm_server.py (no model, no GPU)."""
+
+    name = "mock"
+    default_hosts = [MOCK_URL]
+
+
+# -----------------------------
+# OpenAI-compatible
+# -----------------------------
+# Ollama option names -> OpenAI request fields
+_OPENAI_OPTIONS = {
+    "temperature": "temperature", "top_p": "top_p", "seed": "seed",
+    "num_predict": "max_tokens", "stop": "stop",
+}
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+    default_hosts = [OPENAI_URL]
+
+    def __init__(self, model=None, hosts=None, max_inflight=4, api_key=None,
+                 timeout=120, **client_options):
+        super().__init__(model, hosts, max_inflight, **client_options)
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def _make_client(self, host, timeout=None):
+        return httpx.Client(base_url=host.rstrip("/"), headers=self._headers(),
+                            timeout=timeout or self.timeout, **self.client_options)
+
+    def _make_async_client(self, host):
+        return httpx.AsyncClient(base_url=host.rstrip("/"), headers=self._headers(),
+                                 timeout=self.timeout, limits=self._limits(),
+                                 **self.client_options)
+
+    def _body(self, request, stream):
+        # keep_alive has no OpenAI equivalent; such servers keep models loaded
+        format = request["format"]
+        body = {"model": request["model"], "messages": request["messages"], "stream": stream}
+        for key, value in (request["options"] or {}).items():
+            if key in _OPENAI_OPTIONS:
+                body[_OPENAI_OPTIONS[key]] = value
+        if format == "json":
+            body["response_format"] = {"type": "json_object"}
+        elif format:
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "reply", "schema": format},
+            }
+        if stream:
+            body["stream_options"] = {"include_usage": True}
+        return body
+
+    @staticmethod
+    def _stats(usage):
+        usage = usage or {}
+        # OpenAI-compatible servers report token counts but not timings
+        return {
+            "prompt_eval_count": usage.get("prompt_tokens") or 0,
+            "eval_count": usage.get("completion_tokens") or 0,
+            "prompt_eval_duration": 0,
+            "eval_duration": 0,
+        }
+
+    def _reply(self, data):
+        content = data["choices"][0]["message"].get("content") or ""
+        return {"content": content, **self._stats(data.get("usage"))}
+
+    @staticmethod
+    def _event(line):
+        """One server-sent event line -> (text pieces, usage or None, finished)."""
+        if not line.startswith("data:"):
+            return [], None, False
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return [], None, True
+        data = json.loads(payload)
+        pieces = [
+            (choice.get("delta") or {}).get("content")
+            for choice in data.get("choices") or []
+        ]
+        return [p for p in pieces if p], data.get("usage"), False
+
+    def _events(self, lines):
+        usage = None
+        for line in lines:
+            pieces, line_usage, finished = self._event(line)
+            if finished:
+                break
+            usage = line_usage or usage
+            for piece in pieces:
+                yield {"content": piece, "done": False}
+        yield {"content": "", "done": True, **self._stats(usage)}
+
+    def _chat(self, client, request):
+        resp = client.post("/chat/completions", json=self._body(request, False))
+        resp.raise_for_status()
+        return self._reply(resp.json())
+
+    def _stream(self, client, request):
+        with client.stream("POST", "/chat/completions",
+                           json=self._body(request, True)) as resp:
+            resp.raise_for_status()
+            yield from self._events(resp.iter_lines())
+
+    async def _achat(self, client, request):
+        resp = await client.post("/chat/completions", json=self._body(request, False))
+        resp.raise_for_status()
+        return self._reply(resp.json())
+
+    async def _astream(self, client, request):
+        async with client.stream("POST", "/chat/completions",
+                                 json=self._body(request, True)) as resp:
+            resp.raise_for_status()
+            usage = None
+            async for line in resp.aiter_lines():
+                pieces, line_usage, finished = self._event(line)
+                if finished:
+                    break
+                usage = line_usage or usage
+                for piece in pieces:
+                    yield {"content": piece, "done": False}
+        yield {"content": "", "done": True, **self._stats(usage)}
+
+
+BACKENDS = {
+    "ollama": OllamaBackend,
+    "openai": OpenAIBackend,
+    "mock": MockBackend,
+}
+
+
+def create_backend(name=None, model=None, hosts=None, max_inflight=None, **kwargs):
+    """Backend by name; unset arguments come from the LLM_* environment."""
+    name = name or os.environ.get("LLM_BACKEND", "ollama")
+    if name not in BACKENDS:
+        raise ValueError(f"unknown LLM backend {name!r}; expected one of {sorted(BACKENDS)}")
+    if hosts is None:
+        hosts = _env_hosts("LLM_HOSTS", "OLLAMA_HOSTS" if name == "ollama" else "LLM_HOSTS")
+    if max_inflight is None:
+        max_inflight = int(os.environ.get("LLM_MAX_INFLIGHT", "4"))
+    model = model or os.environ.get("LLM_MODEL") or None
+    if name == "openai":
+        kwargs.setdefault("api_key", os.environ.get("LLM_API_KEY") or None)
+    return BACKENDS[name](model=model, hosts=hosts, max_inflight=max_inflight, **kwargs)
@@ -0,0 +1,215 @@
+# llm_cache.py
+#
+# Content-addressed cache of raw LLM replies, keyed by model, options,
+# system prompt and user prompt. An in-memory LRU sits in front of an
+# optional SQLite file that is trimmed (least recently used first) once it
+# grows past max_bytes.
+#
+# llm.py reads its configuration from the environment:
+#   LLM_CACHE_MODE  on (default) | off | replay   replay: a miss is an error
+#   LLM_CACHE_PATH  SQLite file for the persistent tier (unset: memory only)
+#   LLM_CACHE_MAX_MB  size cap of the SQLite tier (default 64)
+#
+#   python llm_cache.py stats --path llm_cache.sqlite
+#   python llm_cache.py clear --path llm_cache.sqlite
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MODES = ("on", "off", "replay")
+
+
+class LLMCacheMiss(KeyError):
+    """Raised in replay mode when a prompt has no recorded reply."""
+
+
+def cache_key(model, options, system_prompt, user_prompt):
+    payload = json.dumps(
+        [model, options or {}, system_prompt, user_prompt],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _SQLiteStore:
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS replies ("
+            " key TEXT PRIMARY KEY, model TEXT, reply TEXT,"
+            " size INTEGER, created REAL, last_used REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS replies_last_used ON replies(last_used)"
+        )
+        self.total = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM replies"
+        ).fetchone()[0]
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT reply FROM replies WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            "UPDATE replies SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        return row[0]
+
+    def put(self, key, model, reply):
+        size = len(reply.encode("utf-8")) + len(key)
+        now = time.time()
+        old = self.conn.execute(
+            "SELECT size FROM replies WHERE key = ?", (key,)
+        ).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO replies VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, reply, size, now, now)
+        )
+        self.total += size - (old[0] if old else 0)
+        return self._trim()
+
+    def _trim(self):
+        evicted = 0
+        while self.total > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT key, size FROM replies ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM replies WHERE key = ?", (key,))
+                self.total -= size
+                evicted += 1
+        return evicted
+
+    def stats(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+        return {"entries": count, "bytes": self.total, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        self.conn.execute("DELETE FROM replies")
+        self.conn.execute("VACUUM")
+        self.total = 0
+
+
+class LLMCache:
+    """LRU of raw replies, optionally backed by a size-capped SQLite file.
+
+    mode "on" reads and records, "off" bypasses the cache, and "replay"
+    only reads: a miss raises LLMCacheMiss, so recorded runs need no LLM.
+    """
+
+    def __init__(self, maxsize=512, path=None, max_bytes=64 * 1024 * 1024,
+                 mode="on"):
+        if mode not in MODES:
+            raise ValueError(f"unknown cache mode {mode!r}; expected one of {MODES}")
+        self.maxsize = maxsize
+        self.mode = mode
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _SQLiteStore(path, max_bytes) if path else None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.environ.get("LLM_CACHE_PATH") or None,
+            max_bytes=int(float(os.environ.get("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            mode=os.environ.get("LLM_CACHE_MODE", "on"),
+        )
+
+    def stats(self):
+        stats = {
+            "mode": self.mode,
+            "size": len(self._lru),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+        if self._disk:
+            with self._lock:
+                stats["disk"] = self._disk.stats()
+        return stats
+
+    def _remember(self, key, reply):
+        self._lru[key] = reply
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """Cached reply or None; in replay mode a miss raises LLMCacheMiss."""
+        if self.mode == "off":
+            return None
+        with self._lock:
+            reply = self._lru.get(key)
+            if reply is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return reply
+            reply = self._disk.get(key) if self._disk else None
+            if reply is not None:
+                self.disk_hits += 1
+                self._remember(key, reply)
+                return reply
+            self.misses += 1
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"no recorded LLM reply for prompt {key[:16]}")
+        return None
+
+    def put(self, key, model, reply):
+        if self.mode != "on":
+            return
+        with self._lock:
+            self._remember(key, reply)
+            if self._disk:
+                self.disk_evictions += self._disk.put(key, model, reply)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            if self._disk:
+                self._disk.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", default=os.environ.get("LLM_CACHE_PATH"))
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("pass --path or set LLM_CACHE_PATH")
+
+    cache = LLMCache(path=args.path)
+    if args.command == "clear":
+        cache.clear()
+    print(json.dumps(cache.stats()["disk"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
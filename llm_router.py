@@ -0,0 +1,172 @@
+# llm_router.py
+#
+# Per-step model routing for the interview agent. Each step (decide,
+# evaluate, turn, follow_up) has a primary model, a latency budget and
+# fallbacks: when the primary does not answer within its timeout the next
+# model is tried, and when every model is over budget the agent answers
+# from its bank (see InterviewAgent._banked). Steps without a route use the
+# backend's model with no timeout, i.e. the previous behaviour.
+#
+# LLM_ROUTES is JSON, inline or a path to a .json file:
+#   {"decide":   {"model": "llama3.1:8b", "timeout": 20, "fallback": ["llama3.2:3b"]},
+#    "evaluate": {"model": "llama3.2:3b", "timeout": 8,
+#                 "fallback": [{"model": "qwen2.5:1.5b", "timeout": 4}]}}
+# A fallback without its own timeout gets the route's.
+#
+# Routed models are kept loaded: every call passes keep_alive
+# (LLM_KEEP_ALIVE, default 30m), warm() loads them up front, and
+# start_keepalive() re-warms models idle for longer than half of it.
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from llm import get_backend
+
+
+def _seconds(keep_alive):
+    # "30m" / "2h" / "45s" / number of seconds
+    if isinstance(keep_alive, (int, float)):
+        return float(keep_alive)
+    text = str(keep_alive).strip()
+    scale = {"s": 1, "m": 60, "h": 3600}.get(text[-1:], None)
+    return float(text[:-1]) * scale if scale else float(text)
+
+
+@dataclass
+class Route:
+    model: str
+    timeout: Optional[float] = None
+    fallback: list = field(default_factory=list)   # [(model, timeout or None)]
+
+    def chain(self):
+        """(model, timeout) in the order they are tried."""
+        return [(self.model, self.timeout)] + [
+            (model, timeout if timeout is not None else self.timeout)
+            for model, timeout in self.fallback
+        ]
+
+    @classmethod
+    def from_dict(cls, data):
+        fallback = []
+        for entry in data.get("fallback", []):
+            if isinstance(entry, str):
+                fallback.append((entry, None))
+            else:
+                fallback.append((entry["model"], entry.get("timeout")))
+        return cls(data["model"], data.get("timeout"), fallback)
+
+
+class ModelRouter:
+    def __init__(self, routes=None, keep_alive="30m"):
+        self.routes = dict(routes or {})
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self._last_used = {}            # model -> monotonic time of last call
+        self._served = {}               # step -> Counter(model or "bank")
+        self._failed = Counter()        # model -> calls over budget or failed
+        self._keepalive_thread = None
+
+    @classmethod
+    def from_env(cls):
+        spec = os.environ.get("LLM_ROUTES", "").strip()
+        routes = {}
+        if spec:
+            if not spec.startswith("{"):
+                with open(spec, encoding="utf-8") as f:
+                    spec = f.read()
+            routes = {step: Route.from_dict(r) for step, r in json.loads(spec).items()}
+        return cls(routes, os.environ.get("LLM_KEEP_ALIVE", "30m"))
+
+    def route(self, step):
+        # Repairs go to the same models as the step they repair
+        step = step[:-len("_repair")] if step.endswith("_repair") else step
+        route = self.routes.get(step)
+        return route if route is not None else Route(get_backend().model)
+
+    def models(self):
+        models = {get_backend().model}
+        for route in self.routes.values():
+            models.update(model for model, _ in route.chain())
+        return sorted(models)
+
+    # -----------------------------
+    # Bookkeeping
+    # -----------------------------
+    def record(self, step, model, failed=False):
+        """One attempt of step on model; model is "bank" when none answered."""
+        with self._lock:
+            if failed:
+                self._failed[model] += 1
+                return
+            self._served.setdefault(step, Counter())[model] += 1
+            if model != "bank":
+                self._last_used[model] = time.monotonic()
+
+    def report(self):
+        """{"served": {step: {model: calls}}, "failed": {model: calls}}."""
+        with self._lock:
+            return {
+                "served": {step: dict(c) for step, c in self._served.items()},
+                "failed": dict(self._failed),
+            }
+
+    # -----------------------------
+    # Keep-alive
+    # -----------------------------
+    def warm(self, models=None):
+        """Load models on the backend now; seconds taken per model."""
+        backend = get_backend()
+        took = {}
+        for model in models or self.models():
+            start = time.perf_counter()
+            try:
+                if not backend.warm(model, keep_alive=self.keep_alive):
+                    continue
+            except Exception:
+                continue
+            took[model] = time.perf_counter() - start
+            with self._lock:
+                self._last_used[model] = time.monotonic()
+        return took
+
+    def start_keepalive(self, interval=None):
+        """Background thread re-warming models idle for half the keep-alive."""
+        if self._keepalive_thread is not None:
+            return
+        interval = interval or _seconds(self.keep_alive) / 2
+        if interval <= 0:
+            # keep_alive < 0: the server never unloads; just load once
+            self.warm()
+            return
+
+        def run():
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    idle = [m for m in self.models()
+                            if now - self._last_used.get(m, float("-inf")) >= interval]
+                if idle:
+                    self.warm(idle)
+                time.sleep(min(interval, 60))
+
+        self._keepalive_thread = threading.Thread(
+            target=run, name="llm-keepalive", daemon=True
+        )
+        self._keepalive_thread.start()
+
+
+_router = ModelRouter.from_env()
+
+
+def get_router():
+    return _router
+
+
+def set_router(router):
+    """Swap the process-wide router (e.g. ModelRouter({"evaluate": Route(...)}))."""
+    global _router
+    _router = router
@@ -1,25 +1,45 @@
 # main.py
-from resume_parser import extract_skills
-from faiss_search import NCOSemanticSearch
+#
+#   python main.py [resume.txt | resume.pdf | resume.docx]
+import os
+import sys
+
+from resume_parser import extract_skills, read_resume
+from faiss_search import get_searcher
 from agent import InterviewAgent
+from llm_router import get_router
+from metrics import serve_from_env
 
 # Load resume
-resume_text = open("resumes/resume1.txt").read()
+resume_text = read_resume(sys.argv[1] if len(sys.argv) > 1 else "resumes/resume1.txt")
 resume_skills = extract_skills(resume_text)
 
 # Semantic job search
-searcher = NCOSemanticSearch()
-job_matches = searcher.search("software engineer", k=1)
+searcher = get_searcher()
+# Match on the resume's skills; fall back to a generic role if none were found
+job_matches = (
+    searcher.match_resume(resume_skills, k=1)
+    or searcher.search("software engineer", k=1)
+)
 
 top_job = job_matches[0]
 
 print("\nTop matched job:")
 print(top_job)
 
+# Load the routed models while the job match is shown
+get_router().start_keepalive()
+
+# GET /metrics when NCO_METRICS_PORT is set
+serve_from_env()
+
 # Initialize agent
 agent = InterviewAgent(
     job_info=top_job,
-    resume_skills=resume_skills
+    resume_skills=resume_skills,
+    # NCO_SPECULATIVE=1: prepare the next question while the answer is typed
+    speculative=os.environ.get("NCO_SPECULATIVE") == "1",
+    fused=os.environ.get("NCO_FUSED_TURN") == "1"
 )
 
 # Start interview
@@ -30,14 +50,19 @@ while decision["action"] != "stop":
 
     answer = input("Your answer: ")
 
-    # Evaluate answer
-    evaluation = agent.evaluate_answer(answer)
+    # Evaluate answer and decide next step
+    served = len(agent.served)
+    evaluation, decision = agent.take_turn(answer)
 
     print("\nScore:", evaluation["score"])
     print("Level:", evaluation["level"])
     print("Feedback:", evaluation["reason"])
+    print("Served by:", ", ".join(f"{step}={model}" for step, model in agent.served[served:]))
 
-    # Decide next step
-    decision = agent.next_step_after_evaluation(evaluation)
+print("\nInterview complete.")
 
-print("\nInterview complete.")
\ No newline at end of file
+spec = agent.speculation_report()
+print(f"Prepared questions used: {spec['hits']}/{spec['turns']} turns "
+      f"(hit rate {spec['hit_rate']:.0%}, {spec['saved_s']:.1f}s saved)")
+for step, models in agent.routing_report().items():
+    print(f"{step}: " + ", ".join(f"{model} x{n}" for model, n in models.items()))
\ No newline at end of file
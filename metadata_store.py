@@ -0,0 +1,187 @@
+# metadata_store.py
+#
+# Compact columnar copy of index_df_canonical.csv for memory-mapped lookups.
+#
+# Layout (little endian):
+#   8 bytes   magic  b"NCOMETA1"
+#   uint64    header length
+#   header    JSON {"rows": n, "columns": {name: [offsets_pos, blob_pos, blob_len]},
+#                   "int_columns": {name: pos}}
+#   per string column, 8-byte aligned:
+#     uint64[n + 1]  byte offsets of each value inside the blob
+#     bytes          UTF-8 blob of all values concatenated
+#   per int column, 8-byte aligned:
+#     int64[n]
+#
+# The file is opened with mmap, so every worker process shares the same pages
+# through the page cache and startup does no parsing at all.
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+MAGIC = b"NCOMETA1"
+COLUMNS = ("NCO_Code", "Title", "Description")
+INT_COLUMNS = ("faiss_id",)    # written by build_pipeline.py, optional
+
+
+def _align(pos):
+    return (pos + 7) & ~7
+
+
+def build_metadata_store(csv_path, out_path, columns=COLUMNS):
+    """Convert the canonical CSV into the columnar format (atomic write)."""
+    values = {name: [] for name in columns}
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        int_columns = [name for name in INT_COLUMNS if name in fields]
+        ints = {name: [] for name in int_columns}
+        for row in reader:
+            for name in columns:
+                values[name].append((row.get(name) or "").encode("utf-8"))
+            for name in int_columns:
+                ints[name].append(int(row[name]))
+
+    n = len(values[columns[0]]) if columns else 0
+    sections = {}
+    for name in columns:
+        blobs = values[name]
+        offsets = np.zeros(n + 1, dtype="<u8")
+        if n:
+            np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        sections[name] = (offsets.tobytes(), b"".join(blobs))
+    int_sections = {
+        name: np.asarray(ints[name], dtype="<i8").tobytes() for name in int_columns
+    }
+
+    # Header positions depend on the header length, so size it first
+    layout = {}
+    int_layout = {}
+    header = b""
+    while True:
+        pos = _align(len(MAGIC) + 8 + len(header))
+        for name in columns:
+            offsets, blob = sections[name]
+            layout[name] = [pos, pos + len(offsets), len(blob)]
+            pos = _align(pos + len(offsets) + len(blob))
+        for name in int_columns:
+            int_layout[name] = pos
+            pos = _align(pos + len(int_sections[name]))
+        sized = json.dumps(
+            {"rows": n, "columns": layout, "int_columns": int_layout}
+        ).encode("utf-8")
+        if len(sized) == len(header):
+            header = sized
+            break
+        header = sized
+
+    # A unique temp file per build, so processes that find the store stale
+    # at the same time never write into each other's file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out_path) or ".",
+                               prefix=os.path.basename(out_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for name in columns:
+                offsets, blob = sections[name]
+                f.write(b"\0" * (layout[name][0] - f.tell()))
+                f.write(offsets)
+                f.write(blob)
+            for name in int_columns:
+                f.write(b"\0" * (int_layout[name] - f.tell()))
+                f.write(int_sections[name])
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)  # mkstemp creates it owner-only
+        os.replace(tmp, out_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return out_path
+
+
+class StringColumn:
+    """Read-only string column backed by an mmapped offsets array and blob."""
+
+    def __init__(self, buf, rows, offsets_pos, blob_pos, blob_len):
+        self._offsets = np.frombuffer(buf, dtype="<u8", count=rows + 1, offset=offsets_pos)
+        self._blob = memoryview(buf)[blob_pos:blob_pos + blob_len]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _value(self, i):
+        return str(self._blob[int(self._offsets[i]):int(self._offsets[i + 1])], "utf-8")
+
+    def __getitem__(self, i):
+        if isinstance(i, np.ndarray):
+            flat = i.ravel()
+            starts = self._offsets[flat].tolist()
+            ends = self._offsets[flat + 1].tolist()
+            blob = self._blob
+            out = np.empty(len(flat), dtype=object)
+            out[:] = [str(blob[s:e], "utf-8") for s, e in zip(starts, ends)]
+            return out.reshape(i.shape)
+        if i < 0:
+            i += len(self)
+        return self._value(i)
+
+    def tolist(self):
+        return self[np.arange(len(self))].tolist()
+
+
+class MetadataStore:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an NCO metadata store")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mmap[start:start + header_len])
+
+        self.rows = header["rows"]
+        self.columns = {
+            name: StringColumn(self._mmap, self.rows, *layout)
+            for name, layout in header["columns"].items()
+        }
+        for name, pos in header.get("int_columns", {}).items():
+            self.columns[name] = np.frombuffer(
+                self._mmap, dtype="<i8", count=self.rows, offset=pos
+            )
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def get(self, name, default=None):
+        return self.columns.get(name, default)
+
+
+def open_metadata_store(csv_path, store_path=None):
+    """Open the store next to csv_path, (re)building it if missing or stale."""
+    store_path = store_path or os.path.splitext(csv_path)[0] + ".meta"
+    if (not os.path.exists(store_path)
+            or os.path.getmtime(store_path) < os.path.getmtime(csv_path)):
+        build_metadata_store(csv_path, store_path)
+    return MetadataStore(store_path)
+
+
+if __name__ == "__main__":
+    # python metadata_store.py faiss_assets/index_df_canonical.csv [out_path]
+    src = sys.argv[1] if len(sys.argv) > 1 else "faiss_assets/index_df_canonical.csv"
+    out = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + ".meta"
+    build_metadata_store(src, out)
+    print(f"{len(MetadataStore(out))} rows -> {out}")
@@ -0,0 +1,323 @@
+# metrics.py
+#
+# Where interview time goes: every LLM call and every InterviewAgent step is
+# recorded here, aggregated into Prometheus-style histograms/counters labelled
+# by operation (decide / evaluate / follow_up / turn) and model, and
+# optionally appended to a JSONL log, one event per line.
+#
+#   NCO_METRICS_PORT=9464   serve GET /metrics (Prometheus text format)
+#   NCO_METRICS_HOST        bind address (default 127.0.0.1; 0.0.0.0 for a remote scraper)
+#   NCO_METRICS_LOG=path    append {"event": "llm_call" | "step", ...} lines
+#
+#   python metrics.py summary metrics.jsonl   # percentiles from a log
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKENS_PER_S_BUCKETS = (1, 5, 10, 20, 30, 40, 60, 80, 120, 200, 500, 1000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(f"{self.name}{_labels(self.label_names, key)}", value)
+                    for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        with self._lock:
+            return {key: value for key, value in self._values.items()}
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}    # labels -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            else:
+                row[len(self.buckets)] += 1
+            row[-1] += value
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            items = sorted((key, list(row)) for key, row in self._values.items())
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append((f"{self.name}_bucket"
+                              f"{_labels(self.label_names, key, [('le', le)])}", cumulative))
+            lines.append((f"{self.name}_sum{_labels(self.label_names, key)}", row[-1]))
+            lines.append((f"{self.name}_count{_labels(self.label_names, key)}", cumulative))
+        return lines
+
+    def snapshot(self):
+        """{labels: (count, sum)}."""
+        with self._lock:
+            return {key: (sum(row[:-1]), row[-1]) for key, row in self._values.items()}
+
+
+class Metrics:
+    """The process-wide set of instruments, plus the optional JSONL log."""
+
+    def __init__(self, log_path=None):
+        op_model = ("operation", "model")
+        self.call_seconds = Histogram(
+            "nco_llm_call_seconds", "Wall time of one LLM call.",
+            ("operation", "model", "outcome"))
+        self.queue_seconds = Histogram(
+            "nco_llm_queue_seconds", "Time an async call waited for a backend slot.", op_model)
+        self.prefill_seconds = Histogram(
+            "nco_llm_prefill_seconds", "Prompt evaluation time reported by the backend.", op_model)
+        self.generate_seconds = Histogram(
+            "nco_llm_generate_seconds", "Generation time reported by the backend.", op_model)
+        self.load_seconds = Histogram(
+            "nco_llm_load_seconds", "Model load time reported by the backend.", ("model",))
+        self.tokens_per_second = Histogram(
+            "nco_llm_tokens_per_second", "Generation speed of one call.", op_model,
+            TOKENS_PER_S_BUCKETS)
+        self.prompt_tokens = Counter(
+            "nco_llm_prompt_tokens_total", "Prompt tokens evaluated.", op_model)
+        self.completion_tokens = Counter(
+            "nco_llm_completion_tokens_total", "Tokens generated.", op_model)
+        self.retries = Counter(
+            "nco_llm_retries_total", "Extra calls: repairs and fallbacks to another model.",
+            ("operation", "reason"))
+        self.step_seconds = Histogram(
+            "nco_agent_step_seconds", "Wall time of one InterviewAgent step, LLM calls included.",
+            ("operation",))
+        self.instruments = [
+            self.call_seconds, self.queue_seconds, self.prefill_seconds,
+            self.generate_seconds, self.load_seconds, self.tokens_per_second,
+            self.prompt_tokens, self.completion_tokens, self.retries, self.step_seconds,
+        ]
+        self._log = None
+        self._log_lock = threading.Lock()
+        if log_path:
+            self.set_log(log_path)
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get("NCO_METRICS_LOG") or None)
+
+    def set_log(self, path):
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = open(path, "a", encoding="utf-8", buffering=1) if path else None
+
+    def _write(self, event):
+        if self._log is None:
+            return
+        line = json.dumps(event, default=str)
+        with self._log_lock:
+            if self._log is not None:
+                self._log.write(line + "\n")
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def record_call(self, timing, speculative=False):
+        """One LLM call, from an agent timing dict (step, model, total_s,
+        error and the llm.last_call_stats() fields)."""
+        operation = operation_of(timing["step"])
+        model = timing.get("model") or ""
+        if timing.get("error"):
+            outcome = timing["error"] if timing["error"] == "timeout" else "error"
+        else:
+            outcome = "cached" if timing.get("cached") else "ok"
+        self.call_seconds.observe(timing["total_s"], operation=operation, model=model,
+                                  outcome=outcome)
+
+        tokens_per_s = None
+        if outcome == "ok":
+            self.queue_seconds.observe(timing.get("queue_s", 0.0), operation=operation,
+                                       model=model)
+            self.prefill_seconds.observe(timing.get("prefill_s", 0.0), operation=operation,
+                                         model=model)
+            self.generate_seconds.observe(timing.get("generate_s", 0.0), operation=operation,
+                                          model=model)
+            if timing.get("load_s"):
+                self.load_seconds.observe(timing["load_s"], model=model)
+            self.prompt_tokens.inc(timing.get("prompt_tokens", 0), operation=operation,
+                                   model=model)
+            self.completion_tokens.inc(timing.get("completion_tokens", 0),
+                                       operation=operation, model=model)
+            if timing.get("generate_s") and timing.get("completion_tokens"):
+                tokens_per_s = timing["completion_tokens"] / timing["generate_s"]
+                self.tokens_per_second.observe(tokens_per_s, operation=operation, model=model)
+
+        self._write({
+            "event": "llm_call", "ts": time.time(), "operation": operation,
+            "step": timing["step"], "model": model, "outcome": outcome,
+            "speculative": speculative, "wall_s": timing["total_s"],
+            "first_token_s": timing.get("first_token_s"),
+            "queue_s": timing.get("queue_s"), "load_s": timing.get("load_s"),
+            "prefill_s": timing.get("prefill_s"), "generate_s": timing.get("generate_s"),
+            "prompt_tokens": timing.get("prompt_tokens"),
+            "completion_tokens": timing.get("completion_tokens"),
+            "tokens_per_s": tokens_per_s,
+        })
+
+    def record_retry(self, step, reason):
+        self.retries.inc(operation=operation_of(step), reason=reason)
+
+    def record_step(self, operation, seconds, **fields):
+        self.step_seconds.observe(seconds, operation=operation)
+        self._write({"event": "step", "ts": time.time(), "operation": operation,
+                     "wall_s": seconds, **fields})
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+    def render(self):
+        """Prometheus text exposition format."""
+        out = []
+        for instrument in self.instruments:
+            out.append(f"# HELP {instrument.name} {instrument.help}")
+            out.append(f"# TYPE {instrument.name} {instrument.kind}")
+            for name, value in instrument.samples():
+                out.append(f"{name} {value:g}" if isinstance(value, float) else f"{name} {value}")
+        return "\n".join(out) + "\n"
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """GET /metrics on a daemon thread; returns the server."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+def operation_of(step):
+    # "decide_repair" -> "decide"
+    return step[:-len("_repair")] if step.endswith("_repair") else step
+
+
+_metrics = Metrics.from_env()
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_metrics():
+    return _metrics
+
+
+def set_metrics(metrics):
+    global _metrics
+    _metrics = metrics
+
+
+def serve_from_env():
+    """Start the /metrics endpoint once if NCO_METRICS_PORT is set."""
+    global _server
+    port = os.environ.get("NCO_METRICS_PORT")
+    with _server_lock:
+        if port and _server is None:
+            _server = _metrics.serve(int(port), os.environ.get("NCO_METRICS_HOST", "127.0.0.1"))
+    return _server
+
+
+# -----------------------------
+# CLI: summarize a JSONL log
+# -----------------------------
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    index = min(int(round(q / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def summarize(path):
+    rows = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            key = (event["event"], event["operation"], event.get("model", ""))
+            rows.setdefault(key, []).append(event)
+    print(f"{'event':<9} {'operation':<10} {'model':<16} {'n':>5} {'p50 s':>7} {'p95 s':>7} "
+          f"{'p99 s':>7} {'tok/s':>6} {'load s':>7}")
+    for (kind, operation, model), events in sorted(rows.items()):
+        wall = [e["wall_s"] for e in events]
+        tps = [e["tokens_per_s"] for e in events if e.get("tokens_per_s")]
+        load = sum(e.get("load_s") or 0 for e in events)
+        print(f"{kind:<9} {operation:<10} {model[:16]:<16} {len(events):>5} "
+              f"{_percentile(wall, 50):>7.3f} {_percentile(wall, 95):>7.3f} "
+              f"{_percentile(wall, 99):>7.3f} "
+              f"{(sum(tps) / len(tps) if tps else 0):>6.1f} {load:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="percentiles per operation from a JSONL log")
+    summary.add_argument("path")
+    args = parser.parse_args()
+    if args.command == "summary":
+        summarize(args.path)
+
+
+if __name__ == "__main__":
+    main()
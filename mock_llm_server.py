@@ -0,0 +1,420 @@
+# mock_llm_server.py
+#
+# Deterministic stand-in for an LLM server, for load tests and offline runs.
+# Speaks the Ollama chat API (/api/chat, JSON or NDJSON stream) and the
+# OpenAI one (/v1/chat/completions, JSON or SSE stream), and answers the
+# agent's prompts with schema-valid JSON: the fields come from the request's
+# schema (format / response_format) or the prompt's "Respond ONLY in JSON"
+# template, skills from its "Candidate skills:" line. The same prompt and
+# --seed always give the same reply.
+#
+# Latency is simulated, not computed: time to first token is drawn from
+# --latency (const | uniform | normal | lognormal) around --ttft-ms, plus
+# prompt tokens / --prefill-tps, and generation runs at --tokens-per-s.
+#
+#   python mock_llm_server.py --port 11435 --ttft-ms 150 --tokens-per-s 80
+#   LLM_BACKEND=mock python main.py
+#   LLM_BACKEND=openai LLM_HOSTS=http://127.0.0.1:11435/v1 python main.py
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+LEVELS = ((0.4, "poor"), (0.65, "average"), (0.85, "good"), (1.01, "excellent"))
+QUESTIONS = (
+    "Walk me through how you would use {skill} to debug a failing production job.",
+    "Describe a project where {skill} was the hardest part. What trade-offs did you make?",
+    "A teammate's {skill} change doubled latency overnight. How do you investigate?",
+    "How would you explain the main pitfalls of {skill} to a new hire?",
+    "Design a small service that relies on {skill}. What would you test first?",
+)
+REASONS_TEXT = {
+    "poor": "The answer misses the core of the question.",
+    "average": "Relevant but shallow; no concrete reasoning.",
+    "good": "Correct and practical with some depth.",
+    "excellent": "Correct, deep and clearly reasoned.",
+}
+
+
+def approx_tokens(text):
+    return (len(text) + 3) // 4
+
+
+def _seconds(keep_alive, default=300):
+    # Ollama accepts seconds or durations such as "5m" / "1h"; negative = forever
+    if isinstance(keep_alive, (int, float)):
+        return keep_alive
+    match = re.fullmatch(r"\s*(-?[\d.]+)\s*(ms|s|m|h)?\s*", str(keep_alive or ""))
+    if not match:
+        return default
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[match.group(2) or "s"]
+    return float(match.group(1)) * scale
+
+
+class LatencyModel:
+    def __init__(self, ttft_ms=200, spread_ms=50, distribution="lognormal",
+                 tokens_per_s=50, prefill_tps=0, seed=0, model_scale=None):
+        self.model_scale = dict(model_scale or {})   # model -> latency multiplier
+        self.ttft = ttft_ms / 1000
+        self.spread = spread_ms / 1000
+        self.distribution = distribution
+        self.tokens_per_s = tokens_per_s
+        self.prefill_tps = prefill_tps
+        self.rng = random.Random(seed)
+
+    def first_token(self, prompt_tokens, model=None):
+        scale = self.model_scale.get(model, 1.0)
+        base, spread = self.ttft * scale, self.spread * scale
+        if self.distribution == "uniform":
+            delay = self.rng.uniform(base - spread, base + spread)
+        elif self.distribution == "normal":
+            delay = self.rng.gauss(base, spread)
+        elif self.distribution == "lognormal" and base > 0:
+            # median base, a heavy right tail like real queueing + prefill;
+            # log1p keeps sigma sane when spread > base, and the cap keeps a
+            # load test from hanging on one unlucky draw
+            delay = min(base * self.rng.lognormvariate(0, math.log1p(spread / base)),
+                        base + 10 * spread)
+        else:
+            delay = base
+        if self.prefill_tps:
+            delay += prompt_tokens / self.prefill_tps * scale
+        return max(delay, 0.0)
+
+    def token_interval(self, model=None):
+        if not self.tokens_per_s:
+            return 0.0
+        return self.model_scale.get(model, 1.0) / self.tokens_per_s
+
+
+class ReplyGenerator:
+    def __init__(self, seed=0, stop_rate=0.0):
+        self.seed = seed
+        self.stop_rate = stop_rate
+
+    def reply(self, messages, schema=None):
+        text = "\n".join(m.get("content", "") for m in messages)
+        digest = hashlib.sha256(f"{self.seed}\n{text}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        skills = self._skills(text)
+        keys = self._keys(text, schema)
+        current = re.search(r"CURRENT SKILL:\s*\n(.+)", text)
+
+        reply = {}
+        score = round(rng.uniform(0.2, 1.0), 2)
+        level = next(level for limit, level in LEVELS if score < limit)
+        skill = rng.choice(skills)
+        for key in keys:
+            if key == "score":
+                reply[key] = score
+            elif key == "level":
+                reply[key] = level
+            elif key == "reason":
+                reply[key] = REASONS_TEXT[level]
+            elif key == "follow_up":
+                topic = current.group(1).strip() if current else skill
+                reply[key] = (f"Can you give a concrete example of that with {topic}?"
+                              if score < 0.8 else "")
+            elif key == "action":
+                reply[key] = "stop" if rng.random() < self.stop_rate else "ask"
+            elif key == "skill":
+                reply[key] = skill
+            elif key == "question":
+                reply[key] = rng.choice(QUESTIONS).format(skill=skill)
+            else:
+                reply[key] = ""
+        return json.dumps(reply)
+
+    @staticmethod
+    def _keys(text, schema):
+        if isinstance(schema, dict) and schema.get("properties"):
+            return list(schema["properties"])
+        template = text.rpartition("Respond ONLY in JSON:")[2]
+        keys = re.findall(r'"(\w+)"\s*:', template)
+        return list(dict.fromkeys(keys)) or ["action", "skill", "question"]
+
+    @staticmethod
+    def _skills(text):
+        match = re.search(r"Candidate skills:\s*\n(.+)", text)
+        skills = [s.strip() for s in match.group(1).split(",")] if match else []
+        return [s for s in skills if s] or ["general"]
+
+
+class MockLLMServer:
+    def __init__(self, latency, generator, load_ms=0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.generator = generator
+        self.load = load_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.loaded = {}     # model -> monotonic time it unloads
+        self.requests = 0
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.completion_tokens = 0
+        self.started = time.monotonic()
+
+    # -----------------------------
+    # Simulated model
+    # -----------------------------
+    def _load_time(self, model, keep_alive):
+        # A model not used within its keep-alive pays --load-ms first
+        now = time.monotonic()
+        cold = self.loaded.get(model, 0) < now
+        keep = _seconds(keep_alive)
+        self.loaded[model] = now + (keep if keep >= 0 else float("inf"))
+        return self.load if cold else 0.0
+
+    async def _generate(self, req, schema, stream):
+        """Yields (piece, stats) as the simulated model produces them."""
+        model = req.get("model", "mock")
+        messages = req.get("messages") or []
+        load = self._load_time(model, req.get("keep_alive"))
+        if not messages:
+            # Ollama's "load the model" request
+            await asyncio.sleep(load)
+            yield "", {"load_s": load, "prompt_tokens": 0, "completion_tokens": 0,
+                       "prefill_s": 0.0, "generate_s": 0.0}
+            return
+
+        content = self.generator.reply(messages, schema)
+        prompt_tokens = sum(approx_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = approx_tokens(content)
+        prefill = self.latency.first_token(prompt_tokens, model)
+        interval = self.latency.token_interval(model)
+        await asyncio.sleep(load + prefill)
+
+        start = time.monotonic()
+        if stream:
+            # One ~4-character token per chunk, but at most ~200 wake-ups/s
+            per_chunk = math.ceil(0.005 / interval) if interval else completion_tokens
+            step = 4 * max(per_chunk, 1)
+            for i in range(0, len(content), step):
+                await asyncio.sleep(interval * per_chunk)
+                yield content[i:i + step], None
+        else:
+            await asyncio.sleep(interval * completion_tokens)
+            yield content, None
+        self.completion_tokens += completion_tokens
+        yield "", {"load_s": load, "prompt_tokens": prompt_tokens,
+                   "completion_tokens": completion_tokens, "prefill_s": prefill,
+                   "generate_s": time.monotonic() - start}
+
+    # -----------------------------
+    # Protocols
+    # -----------------------------
+    @staticmethod
+    def _ollama_stats(stats):
+        return {
+            "total_duration": int((stats["load_s"] + stats["prefill_s"] + stats["generate_s"]) * 1e9),
+            "load_duration": int(stats["load_s"] * 1e9),
+            "prompt_eval_count": stats["prompt_tokens"],
+            "prompt_eval_duration": int(stats["prefill_s"] * 1e9),
+            "eval_count": stats["completion_tokens"],
+            "eval_duration": int(stats["generate_s"] * 1e9),
+        }
+
+    async def _ollama_chat(self, req):
+        schema = req.get("format")
+        model = req.get("model", "mock")
+        stream = req.get("stream", True)
+        created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        def message(piece, done, stats=None):
+            data = {"model": model, "created_at": created,
+                    "message": {"role": "assistant", "content": piece}, "done": done}
+            if done:
+                data.update(done_reason="stop", **self._ollama_stats(stats))
+            return data
+
+        if not stream:
+            pieces = []
+            async for piece, stats in self._generate(req, schema, False):
+                pieces.append(piece)
+            return message("".join(pieces), True, stats)
+
+        async def lines():
+            async for piece, stats in self._generate(req, schema, True):
+                yield json.dumps(message(piece, stats is not None, stats)) + "\n"
+        return lines()
+
+    async def _openai_chat(self, req):
+        response_format = req.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema")
+        model = req.get("model", "mock")
+        completion_id = f"chatcmpl-{self.requests}"
+
+        def usage(stats):
+            return {"prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                    "total_tokens": stats["prompt_tokens"] + stats["completion_tokens"]}
+
+        if not req.get("stream"):
+            pieces = []
+            async for piece, stats in self._generate(req, schema, False):
+                pieces.append(piece)
+            return {"id": completion_id, "object": "chat.completion", "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "".join(pieces)}}],
+                    "usage": usage(stats)}
+
+        include_usage = (req.get("stream_options") or {}).get("include_usage")
+
+        async def events():
+            async for piece, stats in self._generate(req, schema, True):
+                if stats is None:
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk",
+                             "model": model,
+                             "choices": [{"index": 0, "delta": {"content": piece}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                elif include_usage:
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk",
+                             "model": model, "choices": [], "usage": usage(stats)}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+        return events()
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "requests": self.requests,
+            "inflight": self.inflight,
+            "peak_inflight": self.peak_inflight,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": self.completion_tokens / elapsed if elapsed else 0.0,
+            "loaded_models": sorted(m for m, until in self.loaded.items()
+                                    if until > time.monotonic()),
+        }
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path in ("/health", "/"):
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "GET" and path in ("/api/tags", "/v1/models"):
+            models = sorted(self.loaded) or ["mock"]
+            return 200, {"models": [{"name": m, "model": m} for m in models],
+                         "data": [{"id": m, "object": "model"} for m in models]}
+        if method != "POST":
+            return 404, {"error": f"no route {method} {path}"}
+
+        req = json.loads(body or b"{}")
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return 500, {"error": "injected failure"}
+        if path == "/api/chat":
+            return 200, await self._ollama_chat(req)
+        if path in ("/v1/chat/completions", "/chat/completions"):
+            return 200, await self._openai_chat(req)
+        return 404, {"error": f"no route {method} {path}"}
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive and chunked streaming
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                self.inflight += 1
+                self.peak_inflight = max(self.peak_inflight, self.inflight)
+                try:
+                    try:
+                        status, payload = await self._route(method, path.split("?")[0], body)
+                    except (ValueError, KeyError, TypeError) as e:
+                        status, payload = 400, {"error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"error": str(e)}
+
+                    if isinstance(payload, dict):
+                        data = json.dumps(payload).encode("utf-8")
+                        writer.write(
+                            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                            f"Content-Type: application/json\r\n"
+                            f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                        )
+                    else:
+                        sse = path.endswith("/chat/completions")
+                        content_type = "text/event-stream" if sse else "application/x-ndjson"
+                        writer.write(
+                            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                            f"Content-Type: {content_type}\r\n"
+                            f"Transfer-Encoding: chunked\r\n\r\n".encode("latin-1")
+                        )
+                        async for piece in payload:
+                            data = piece.encode("utf-8")
+                            writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+                            await writer.drain()
+                        writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+                finally:
+                    self.inflight -= 1
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=11435):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=200,
+                        help="median time to first token")
+    parser.add_argument("--spread-ms", type=float, default=50,
+                        help="half-width (uniform), std dev (normal) or tail (lognormal, "
+                             "capped at ttft + 10 x spread)")
+    parser.add_argument("--latency", default="lognormal",
+                        choices=["const", "uniform", "normal", "lognormal"])
+    parser.add_argument("--tokens-per-s", type=float, default=50,
+                        help="generation speed; 0 = instant")
+    parser.add_argument("--prefill-tps", type=float, default=0,
+                        help="prompt tokens/s added to the first token; 0 = free")
+    parser.add_argument("--load-ms", type=float, default=0,
+                        help="cold-start cost for a model outside its keep_alive")
+    parser.add_argument("--stop-rate", type=float, default=0.0,
+                        help="probability a decision is 'stop'")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="probability a chat request fails with HTTP 500")
+    parser.add_argument("--model-scale", action="append", default=[], metavar="MODEL=X",
+                        help="latency multiplier for one model, e.g. llama3.2:3b=0.4")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model_scale = {}
+    for item in args.model_scale:
+        model, _, scale = item.rpartition("=")
+        model_scale[model] = float(scale)
+    latency = LatencyModel(args.ttft_ms, args.spread_ms, args.latency,
+                           args.tokens_per_s, args.prefill_tps, args.seed, model_scale)
+    generator = ReplyGenerator(args.seed, args.stop_rate)
+    server = MockLLMServer(latency, generator, args.load_ms, args.error_rate, args.seed)
+    print(f"mock LLM server on {args.host}:{args.port} "
+          f"(ttft {args.ttft_ms:.0f}ms {args.latency}, {args.tokens_per_s:g} tok/s)")
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
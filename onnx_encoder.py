@@ -0,0 +1,237 @@
+# onnx_encoder.py
+#
+# CPU encoder backend: the fine-tuned SBERT transformer exported to ONNX with
+# int8 dynamic quantization, run through onnxruntime + tokenizers (no torch
+# at query time).
+#
+#   python onnx_encoder.py export [--assets faiss_assets]   # needs torch once
+#   python onnx_encoder.py check  [--assets faiss_assets]   # parity vs torch
+#
+# Then select it with NCOSemanticSearch(encoder="onnx").
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+
+ONNX_DIR = "sbert_nco_finetuned_onnx"
+CONFIG_FILE = "encoder_config.json"
+
+
+def _read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _sbert_layout(model_dir):
+    """Transformer dir, pooling mode, normalize flag and max length of an SBERT dir."""
+    modules = _read_json(os.path.join(model_dir, "modules.json"), [])
+    transformer_dir = model_dir
+    pooling = "mean"
+    normalize = False
+    for module in modules:
+        kind = module.get("type", "")
+        path = os.path.join(model_dir, module.get("path", ""))
+        if kind.endswith("Transformer"):
+            transformer_dir = path
+        elif kind.endswith("Pooling"):
+            cfg = _read_json(os.path.join(path, "config.json"), {})
+            if "pooling_mode" in cfg:
+                pooling = cfg["pooling_mode"]
+            elif cfg.get("pooling_mode_cls_token"):
+                pooling = "cls"
+            elif cfg.get("pooling_mode_max_tokens"):
+                pooling = "max"
+        elif kind.endswith("Normalize"):
+            normalize = True
+
+    sbert_cfg = _read_json(
+        os.path.join(transformer_dir, "sentence_bert_config.json"), {}
+    )
+    max_len = sbert_cfg.get("max_seq_length")
+    return transformer_dir, pooling, normalize, max_len
+
+
+def export_onnx(model_dir, out_dir, quantize=True, opset=17):
+    """Export the SBERT transformer to ONNX (and an int8 copy) plus tokenizer."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    transformer_dir, pooling, normalize, max_len = _sbert_layout(model_dir)
+    model = AutoModel.from_pretrained(transformer_dir).eval()
+    tokenizer = AutoTokenizer.from_pretrained(transformer_dir)
+    max_len = max_len or min(getattr(tokenizer, "model_max_length", 512), 512)
+
+    sample = tokenizer(["software engineer"], return_tensors="pt")
+    input_names = list(sample.keys())
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    export_kwargs = dict(
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            **{name: {0: "batch", 1: "seq"} for name in input_names},
+            "last_hidden_state": {0: "batch", 1: "seq"},
+        },
+        opset_version=opset,
+    )
+    args = tuple(sample[name] for name in input_names)
+    with torch.no_grad():
+        try:
+            torch.onnx.export(_LastHiddenState(model), args, fp32_path,
+                              dynamo=False, **export_kwargs)
+        except TypeError:
+            # torch < 2.5 has no dynamo flag
+            torch.onnx.export(_LastHiddenState(model), args, fp32_path,
+                              **export_kwargs)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(out_dir, "model_int8.onnx"),
+                         weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, CONFIG_FILE), "w") as f:
+        json.dump({
+            "input_names": input_names,
+            "pooling": pooling,
+            "normalize": normalize,
+            "max_seq_length": int(max_len),
+            "pad_token": tokenizer.pad_token,
+            "pad_id": tokenizer.pad_token_id,
+        }, f, indent=2)
+    return out_dir
+
+
+class OnnxEncoder:
+    """Drop-in for SentenceTransformer.encode() backed by onnxruntime."""
+
+    def __init__(self, onnx_dir, quantized=True, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        cfg = _read_json(os.path.join(onnx_dir, CONFIG_FILE))
+        if cfg is None:
+            raise FileNotFoundError(
+                f"no exported encoder in {onnx_dir}; run: python onnx_encoder.py export"
+            )
+        self.cfg = cfg
+
+        model_path = os.path.join(onnx_dir, "model_int8.onnx")
+        if not quantized or not os.path.exists(model_path):
+            model_path = os.path.join(onnx_dir, "model.onnx")
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(cfg["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=cfg["pad_id"], pad_token=cfg["pad_token"])
+
+    def _pool(self, hidden, mask):
+        if self.cfg["pooling"] == "cls":
+            return hidden[:, 0]
+        mask = mask[:, :, None].astype(hidden.dtype)
+        if self.cfg["pooling"] == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Sort by length so each batch pads to a similar length
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        out = [None] * len(sentences)
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in idx])
+            feeds = {
+                "input_ids": [e.ids for e in encodings],
+                "attention_mask": [e.attention_mask for e in encodings],
+                "token_type_ids": [e.type_ids for e in encodings],
+            }
+            feeds = {name: np.array(feeds[name], dtype="int64")
+                     for name in self.cfg["input_names"]}
+            hidden = self.session.run(None, feeds)[0]
+            emb = self._pool(hidden, feeds["attention_mask"])
+            for i, vec in zip(idx, emb):
+                out[i] = vec
+
+        emb = np.stack(out).astype("float32") if out else np.zeros((0, 0), "float32")
+        if normalize_embeddings or self.cfg["normalize"]:
+            emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+        return emb[0] if single else emb
+
+
+def parity_check(assets_dir="faiss_assets", queries=None, k=5):
+    """Cosine agreement and top-k overlap of the ONNX encoder vs the torch one."""
+    from faiss_search import NCOSemanticSearch
+
+    torch_searcher = NCOSemanticSearch(assets_dir, cache_size=0)
+    onnx_searcher = NCOSemanticSearch(assets_dir, cache_size=0, encoder="onnx")
+    if queries is None:
+        titles = [t for t in torch_searcher.columns["Title"].tolist() if t]
+        queries = titles[:200]
+
+    a = torch_searcher.encode(queries)
+    b = onnx_searcher.encode(queries)
+    cos = (a * b).sum(axis=1)
+
+    ta = torch_searcher.search_batch(queries, k)
+    tb = onnx_searcher.search_batch(queries, k)
+    overlap = [
+        len({h["NCO_Code"] for h in x} & {h["NCO_Code"] for h in y}) / max(len(x), 1)
+        for x, y in zip(ta, tb)
+    ]
+    top1 = [
+        bool(x and y and x[0]["NCO_Code"] == y[0]["NCO_Code"])
+        for x, y in zip(ta, tb)
+    ]
+    return {
+        "queries": len(queries),
+        "cosine_mean": float(cos.mean()),
+        "cosine_min": float(cos.min()),
+        f"top{k}_overlap": float(np.mean(overlap)),
+        "top1_agreement": float(np.mean(top1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        out_dir = os.path.join(args.assets, ONNX_DIR)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        export_onnx(os.path.join(args.assets, "sbert_nco_finetuned"), out_dir,
+                    quantize=not args.no_quantize)
+        for name in sorted(os.listdir(out_dir)):
+            size = os.path.getsize(os.path.join(out_dir, name)) / 1e6
+            print(f"{size:8.2f} MB  {os.path.join(out_dir, name)}")
+    else:
+        print(json.dumps(parity_check(args.assets, k=args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
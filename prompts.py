@@ -0,0 +1,187 @@
+# prompts.py
+#
+# Prompt assembly for the interview agent. Every prompt of a session is
+#
+#   prefix  role, rules, job and skills; byte-identical for the whole session
+#           (and across decide/evaluate/turn), so the backend can reuse it
+#   state   skill confidence + asked questions, capped at a token budget:
+#           duplicates dropped, newest questions verbatim, older ones folded
+#           into per-skill counts
+#   task    the step-specific instruction and JSON format
+#
+# so prompt length (and prefill time) stays flat as the interview goes on.
+from collections import Counter
+from itertools import zip_longest
+
+SYSTEM = "You are a strict interview agent and evaluator. Respond only in JSON."
+
+# Room kept for the "Earlier questions" summary line when the budget is hit
+SUMMARY_RESERVE = 40
+MAX_QUESTION_CHARS = 300
+
+
+def approx_tokens(text):
+    # ~4 characters per token for English with Llama-style tokenizers
+    return (len(text) + 3) // 4
+
+
+def _skills_text(resume_skills):
+    if isinstance(resume_skills, (list, tuple)):
+        return ", ".join(str(s) for s in resume_skills)
+    return str(resume_skills)
+
+
+def _clip(text, limit=MAX_QUESTION_CHARS):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class PromptBuilder:
+    """Builds the decide / evaluate / turn / follow-up prompts of one session.
+
+    state_budget caps the state section in (approximate) tokens; None keeps
+    every asked question, i.e. the prompt grows with the interview.
+    """
+
+    def __init__(self, job_info, resume_skills, state_budget=300):
+        self.state_budget = state_budget
+        self.prefix = f"""You are an intelligent interview agent and an expert technical interviewer.
+
+JOB ROLE:
+Title: {job_info['Title']}
+Description: {job_info['Description']}
+
+Candidate skills:
+{_skills_text(resume_skills)}
+
+Question rules:
+- Ask a mix of:
+  * Technical questions
+  * Behavioral questions
+  * Scenario-based questions (IMPORTANT)
+- Prefer skills with LOW confidence
+- Avoid repeating questions
+- Make questions practical and reasoning-based
+- If all important skills are evaluated, STOP
+
+Answer evaluation criteria:
+- relevance
+- correctness
+- depth
+- clarity
+"""
+
+    # -----------------------------
+    # Rolling state
+    # -----------------------------
+    def state(self, asked, asked_skills, confidence):
+        scores = ", ".join(f"{skill}={score:.2f}" for skill, score in confidence.items())
+        lines = ["INTERVIEW STATE:", f"Skill confidence: {scores or 'none yet'}"]
+
+        # Newest first, each distinct question once
+        seen = set()
+        items = []
+        for question, skill in reversed(list(zip_longest(asked, asked_skills, fillvalue=""))):
+            key = " ".join(str(question).lower().split())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            items.append((skill or "", _clip(question)))
+
+        used = approx_tokens("\n".join(lines)) + 10
+        recent = []
+        older = []
+        for i, (skill, question) in enumerate(items):
+            line = f"- [{skill}] {question}" if skill else f"- {question}"
+            cost = approx_tokens(line) + 1
+            if self.state_budget is not None and (
+                used + cost > self.state_budget - SUMMARY_RESERVE
+            ):
+                older = items[i:]
+                break
+            recent.append(line)
+            used += cost
+
+        if older:
+            counts = Counter(skill or "general" for skill, _ in older)
+            lines.append("Earlier questions (not repeated below): " + ", ".join(
+                f"{skill} x{n}" for skill, n in counts.most_common()
+            ))
+        if recent:
+            lines.append("Already asked (newest last):")
+            lines.extend(reversed(recent))
+        else:
+            lines.append("Already asked: none")
+        return "\n".join(lines) + "\n"
+
+    # -----------------------------
+    # Step prompts
+    # -----------------------------
+    def _current(self, skill, question, answer=None):
+        text = f"""
+CURRENT SKILL:
+{skill}
+
+QUESTION:
+{question}
+"""
+        if answer is not None:
+            text += f"""
+CANDIDATE ANSWER:
+{answer}
+"""
+        return text
+
+    def decide(self, state):
+        return self.prefix + "\n" + state + """
+TASK: Choose the next question following the question rules.
+
+Respond ONLY in JSON:
+{
+  "action": "ask" or "stop",
+  "skill": "<skill>",
+  "question": "<question>"
+}
+"""
+
+    def evaluate(self, state, skill, question, answer):
+        return self.prefix + "\n" + state + self._current(skill, question, answer) + """
+TASK: Evaluate the candidate answer using the evaluation criteria.
+
+Respond ONLY in JSON:
+{
+  "score": 0 to 1,
+  "level": "poor / average / good / excellent",
+  "reason": "short explanation",
+  "follow_up": "next question if needed"
+}
+"""
+
+    def turn(self, state, skill, question, answer):
+        return self.prefix + "\n" + state + self._current(skill, question, answer) + """
+TASK: First evaluate the candidate answer using the evaluation criteria.
+Then choose the next question following the question rules, counting the
+current skill as evaluated with your score.
+
+Respond ONLY in JSON:
+{
+  "score": 0 to 1,
+  "level": "poor / average / good / excellent",
+  "reason": "short explanation",
+  "follow_up": "next question on the same skill if needed",
+  "action": "ask" or "stop",
+  "skill": "<skill>",
+  "question": "<question>"
+}
+"""
+
+    def follow_up(self, state, skill, question):
+        return self.prefix + "\n" + state + self._current(skill, question) + """
+TASK: Write one follow-up question on the current skill that checks the
+reasoning behind the question from a different angle. Do not repeat it.
+
+Respond ONLY in JSON:
+{
+  "question": "<question>"
+}
+"""
@@ -0,0 +1,293 @@
+# resume_ingest.py
+#
+# Bulk resume ingestion: walk a directory of txt / PDF / DOCX resumes, parse
+# them across a process pool and yield one record per file (path, content
+# hash, sections, skills) as results arrive, so memory stays bounded by the
+# in-flight window rather than the corpus.
+#
+# Parsed output is cached in SQLite by content hash (plus PARSER_VERSION).
+# A file whose path, size and mtime are unchanged is served from the cache
+# without being read; a changed, moved or copied file is read and hashed,
+# and only content never seen before is parsed (once per run, however many
+# copies of it the directory holds).
+#
+#   NCO_RESUME_CACHE   SQLite cache file (default resume_cache.sqlite)
+#
+#   python resume_ingest.py resumes/ --out parsed.jsonl --workers 8
+#   python resume_ingest.py resumes/ --no-cache      # parse everything
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from resume_parser import PARSER_VERSION, parse_resume, resume_format, resume_text
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def iter_resume_files(directory):
+    """Resume files under directory, depth first, in name order, without listing it all."""
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except NotADirectoryError:
+        if resume_format(directory):
+            yield directory
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_resume_files(entry.path)
+        elif entry.is_file() and resume_format(entry.name):
+            yield entry.path
+
+
+def parse_file(path, data=None):
+    """Parsed record of one resume; runs in the worker processes."""
+    try:
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        record = parse_resume(resume_text(data, path))
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    record["format"] = resume_format(path)
+    return record
+
+
+def _parse_chunk(items):
+    # items: [((path, size, mtime_ns), hash, bytes)]
+    return [(key, digest, parse_file(key[0], data)) for key, digest, data in items]
+
+
+class _SQLiteResumeCache:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            " hash TEXT, version INTEGER, record TEXT, PRIMARY KEY (hash, version))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)"
+        )
+
+    def by_stat(self, path, size, mtime_ns):
+        row = self.conn.execute(
+            "SELECT p.hash, p.record FROM files f JOIN parsed p"
+            " ON p.hash = f.hash AND p.version = ?"
+            " WHERE f.path = ? AND f.size = ? AND f.mtime_ns = ?",
+            (PARSER_VERSION, path, size, mtime_ns)
+        ).fetchone()
+        return row if row else (None, None)
+
+    def by_hash(self, digest):
+        row = self.conn.execute(
+            "SELECT record FROM parsed WHERE hash = ? AND version = ?",
+            (digest, PARSER_VERSION)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, files, parsed):
+        """files: [(path, size, mtime_ns, hash)]; parsed: [(hash, record json)]."""
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)",
+                [(digest, PARSER_VERSION, record) for digest, record in parsed]
+            )
+            self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", files)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        return {
+            "parsed": self.conn.execute(
+                "SELECT COUNT(*) FROM parsed WHERE version = ?", (PARSER_VERSION,)
+            ).fetchone()[0],
+            "files": self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+class ResumeIngestor:
+    """Streams parsed resume records out of a directory.
+
+    workers=0 parses in this process (no pool start-up cost for a handful
+    of files); chunk_size files go to a worker per task, and at most
+    2 * workers tasks are in flight.
+    """
+
+    def __init__(self, cache_path="resume_cache.sqlite", workers=None, chunk_size=32,
+                 write_batch=512):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        self.write_batch = write_batch
+        self._cache = _SQLiteResumeCache(cache_path) if cache_path else None
+        self._files = []     # cache rows waiting for one batched write
+        self._parsed = []
+        self._inflight = {}  # hash queued for parsing -> stat keys of its copies
+        self.stats = {"files": 0, "stat_hits": 0, "hash_hits": 0, "parsed": 0,
+                      "errors": 0, "bytes_read": 0}
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        kwargs.setdefault("cache_path", os.environ.get("NCO_RESUME_CACHE", "resume_cache.sqlite"))
+        return cls(**kwargs)
+
+    def ingest(self, directory):
+        """Yield {"path", "hash", "format", "name", "role", "sections", "skills"}
+        (or {"path", "error"}) per resume; cached files first come out as found."""
+        pool = None
+        pending = set()
+        chunk = []
+        self._inflight = {}
+        try:
+            for path in iter_resume_files(directory):
+                self.stats["files"] += 1
+                record = self._cached(path, chunk)
+                if record is not None:
+                    yield record
+                if len(chunk) < self.chunk_size:
+                    continue
+                if self.workers <= 0:
+                    yield from self._collect(_parse_chunk(chunk))
+                    chunk = []
+                    continue
+                if pool is None:
+                    pool = ProcessPoolExecutor(self.workers)
+                pending.add(pool.submit(_parse_chunk, chunk))
+                chunk = []
+                # Bounded window: wait for a result before queueing more
+                while len(pending) >= 2 * self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._collect(future.result())
+            if chunk:
+                if pool is None:
+                    yield from self._collect(_parse_chunk(chunk))
+                else:
+                    pending.add(pool.submit(_parse_chunk, chunk))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from self._collect(future.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            self._write()
+
+    def _cached(self, path, chunk):
+        """Record from the cache (or an error record), or None after queueing
+        path for parsing."""
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            # Listed, then removed or made unreadable before we got to it
+            self.stats["errors"] += 1
+            return {"path": path, "error": f"{type(e).__name__}: {e}"}
+        stat_key = (path, st.st_size, st.st_mtime_ns)
+        if self._cache is not None:
+            digest, record = self._cache.by_stat(*stat_key)
+            if record is not None:
+                self.stats["stat_hits"] += 1
+                return {"path": path, "hash": digest, **json.loads(record)}
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            self.stats["errors"] += 1
+            return {"path": path, "error": f"{type(e).__name__}: {e}"}
+        self.stats["bytes_read"] += len(data)
+        digest = content_hash(data)
+        if self._cache is not None:
+            record = self._cache.by_hash(digest)
+            if record is not None:
+                self.stats["hash_hits"] += 1
+                self._files.append((*stat_key, digest))
+                return {"path": path, "hash": digest, **json.loads(record)}
+        if digest in self._inflight:
+            # Same content as a file already queued: served when that one returns
+            self.stats["hash_hits"] += 1
+            self._inflight[digest].append(stat_key)
+            return None
+        self._inflight[digest] = []
+        # Stat travels with the path so the files row can be written on return
+        chunk.append(((path, st.st_size, st.st_mtime_ns), digest, data))
+        return None
+
+    def _collect(self, results):
+        for stat_key, digest, record in results:
+            copies = self._inflight.pop(digest, [])
+            if "error" in record:
+                # Not cached: the cause (e.g. a missing PDF library) may go away
+                self.stats["errors"] += 1
+            else:
+                self.stats["parsed"] += 1
+                self._parsed.append((digest, json.dumps(record, ensure_ascii=False)))
+                self._files.extend((*key, digest) for key in [stat_key, *copies])
+            for path, _, _ in [stat_key, *copies]:
+                yield {"path": path, "hash": digest, **record}
+        if len(self._files) >= self.write_batch:
+            self._write()
+
+    def _write(self):
+        if self._cache is not None and (self._files or self._parsed):
+            self._cache.put(self._files, self._parsed)
+        self._files, self._parsed = [], []
+
+    def close(self):
+        self._write()
+        if self._cache is not None:
+            self._cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--out", help="write one JSON line per resume")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parser processes (default: CPU count; 0 = in process)")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--cache", default=os.environ.get("NCO_RESUME_CACHE",
+                                                          "resume_cache.sqlite"))
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    ingestor = ResumeIngestor(None if args.no_cache else args.cache, args.workers,
+                              args.chunk_size)
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    start = time.perf_counter()
+    try:
+        for record in ingestor.ingest(args.directory):
+            if out is not None:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+        ingestor.close()
+    elapsed = time.perf_counter() - start
+    stats = ingestor.stats
+    print(f"{stats['files']} resumes in {elapsed:.2f}s "
+          f"({stats['files'] / max(elapsed, 1e-9):,.0f} resumes/s): "
+          f"{stats['stat_hits']} unchanged, {stats['hash_hits']} known content, "
+          f"{stats['parsed']} parsed, {stats['errors']} errors; "
+          f"{stats['bytes_read'] / 1e6:.1f} MB read")
+
+
+if __name__ == "__main__":
+    main()
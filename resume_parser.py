@@ -1,10 +1,165 @@
 # resume_parser.py
+#
+# Resume text extraction (txt, PDF, DOCX) and section / skill parsing with
+# precompiled patterns. PDF needs pypdf (pip install pypdf); DOCX is read
+# with the standard library. resume_ingest.py runs this over directories
+# in a process pool with a content-hash cache.
+import html
+import io
+import os
 import re
+import zipfile
+
+# Bump when parsing changes so cached results are re-parsed
+PARSER_VERSION = 2
+
+FORMATS = {".txt": "txt", ".text": "txt", ".md": "txt", ".pdf": "pdf", ".docx": "docx"}
+
+# Section headings, matched at the start of a line ("Skills:", "TECHNICAL SKILLS",
+# "Work Experience -"); the text after a colon on the same line belongs to it
+SECTION_NAMES = {
+    "skills": ("skills", "technical skills", "key skills", "core skills", "skill set",
+               "skillset", "core competencies", "competencies", "technologies",
+               "tech stack", "tools and technologies"),
+    "projects": ("projects", "personal projects", "academic projects", "key projects"),
+    "experience": ("experience", "work experience", "professional experience",
+                   "employment", "employment history", "work history", "internships"),
+    "education": ("education", "academic background", "qualifications"),
+    "summary": ("summary", "profile", "professional summary", "objective",
+                "career objective", "about me"),
+    "certifications": ("certifications", "certificates", "licenses"),
+    "achievements": ("achievements", "awards", "honors"),
+    "languages": ("languages",),
+    "interests": ("interests", "hobbies"),
+}
+_HEADING_TO_SECTION = {h: s for s, headings in SECTION_NAMES.items() for h in headings}
+_HEADING = re.compile(
+    r"^[ \t]*(?:#+[ \t]*)?(?P<heading>"
+    + "|".join(sorted((re.escape(h) for h in _HEADING_TO_SECTION), key=len, reverse=True))
+    + r")[ \t]*(?:(?::|[-–—](?=[ \t]|$))[ \t]*(?P<rest>[^\n]*))?$",
+    re.I | re.M,
+)
+# Inside a skills section "Languages: Python, Go" is a label, not a new section
+_SKILL_LABELS = {"skills", "languages", "technologies", "tech stack",
+                 "tools and technologies", "competencies", "core competencies",
+                 "skill set", "skillset", "technical skills", "key skills", "core skills"}
+_FIELD = re.compile(r"^[ \t]*(?P<key>name|role|email|phone)[ \t]*:[ \t]*(?P<value>.+)$",
+                    re.I | re.M)
+_BULLET = re.compile(r"^[ \t]*(?:[-*•●▪◦‣·]|\d+[.)])[ \t]+")
+_LABEL = re.compile(r"^[A-Za-z][A-Za-z /&+.-]{0,30}:[ \t]*(?=\S)")
+_SPLIT = re.compile(r"[ \t]*(?:[,;|•·]|[ \t]/[ \t])[ \t]*")
+_SPACES = re.compile(r"[ \t ]+")
+MAX_SKILL_CHARS = 60
+
+# DOCX: paragraphs, tabs and line breaks of word/document.xml
+_DOCX_BREAK = re.compile(r"<w:(?:tab|br|cr)\b[^>]*/>")
+_DOCX_PARAGRAPH_END = re.compile(r"</w:p>")
+_DOCX_TEXT = re.compile(r"<w:t(?:\s[^>]*)?>([^<]*)</w:t>|(\t|\n)")
+
+
+# -----------------------------
+# Text extraction
+# -----------------------------
+def resume_format(name):
+    return FORMATS.get(os.path.splitext(name)[1].lower())
+
+
+def docx_text(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        xml = archive.read("word/document.xml").decode("utf-8")
+    xml = _DOCX_BREAK.sub(lambda m: "\t" if "tab" in m.group(0) else "\n", xml)
+    paragraphs = []
+    for paragraph in _DOCX_PARAGRAPH_END.split(xml):
+        text = "".join(m.group(1) if m.group(1) is not None else m.group(2)
+                       for m in _DOCX_TEXT.finditer(paragraph))
+        paragraphs.append(html.unescape(text))
+    return "\n".join(paragraphs).strip() + "\n"
+
+
+def pdf_text(data):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("reading PDF resumes needs pypdf: pip install pypdf") from None
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def resume_text(data, name):
+    """Plain text of a resume file's bytes; the format comes from name's extension."""
+    fmt = resume_format(name)
+    if fmt == "pdf":
+        return pdf_text(data)
+    if fmt == "docx":
+        return docx_text(data)
+    if fmt == "txt":
+        return data.decode("utf-8", errors="replace")
+    raise ValueError(f"unsupported resume format: {name}")
+
+
+def read_resume(path):
+    with open(path, "rb") as f:
+        return resume_text(f.read(), path)
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+def parse_sections(text):
+    """{section: body} for the known headings; text before the first is "header"."""
+    sections = {}
+    matches = []
+    current = None
+    for match in _HEADING.finditer(text):
+        heading = match.group("heading").lower()
+        if current == "skills" and match.group("rest") and heading in _SKILL_LABELS:
+            continue
+        matches.append(match)
+        current = _HEADING_TO_SECTION[heading]
+    header_end = matches[0].start() if matches else len(text)
+    if text[:header_end].strip():
+        sections["header"] = text[:header_end].strip()
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = (match.group("rest") or "") + text[match.end():end]
+        name = _HEADING_TO_SECTION[match.group("heading").lower()]
+        # Repeated headings (e.g. two skills blocks) are concatenated
+        sections[name] = (sections.get(name, "") + "\n" + body).strip()
+    return sections
+
+
+def skills_from_section(body):
+    """Bullets, comma / semicolon / pipe lists and "Label: a, b" lines, de-duplicated."""
+    skills = []
+    seen = set()
+    for line in body.splitlines():
+        line = _BULLET.sub("", line.strip())
+        line = _LABEL.sub("", line)
+        for item in _SPLIT.split(line):
+            item = _SPACES.sub(" ", item).strip(" .:-")
+            key = item.lower()
+            if not item or len(item) > MAX_SKILL_CHARS or key in seen:
+                continue
+            seen.add(key)
+            skills.append(item)
+    return skills
+
 
 def extract_skills(text):
-    match = re.search(r"Skills:(.*?)(Projects:|Education:|$)", text, re.S)
-    if not match:
+    body = parse_sections(text).get("skills")
+    if not body:
         return []
-    skills = re.findall(r"- (.+)", match.group(1))
-    return [s.strip() for s in skills]
+    return skills_from_section(body)
+
 
+def parse_resume(text):
+    """Header fields, sections and skills of one resume's text."""
+    sections = parse_sections(text)
+    fields = {m.group("key").lower(): m.group("value").strip()
+              for m in _FIELD.finditer(sections.get("header", ""))}
+    return {
+        "name": fields.get("name"),
+        "role": fields.get("role"),
+        "sections": sections,
+        "skills": skills_from_section(sections["skills"]) if "skills" in sections else [],
+    }
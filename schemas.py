@@ -0,0 +1,168 @@
+# schemas.py
+#
+# Typed replies for the agent's prompts. Each dataclass gives a JSON schema
+# that is passed to the backend as constrained output (ollama `format=`),
+# and parse() turns a reply straight into an instance or raises SchemaError.
+import json
+import typing
+from dataclasses import MISSING, asdict, dataclass, fields
+from typing import ClassVar, Optional
+
+_JSON_TYPES = {str: "string", float: "number", int: "integer", bool: "boolean"}
+
+# Scores at or above this move on to the next skill (agent.py); below it the
+# agent asks a follow-up on the same skill
+MOVE_ON_SCORE = 0.8
+
+
+class SchemaError(ValueError):
+    """A reply that is not valid JSON or does not match the schema."""
+
+
+def _base_type(tp):
+    # Optional[str] -> str
+    args = [a for a in typing.get_args(tp) if a is not type(None)]
+    return args[0] if args else tp
+
+
+class _Schema:
+    ENUMS: ClassVar[dict] = {}
+    RANGES: ClassVar[dict] = {}
+
+    @classmethod
+    def json_schema(cls):
+        hints = typing.get_type_hints(cls)
+        properties = {}
+        for f in fields(cls):
+            prop = {"type": _JSON_TYPES[_base_type(hints[f.name])]}
+            if f.name in cls.ENUMS:
+                prop["enum"] = list(cls.ENUMS[f.name])
+            if f.name in cls.RANGES:
+                prop["minimum"], prop["maximum"] = cls.RANGES[f.name]
+            properties[f.name] = prop
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": [f.name for f in fields(cls)],
+        }
+
+    @classmethod
+    def parse(cls, text):
+        try:
+            data = json.loads(text) if isinstance(text, str) else text
+        except ValueError as e:
+            raise SchemaError(f"not JSON: {e}") from None
+        if not isinstance(data, dict):
+            raise SchemaError("expected a JSON object")
+
+        hints = typing.get_type_hints(cls)
+        values = {}
+        for f in fields(cls):
+            if f.name not in data or data[f.name] is None:
+                if f.default is MISSING:
+                    raise SchemaError(f"missing field {f.name!r}")
+                continue
+            values[f.name] = cls._coerce(f.name, _base_type(hints[f.name]), data[f.name])
+
+        obj = cls(**values)
+        obj.validate()
+        return obj
+
+    @classmethod
+    def _coerce(cls, name, tp, value):
+        if tp is float:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise SchemaError(f"{name!r} must be a number, got {value!r}") from None
+            low, high = cls.RANGES.get(name, (None, None))
+            if low is not None and not low <= value <= high:
+                raise SchemaError(f"{name!r} must be in [{low}, {high}], got {value}")
+            return value
+        if not isinstance(value, str):
+            raise SchemaError(f"{name!r} must be a string, got {value!r}")
+        value = value.strip()
+        if name in cls.ENUMS:
+            value = value.lower()
+            if value not in cls.ENUMS[name]:
+                raise SchemaError(
+                    f"{name!r} must be one of {list(cls.ENUMS[name])}, got {value!r}"
+                )
+        return value
+
+    def validate(self):
+        pass
+
+    def to_dict(self):
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+@dataclass
+class Decision(_Schema):
+    ENUMS: ClassVar[dict] = {"action": ("ask", "stop")}
+
+    action: str
+    skill: str = ""
+    question: str = ""
+
+    def validate(self):
+        if self.action == "ask" and not self.question:
+            raise SchemaError("action 'ask' needs a non-empty 'question'")
+
+
+@dataclass
+class Evaluation(_Schema):
+    ENUMS: ClassVar[dict] = {"level": ("poor", "average", "good", "excellent")}
+    RANGES: ClassVar[dict] = {"score": (0.0, 1.0)}
+
+    score: float
+    level: str = ""
+    reason: str = ""
+    follow_up: Optional[str] = None
+
+
+@dataclass
+class Turn(_Schema):
+    """Fused evaluate-and-decide reply."""
+
+    ENUMS: ClassVar[dict] = {**Evaluation.ENUMS, **Decision.ENUMS}
+    RANGES: ClassVar[dict] = Evaluation.RANGES
+
+    # Field order is generation order: the score comes before the next step
+    score: float
+    level: str = ""
+    reason: str = ""
+    follow_up: Optional[str] = None
+    action: str = ""
+    skill: str = ""
+    question: str = ""
+
+    @classmethod
+    def _coerce(cls, name, tp, value):
+        # "action" may be left empty below the move-on threshold (see validate)
+        if name == "action" and isinstance(value, str) and not value.strip():
+            return ""
+        return super()._coerce(name, tp, value)
+
+    def validate(self):
+        # Below the move-on threshold the follow_up is used and the next step
+        # is not needed, so the action is only checked at or above it. An
+        # empty question is fine too: the agent then asks decide_next()
+        if self.score >= MOVE_ON_SCORE and self.action not in self.ENUMS["action"]:
+            raise SchemaError(f"'action' must be one of {list(self.ENUMS['action'])} "
+                              f"when 'score' >= {MOVE_ON_SCORE}")
+
+    def evaluation(self):
+        return Evaluation(self.score, self.level, self.reason, self.follow_up)
+
+    def decision(self):
+        return Decision(self.action, self.skill, self.question)
+
+
+@dataclass
+class FollowUp(_Schema):
+    question: str
+
+    def validate(self):
+        if not self.question:
+            raise SchemaError("empty 'question'")
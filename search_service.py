@@ -0,0 +1,301 @@
+# search_service.py
+#
+# Local search service: one process holds the index and model, and
+# concurrent /search requests are collected into micro-batches (up to
+# --max-batch queries or --window-ms, whichever comes first) that each run
+# one batched encode and one index search.
+#
+#   python search_service.py --port 8765
+#   python search_service.py --unix /tmp/nco_search.sock
+#
+# Apps switch over by setting NCO_SEARCH_SERVICE (e.g. http://127.0.0.1:8765
+# or unix:///tmp/nco_search.sock); get_searcher() then returns a SearchClient
+# with the same search()/search_batch()/match_resume()/hybrid_search()/
+# lookup_code()/warm_up() signatures. encode() and the loaded assets (model,
+# index, df) stay in the service: the client raises AttributeError for them.
+import argparse
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from faiss_search import NCOSemanticSearch
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+class MicroBatcher:
+    def __init__(self, searcher, window_ms=5, max_batch=64):
+        self.searcher = searcher
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        # Encoding is CPU bound; one worker keeps batches from competing
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.queries = 0
+
+    async def search(self, query, k):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, k, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # One encode + one search per distinct k (normally just one)
+            by_k = {}
+            for item in batch:
+                by_k.setdefault(item[1], []).append(item)
+            for k, items in by_k.items():
+                queries = [query for query, _, _ in items]
+                try:
+                    results = await loop.run_in_executor(
+                        self.executor, self.searcher.search_batch, queries, k
+                    )
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+            self.batches += 1
+            self.queries += len(batch)
+
+
+class SearchService:
+    def __init__(self, searcher, window_ms=5, max_batch=64):
+        self.searcher = searcher
+        self.batcher = MicroBatcher(searcher, window_ms, max_batch)
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            batches = self.batcher.batches
+            return 200, {
+                "batches": batches,
+                "queries": self.batcher.queries,
+                "mean_batch_size": self.batcher.queries / batches if batches else 0.0,
+            }
+        if method != "POST":
+            return 404, {"error": f"no route {method} {path}"}
+
+        req = json.loads(body or b"{}")
+        loop = asyncio.get_running_loop()
+        if path == "/search":
+            results = await self.batcher.search(req["query"], req.get("k", 3))
+            return 200, {"results": results}
+        if path == "/search_batch":
+            results = await loop.run_in_executor(
+                self.batcher.executor, self.searcher.search_batch,
+                req["queries"], req.get("k", 3)
+            )
+            return 200, {"results": results}
+        if path == "/hybrid_search":
+            query = req.pop("query")
+            results = await loop.run_in_executor(
+                self.batcher.executor,
+                lambda: self.searcher.hybrid_search(query, **req)
+            )
+            return 200, {"results": results}
+        if path == "/lookup_code":
+            results = await loop.run_in_executor(
+                self.batcher.executor, self.searcher.lookup_code, req["code"]
+            )
+            return 200, {"results": results}
+        if path == "/match_resume":
+            skills = req.pop("skills")
+            results = await loop.run_in_executor(
+                self.batcher.executor,
+                lambda: self.searcher.match_resume(skills, **req)
+            )
+            return 200, {"results": results}
+        return 404, {"error": f"no route {method} {path}"}
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive; enough for SearchClient and curl
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except (ValueError, KeyError, TypeError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None):
+        batch_task = asyncio.create_task(self.batcher.run())
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                batch_task.cancel()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class SearchClient:
+    """Thin client with the NCOSemanticSearch search API.
+
+    address is "http://host:port" or "unix:///path/to.sock". Each thread
+    keeps its own persistent connection.
+    """
+
+    # NCOSemanticSearch attributes that only exist in the service process
+    LOCAL_ONLY = ("encode", "model", "model_dir", "index", "df", "columns", "id_lookup",
+                  "lexical", "embedding_cache", "assets_dir")
+
+    def __init__(self, address, timeout=30):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        if name in self.LOCAL_ONLY:
+            raise AttributeError(
+                f"SearchClient has no {name!r}: NCO_SEARCH_SERVICE={self.address} serves "
+                "search, search_batch, match_resume, hybrid_search and lookup_code only; "
+                "use NCOSemanticSearch directly for local assets"
+            )
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.address.startswith("unix://"):
+                conn = _UnixHTTPConnection(self.address[len("unix://"):], self.timeout)
+            else:
+                hostport = self.address.split("://", 1)[-1].rstrip("/")
+                conn = http.client.HTTPConnection(hostport, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body, headers)
+                resp = conn.getresponse()
+                data = json.loads(resp.read())
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # Stale keep-alive connection: reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if resp.status != 200:
+            raise RuntimeError(
+                f"search service error {resp.status}: {data.get('error')}"
+            )
+        return data
+
+    def _post(self, path, payload):
+        return self._request("POST", path, payload)["results"]
+
+    def warm_up(self):
+        """The service loads its assets at start; this checks it is reachable."""
+        self._request("GET", "/health")
+        return self
+
+    def search(self, query, k=3):
+        return self._post("/search", {"query": query, "k": k})
+
+    def search_batch(self, queries, k=3):
+        return self._post("/search_batch", {"queries": list(queries), "k": k})
+
+    def match_resume(self, skills, k=3, **options):
+        return self._post("/match_resume", {"skills": list(skills), "k": k, **options})
+
+    def hybrid_search(self, query, k=3, **options):
+        return self._post("/hybrid_search", {"query": query, "k": k, **options})
+
+    def lookup_code(self, code):
+        return self._post("/lookup_code", {"code": code})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", default="faiss_assets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--encoder", default="torch", choices=["torch", "onnx"])
+    parser.add_argument("--mmap", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    searcher = NCOSemanticSearch(args.assets, mmap=args.mmap, encoder=args.encoder)
+    searcher.warm_up()
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"search service on {where} "
+          f"(assets loaded in {time.perf_counter() - start:.1f}s)")
+
+    service = SearchService(searcher, args.window_ms, args.max_batch)
+    asyncio.run(service.serve(args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
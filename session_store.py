@@ -0,0 +1,380 @@
+# session_store.py
+#
+# Interview sessions outside st.session_state: each session (agent state,
+# transcript, progress) is serialized to a compact zlib-compressed JSON blob
+# and kept in a SQLite file, so a server restart or worker recycle resumes
+# where the candidate left off and paused interviews cost disk, not RAM.
+#
+# Only the most recently used sessions stay resident (an LRU of at most
+# max_resident, minus those idle for idle_s); the rest are rehydrated from
+# their blob on the next load(). save() is write-behind: it serializes the
+# session into a pending map that a background thread writes out in one
+# transaction per batch, coalescing repeated saves of the same session.
+#
+#   NCO_SESSION_DB        SQLite file (default sessions.sqlite)
+#   NCO_SESSION_RESIDENT  sessions kept in memory (default 256)
+#   NCO_SESSION_IDLE_S    evict sessions untouched this long (default 600)
+#
+#   python session_store.py stats --path sessions.sqlite
+#   python session_store.py purge --path sessions.sqlite --older-than-days 30
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from agent import InterviewAgent
+
+STATUSES = ("active", "complete")
+
+
+class InterviewSession:
+    """One candidate's interview: the agent plus what the UI shows."""
+
+    def __init__(self, session_id, agent, messages=None, asked_skills=None,
+                 complete=False):
+        self.id = session_id
+        self.agent = agent
+        self.messages = messages if messages is not None else []
+        self.asked_skills = asked_skills if asked_skills is not None else []
+        self.complete = complete
+
+    @property
+    def job_info(self):
+        return self.agent.job_info
+
+    @property
+    def resume_skills(self):
+        return self.agent.resume_skills
+
+    @property
+    def status(self):
+        return "complete" if self.complete else "active"
+
+    def to_blob(self):
+        state = {
+            "agent": self.agent.to_state(),
+            "messages": self.messages,
+            "asked_skills": self.asked_skills,
+            "complete": self.complete,
+        }
+        data = json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+        return zlib.compress(data.encode("utf-8"), 6)
+
+    @classmethod
+    def from_blob(cls, session_id, blob, agent_cls=InterviewAgent, **agent_options):
+        state = json.loads(zlib.decompress(blob).decode("utf-8"))
+        agent = agent_cls.from_state(state["agent"], session_id=session_id, **agent_options)
+        return cls(session_id, agent, state["messages"], state["asked_skills"],
+                   state["complete"])
+
+
+class _SQLiteSessions:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " id TEXT PRIMARY KEY, state BLOB, status TEXT,"
+            " created REAL, updated REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT state FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def write(self, rows):
+        """rows: [(id, blob or None, status, updated)]; None deletes."""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                for session_id, blob, status, updated in rows:
+                    if blob is None:
+                        self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                        continue
+                    self.conn.execute(
+                        "INSERT INTO sessions VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT(id) DO UPDATE SET"
+                        " state = excluded.state, status = excluded.status,"
+                        " updated = excluded.updated",
+                        (session_id, blob, status, updated, updated)
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def purge(self, before):
+        with self._lock:
+            return self.conn.execute(
+                "DELETE FROM sessions WHERE updated < ?", (before,)
+            ).rowcount
+
+    def stats(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*), COALESCE(SUM(LENGTH(state)), 0)"
+                " FROM sessions GROUP BY status"
+            ).fetchall()
+        return {
+            "sessions": {status: count for status, count, _ in rows},
+            "bytes": sum(size for _, _, size in rows),
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class SessionStore:
+    """Bounded in-memory LRU of InterviewSessions in front of SQLite.
+
+    Callers save() after every change; a session evicted from memory is
+    rebuilt from its last saved state by load().
+    """
+
+    def __init__(self, path="sessions.sqlite", max_resident=256, idle_s=600,
+                 flush_interval=1.0, batch_size=256, agent_cls=InterviewAgent,
+                 **agent_options):
+        self.max_resident = max_resident
+        self.idle_s = idle_s
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.agent_cls = agent_cls
+        self.agent_options = agent_options   # e.g. router=..., passed on rehydrate
+
+        self._db = _SQLiteSessions(path)
+        self._resident = OrderedDict()   # id -> [session, last access]
+        self._pending = {}               # id -> (blob or None, status, updated)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self.hits = 0
+        self.rehydrated = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.batches = 0
+
+        self._writer = threading.Thread(target=self._run, name="session-writer",
+                                        daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_env(cls, **agent_options):
+        return cls(
+            path=os.environ.get("NCO_SESSION_DB", "sessions.sqlite"),
+            max_resident=int(os.environ.get("NCO_SESSION_RESIDENT", "256")),
+            idle_s=float(os.environ.get("NCO_SESSION_IDLE_S", "600")),
+            **agent_options,
+        )
+
+    # -----------------------------
+    # Sessions
+    # -----------------------------
+    def create(self, agent, session_id=None):
+        """Register a new session for agent and queue its first write."""
+        session = InterviewSession(session_id or agent.session_id, agent)
+        agent.session_id = session.id
+        self.save(session)
+        return session
+
+    def load(self, session_id):
+        """The session, from memory or rehydrated from its saved state; None if unknown."""
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._resident.get(session_id)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._resident.move_to_end(session_id)
+                self.hits += 1
+                return entry[0]
+            pending = self._pending.get(session_id)
+        if pending is not None:
+            blob = pending[0]
+        else:
+            blob = self._db.get(session_id)
+        if blob is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        session = InterviewSession.from_blob(session_id, blob, self.agent_cls,
+                                             **self.agent_options)
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep one copy
+            entry = self._resident.get(session_id)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                return entry[0]
+            self.rehydrated += 1
+            self._remember(session)
+        return session
+
+    def save(self, session):
+        """Snapshot session now; the write to disk happens in the background."""
+        blob = session.to_blob()
+        with self._lock:
+            self._pending[session.id] = (blob, session.status, time.time())
+            self._remember(session)
+            backlog = len(self._pending)
+        if backlog >= self.batch_size:
+            self._wake.set()
+        if backlog >= 4 * self.batch_size:
+            # The writer is behind: write on the caller's thread
+            self.flush()
+
+    def delete(self, session_id):
+        with self._lock:
+            entry = self._resident.pop(session_id, None)
+            self._pending[session_id] = (None, None, time.time())
+        if entry is not None:
+            entry[0].agent.suspend()
+
+    def _remember(self, session):
+        entry = self._resident.get(session.id)
+        if entry is None or entry[0] is not session:
+            if entry is not None:
+                entry[0].agent.suspend()
+            self._resident[session.id] = [session, time.monotonic()]
+        else:
+            entry[1] = time.monotonic()
+        self._resident.move_to_end(session.id)
+        while len(self._resident) > self.max_resident:
+            _, (old, _) = self._resident.popitem(last=False)
+            old.agent.suspend()
+            self.evictions += 1
+
+    def evict_idle(self):
+        """Drop sessions untouched for idle_s from memory; returns how many."""
+        cutoff = time.monotonic() - self.idle_s
+        evicted = []
+        with self._lock:
+            # OrderedDict is in access order: stop at the first recent one
+            for session_id, (session, last) in self._resident.items():
+                if last > cutoff:
+                    break
+                evicted.append(session_id)
+            for session_id in evicted:
+                self._resident.pop(session_id)[0].agent.suspend()
+            self.evictions += len(evicted)
+        return len(evicted)
+
+    # -----------------------------
+    # Write-behind
+    # -----------------------------
+    def flush(self):
+        """Write every pending save now; returns the number written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                    ids = list(self._pending)[:self.batch_size]
+                    batch = {i: self._pending[i] for i in ids}
+                self._db.write([(i, *row) for i, row in batch.items()])
+                with self._lock:
+                    # Drop only what was written; a newer save stays pending
+                    for i, row in batch.items():
+                        if self._pending.get(i) is row:
+                            del self._pending[i]
+                    self.writes += len(batch)
+                    self.batches += 1
+                written += len(batch)
+        return written
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.evict_idle()
+            except sqlite3.Error:
+                # Keep the pending saves; retried on the next tick
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self._db.close()
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def purge(self, older_than_s):
+        """Delete sessions not saved for older_than_s seconds."""
+        self.flush()
+        return self._db.purge(time.time() - older_than_s)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "resident": len(self._resident),
+                "max_resident": self.max_resident,
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "rehydrated": self.rehydrated,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "writes": self.writes,
+                "batches": self.batches,
+            }
+        stats["disk"] = self._db.stats()
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Process-wide store configured from NCO_SESSION_*; flushed at exit."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore.from_env()
+            atexit.register(_store.close)
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["stats", "purge"])
+    parser.add_argument("--path", default=os.environ.get("NCO_SESSION_DB", "sessions.sqlite"))
+    parser.add_argument("--older-than-days", type=float, default=30)
+    args = parser.parse_args()
+
+    db = _SQLiteSessions(args.path)
+    if args.command == "purge":
+        print(f"purged {db.purge(time.time() - args.older_than_days * 86400)} sessions")
+    print(json.dumps(db.stats(), indent=2))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+# skill_index.py
+#
+# Canonical skills: raw resume / LLM strings ("Py", "python3", "Python
+# programming") are mapped to one canonical skill so the agent scores each
+# skill once. Lookups go, cheapest first, through
+#
+#   exact    normalized string (and simple variants: version numbers and
+#            words like "programming" dropped) in the alias table
+#   lru      strings already resolved by an embedding lookup
+#   embed    one batched SBERT encode of every miss (the fine-tuned model of
+#            faiss_search.py, shared with the searchers) and one search of a
+#            FAISS inner-product index over the vocabulary's names and aliases
+#
+# A miss below the similarity threshold becomes its own canonical skill,
+# named by the first spelling seen for its id. The vocabulary index is
+# built by a background thread as soon as the canonicalizer is shared
+# (get_canonicalizer()); a lookup that needs it waits for the build, so a
+# skill maps to the same id however early it is looked up. Without the model
+# (no faiss_assets) or if building fails, only the exact and LRU paths are
+# used.
+#
+#   NCO_SKILL_VOCAB       JSON {"Canonical name": ["alias", ...]} replacing the built-in one
+#   NCO_SKILL_THRESHOLD   minimum cosine similarity for an embedding match (default 0.8)
+#
+#   python skill_index.py build                   # precompute the embedding matrix
+#   python skill_index.py lookup Py python3 "Python programming" k8s
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+SKILL_VOCABULARY = {
+    "Python": ["py", "python programming", "python scripting", "cpython"],
+    "Java": ["core java", "java se", "j2ee", "java ee"],
+    "JavaScript": ["js", "ecmascript", "es6", "vanilla js"],
+    "TypeScript": ["ts"],
+    "C": ["c language", "ansi c"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Go": ["golang"],
+    "Rust": [],
+    "Kotlin": [],
+    "Swift": [],
+    "PHP": [],
+    "Ruby": ["ruby on rails", "rails"],
+    "R": ["r language", "r programming"],
+    "MATLAB": [],
+    "Scala": [],
+    "Bash": ["shell scripting", "shell", "bash scripting", "unix shell"],
+    "SQL": ["structured query language", "sql queries", "t-sql", "pl/sql"],
+    "PostgreSQL": ["postgres", "psql"],
+    "MySQL": ["mariadb"],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "elk"],
+    "Data Structures and Algorithms": ["data structures", "algorithms", "dsa", "ds&a"],
+    "Object-Oriented Programming": ["oop", "oops", "object oriented design", "ood"],
+    "System Design": ["systems design", "distributed systems", "software architecture"],
+    "Machine Learning": ["ml", "machine-learning", "predictive modelling",
+                         "predictive modeling"],
+    "Deep Learning": ["dl", "neural networks", "neural nets"],
+    "Natural Language Processing": ["nlp", "text mining", "computational linguistics"],
+    "Computer Vision": ["image processing", "opencv"],
+    "Generative AI": ["genai", "llms", "large language models", "prompt engineering"],
+    "Data Analysis": ["data analytics", "analytics", "exploratory data analysis", "eda"],
+    "Data Science": [],
+    "Statistics": ["statistical analysis", "probability and statistics"],
+    "Data Engineering": ["etl", "data pipelines", "elt"],
+    "Data Visualization": ["dataviz", "visualization", "tableau", "power bi", "matplotlib"],
+    "Excel": ["ms excel", "microsoft excel", "spreadsheets"],
+    "Pandas": [],
+    "NumPy": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "TensorFlow": ["keras"],
+    "PyTorch": ["torch"],
+    "FAISS": ["vector search", "similarity search", "vector database"],
+    "Apache Spark": ["spark", "pyspark"],
+    "Hadoop": ["hdfs", "mapreduce"],
+    "Kafka": ["apache kafka"],
+    "Airflow": ["apache airflow"],
+    "Docker": ["containers", "containerization", "dockerfile"],
+    "Kubernetes": ["k8s", "kubectl", "helm"],
+    "AWS": ["amazon web services", "ec2", "s3", "aws lambda"],
+    "Azure": ["microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud platform"],
+    "Cloud Computing": ["cloud"],
+    "Terraform": ["infrastructure as code", "iac"],
+    "CI/CD": ["continuous integration", "continuous delivery", "continuous deployment",
+              "jenkins", "github actions", "gitlab ci"],
+    "DevOps": [],
+    "Linux": ["unix", "ubuntu", "linux administration"],
+    "Git": ["github", "gitlab", "version control", "source control"],
+    "REST APIs": ["rest", "restful apis", "rest api", "api design", "web apis"],
+    "GraphQL": [],
+    "Microservices": ["microservice architecture", "service oriented architecture", "soa"],
+    "HTML": ["html5"],
+    "CSS": ["css3", "sass", "scss", "tailwind"],
+    "React": ["reactjs", "react.js"],
+    "Angular": ["angularjs"],
+    "Vue": ["vuejs", "vue.js"],
+    "Node.js": ["node", "nodejs", "express", "express.js"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": [],
+    "Spring Boot": ["spring", "spring framework"],
+    "Android Development": ["android"],
+    "iOS Development": ["ios"],
+    "Testing": ["unit testing", "test automation", "pytest", "junit", "qa", "tdd"],
+    "Cybersecurity": ["information security", "infosec", "security", "network security"],
+    "Networking": ["computer networks", "tcp/ip", "network administration"],
+    "Operating Systems": ["os concepts"],
+    "Agile": ["scrum", "kanban", "agile methodologies"],
+    "Project Management": ["pmp", "program management"],
+    "Communication": ["communication skills", "verbal communication",
+                      "written communication", "presentation skills"],
+    "Teamwork": ["collaboration", "team player"],
+    "Leadership": ["team leadership", "people management", "mentoring"],
+    "Problem Solving": ["analytical thinking", "critical thinking", "troubleshooting"],
+}
+
+SkillMatch = namedtuple("SkillMatch", "id name score source")
+
+DEFAULT_THRESHOLD = 0.8
+
+_SPACES = re.compile(r"\s+")
+_PUNCT = re.compile(r"[^\w+#./& -]")
+_VERSION = re.compile(r"(?<=[a-z+#])[ -]?v?\d+(?:\.\d+)*$")
+_NOISE = re.compile(
+    r"\b(?:programming|language|languages|framework|frameworks|library|libraries|"
+    r"development|basics|fundamentals|skills?|experience|proficiency|"
+    r"proficient in|knowledge of|advanced|intermediate|beginner)\b"
+)
+
+
+def normalize_skill(text):
+    text = _PUNCT.sub(" ", str(text).lower())
+    return _SPACES.sub(" ", text).strip(" .-/")
+
+
+def _variants(key):
+    # Cheapest first: as written, without filler words, without a version
+    yield key
+    bare = _SPACES.sub(" ", _NOISE.sub(" ", key)).strip(" .-/")
+    if bare and bare != key:
+        yield bare
+    for text in (key, bare):
+        unversioned = _VERSION.sub("", text).strip(" .-/") if text else ""
+        if unversioned and unversioned != text:
+            yield unversioned
+
+
+def skill_id(name):
+    return re.sub(r"[^a-z0-9+#]+", "_", name.lower()).strip("_") or "unknown"
+
+
+def load_vocabulary(path=None):
+    path = path or os.environ.get("NCO_SKILL_VOCAB")
+    if not path:
+        return SKILL_VOCABULARY
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _vocabulary_hash(vocabulary):
+    data = json.dumps(vocabulary, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+class SkillCanonicalizer:
+    """Maps raw skill strings to canonical skills in one batched lookup."""
+
+    def __init__(self, vocabulary=None, assets_dir="faiss_assets", threshold=None,
+                 cache_size=10000, encoder="torch"):
+        vocabulary = vocabulary if vocabulary is not None else load_vocabulary()
+        self.assets_dir = assets_dir
+        self.encoder = encoder
+        self.threshold = threshold if threshold is not None else float(
+            os.environ.get("NCO_SKILL_THRESHOLD", DEFAULT_THRESHOLD)
+        )
+        self.vocab_hash = _vocabulary_hash(vocabulary)
+        self.names = {}       # id -> canonical name
+        self._exact = {}      # normalized name or alias -> id
+        self._texts = []      # embedded texts: every name and alias
+        self._labels = []     # id of each embedded text
+        for name, aliases in vocabulary.items():
+            sid = skill_id(name)
+            self.names[sid] = name
+            for text in [name, *aliases]:
+                key = normalize_skill(text)
+                self._exact.setdefault(key, sid)
+                self._texts.append(text)
+                self._labels.append(sid)
+        self._labels = np.array(self._labels, dtype=object)
+
+        self.cache_size = cache_size
+        self._lru = OrderedDict()    # normalized string -> SkillMatch
+        self._new_names = OrderedDict()   # id outside the vocabulary -> first display name
+        self._lock = threading.Lock()
+        self._index = None
+        self._searcher = None
+        self._builder = None
+        self._embeddings_off = False
+        self.stats = {"exact": 0, "lru": 0, "embed": 0, "new": 0}
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def canonicalize(self, skills):
+        """One SkillMatch per raw skill, in order; misses share one encode."""
+        skills = list(skills)
+        results = [None] * len(skills)
+        misses = {}           # normalized key -> positions
+        with self._lock:
+            for i, raw in enumerate(skills):
+                key = normalize_skill(raw)
+                match = self._lookup_exact(key)
+                if match is None:
+                    match = self._lru.get(key)
+                    if match is not None:
+                        self._lru.move_to_end(key)
+                        self.stats["lru"] += 1
+                if match is None:
+                    misses.setdefault(key, []).append(i)
+                else:
+                    results[i] = match
+
+        if misses:
+            resolved, final = self._embed_lookup(list(misses))
+            with self._lock:
+                for key, positions in misses.items():
+                    match = resolved[key]
+                    if match.source == "new":
+                        # Skills outside the vocabulary keep the first spelling
+                        # seen for their id ("Blockchain development", then "blockchain")
+                        name = self._new_names.setdefault(match.id, _display(skills[positions[0]]))
+                        self._new_names.move_to_end(match.id)
+                        match = match._replace(name=name)
+                    for i in positions:
+                        results[i] = match
+                    if final:
+                        # Not cached when the encode failed: the next lookup retries
+                        self._lru[key] = match
+                        self._lru.move_to_end(key)
+                while len(self._lru) > self.cache_size:
+                    self._lru.popitem(last=False)
+                while len(self._new_names) > self.cache_size:
+                    self._new_names.popitem(last=False)
+        return results
+
+    def canonical(self, skill):
+        return self.canonicalize([skill])[0]
+
+    def canonical_skills(self, skills):
+        """Distinct SkillMatches of skills (one per id), in first-seen order."""
+        matches = []
+        seen = set()
+        for match in self.canonicalize(s for s in skills if str(s).strip()):
+            if match.id not in seen:
+                seen.add(match.id)
+                matches.append(match)
+        return matches
+
+    def canonical_names(self, skills):
+        """Distinct canonical names of skills, in first-seen order."""
+        return [match.name for match in self.canonical_skills(skills)]
+
+    def _lookup_exact(self, key):
+        for variant in _variants(key):
+            sid = self._exact.get(variant)
+            if sid is not None:
+                self.stats["exact"] += 1
+                return SkillMatch(sid, self.names[sid], 1.0, "exact")
+        return None
+
+    def _embed_lookup(self, keys):
+        """({key: SkillMatch}, final); final is False when the encode failed.
+        Waits for the vocabulary index if it is still being built."""
+        index = self._vocab_index(wait=True)
+        results = {}
+        final = self._embeddings_off
+        if index is not None:
+            try:
+                emb = self._searcher.encode(keys)
+                final = True
+            except Exception:
+                emb = None
+            if emb is not None:
+                scores, rows = index.search(np.asarray(emb, dtype="float32"), 1)
+                for key, score, row in zip(keys, scores[:, 0], rows[:, 0]):
+                    if row >= 0 and score >= self.threshold:
+                        sid = self._labels[row]
+                        results[key] = SkillMatch(sid, self.names[sid], float(score), "embed")
+        with self._lock:
+            for key in keys:
+                if key in results:
+                    self.stats["embed"] += 1
+                else:
+                    self.stats["new"] += 1
+                    results[key] = SkillMatch(skill_id(_bare(key)), key, 0.0, "new")
+        return results, final
+
+    # -----------------------------
+    # Vocabulary index
+    # -----------------------------
+    @property
+    def _cache_dir(self):
+        return os.path.join(self.assets_dir, "skill_index")
+
+    def _vocab_index(self, wait=False):
+        """FAISS index over the vocabulary embeddings, or None while a
+        background thread builds it (unless wait), without a model, or if
+        building failed."""
+        if self._index is not None or self._embeddings_off:
+            return self._index
+        with self._lock:
+            if self._builder is None:
+                # Loading SBERT and encoding the vocabulary takes seconds, so
+                # it starts early and concurrent lookups share one build
+                self._builder = threading.Thread(target=self._build_in_background,
+                                                 daemon=True, name="skill-index")
+                self._builder.start()
+        if wait:
+            self._builder.join()
+        return self._index
+
+    def _build_in_background(self):
+        try:
+            index = self._build_index()
+        except Exception:
+            # No faiss / model files, or corrupt assets: exact and LRU matches only
+            index = None
+        with self._lock:
+            self._index = index
+            self._embeddings_off = index is None
+
+    def _build_index(self):
+        from faiss_search import NCOSemanticSearch
+        import faiss
+
+        searcher = NCOSemanticSearch(self.assets_dir, encoder=self.encoder)
+        if not os.path.isdir(searcher.model_dir):
+            return None
+        self._searcher = searcher
+        vectors = self._load_vectors()
+        if vectors is None:
+            vectors = np.asarray(searcher.model.encode(
+                self._texts, batch_size=64, normalize_embeddings=True
+            ), dtype="float32")
+            self._save_vectors(vectors)
+        index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+        return index
+
+    def _fingerprint(self):
+        from embedding_cache import model_fingerprint
+        return f"{self.vocab_hash}-{model_fingerprint(self._searcher.model_dir)}"
+
+    def _load_vectors(self):
+        meta_path = os.path.join(self._cache_dir, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") != self._fingerprint():
+                return None
+            vectors = np.load(os.path.join(self._cache_dir, "vectors.npy"))
+        except (OSError, ValueError):
+            return None
+        return vectors if len(vectors) == len(self._texts) else None
+
+    def _save_vectors(self, vectors):
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            tmp = os.path.join(self._cache_dir, "vectors.tmp.npy")
+            np.save(tmp, vectors)
+            os.replace(tmp, os.path.join(self._cache_dir, "vectors.npy"))
+            with open(os.path.join(self._cache_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self._fingerprint(), "texts": len(self._texts)}, f)
+        except OSError:
+            pass    # read-only assets: recomputed next process
+
+    def build(self):
+        """Compute (or load) the vocabulary matrix now; False without a model."""
+        return self._vocab_index(wait=True) is not None
+
+
+def _bare(key):
+    bare = _SPACES.sub(" ", _NOISE.sub(" ", key)).strip(" .-/")
+    return bare or key
+
+
+def _display(raw):
+    return _SPACES.sub(" ", str(raw)).strip()
+
+
+_canonicalizer = None
+_canonicalizer_lock = threading.Lock()
+
+
+def get_canonicalizer():
+    """Process-wide canonicalizer (vocabulary from NCO_SKILL_VOCAB or built in)."""
+    global _canonicalizer
+    with _canonicalizer_lock:
+        if _canonicalizer is None:
+            _canonicalizer = SkillCanonicalizer()
+            _canonicalizer._vocab_index()    # start the build in the background
+        return _canonicalizer
+
+
+def set_canonicalizer(canonicalizer):
+    global _canonicalizer
+    _canonicalizer = canonicalizer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="precompute the vocabulary embedding matrix")
+    build.add_argument("--assets", default="faiss_assets")
+    lookup = sub.add_parser("lookup", help="canonicalize skills")
+    lookup.add_argument("skills", nargs="+")
+    lookup.add_argument("--assets", default="faiss_assets")
+    args = parser.parse_args()
+
+    canonicalizer = SkillCanonicalizer(assets_dir=args.assets)
+    if args.command == "build":
+        if not canonicalizer.build():
+            parser.error(f"no encoder model in {args.assets}")
+        print(f"{len(canonicalizer._texts)} vocabulary texts in "
+              f"{canonicalizer._cache_dir}")
+        return
+    for raw, match in zip(args.skills, canonicalizer.canonicalize(args.skills)):
+        print(f"{raw!r:>28} -> {match.name!r} ({match.id}, {match.source}, {match.score:.2f})")
+
+
+if __name__ == "__main__":
+    main()